@@ -55,7 +55,8 @@ const DemandForecastChart = ({ selectedProducts }) => {
         axios
             .post("/pricing/demand-forecast/", { ids: selectedProducts })
             .then((res) => {
-                setData(res.data); // Update state with API response
+                // Update state with API response, skipping the ids of products that no longer exist
+                setData(res.data.filter((item) => item.status !== "not_found"));
             })
             .catch((err) => {
                 notification.addNotification({
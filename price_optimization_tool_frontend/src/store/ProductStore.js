@@ -15,7 +15,7 @@ class ProductStore {
     axios.get('/pricing/pricing-optimization/').then(res => {
       runInAction(() => {
         this.pricingOptimizeProducts = res.data
-        this.fetchCategoryList(res.data)
+        this.fetchCategoryList()
       })
     }).catch(err => {
       notification.addNotification({
@@ -25,10 +25,10 @@ class ProductStore {
     })
   }
   fetchProducts() {
-    axios.get('/products/products/').then(res => {
+    axios.get('/products/products/', { params: { paginate: 'false' } }).then(res => {
       runInAction(() => {
         this.products = res.data
-        this.fetchCategoryList(res.data)
+        this.fetchCategoryList()
       })
     }).catch(err => {
       notification.addNotification({
@@ -38,15 +38,17 @@ class ProductStore {
     })
   }
 
-  fetchCategoryList(data){
-    var uniqueCategoryList = new Set()
-    data.forEach((el)=>{
-      uniqueCategoryList.add(el.category)
+  fetchCategoryList(){
+    axios.get('/products/categories/').then(res => {
+      runInAction(() => {
+        this.categoryList = res.data.map((el) => el.category)
+      })
+    }).catch(err => {
+      notification.addNotification({
+        open: true,
+        message: 'Category Fetch Failed!'
+      })
     })
-    runInAction(() => {
-    this.categoryList=[...uniqueCategoryList]
-    }
-  )
   }
 
   addProduct(product) {
@@ -0,0 +1,23 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+
+# Token claim holding the user's role, added by `CustomTokenObtainPairSerializer`
+ROLE_CLAIM = 'role'
+
+
+class RoleClaimJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    JWT authentication that builds `request.user` from the token claims instead of the database.
+    - Tokens issued by `CustomTokenObtainPairSerializer` carry the user's `role` claim, so
+      `request.user` is a stateless `TokenUser` (exposing `id`, `username` and `role`) and no
+      `CustomUser` query runs on authenticated requests.
+    - Tokens issued before the claim was added fall back to loading the user from the database.
+    - Role changes and deactivations take effect once the user's access token is renewed.
+    """
+
+    def get_user(self, validated_token):
+        """
+        Returns a `TokenUser` for tokens with a role claim, otherwise the `CustomUser` from the database.
+        """
+        if ROLE_CLAIM not in validated_token:
+            return JWTAuthentication.get_user(self, validated_token)
+        return super().get_user(validated_token)
@@ -0,0 +1,45 @@
+import time
+from django.core.management.base import BaseCommand
+from accounts.outbox import EMAIL_OUTBOX_BATCH_SIZE, send_outbox_batch
+
+
+class Command(BaseCommand):
+    """
+    Management command running the email outbox sender.
+    - Sends the emails queued in `EmailOutbox` (e.g. verification emails) in batches, reusing one
+      connection to the mail server per batch and retrying failed deliveries with backoff.
+    - Runs until interrupted, polling the outbox when nothing is due; `--once` sends every due email and exits.
+    - Usage: `python manage.py send_outbox_emails [--batch-size N] [--poll-interval S] [--once]`
+    """
+    help = "Send queued outbox emails in batches over a reused mail server connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=EMAIL_OUTBOX_BATCH_SIZE,
+            help=f"Number of emails sent per batch (default: {EMAIL_OUTBOX_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=5.0,
+            help="Seconds to wait before checking the outbox again when nothing is due (default: 5).",
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Send every email that is due and exit instead of waiting for new ones.",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        try:
+            while True:
+                processed = send_outbox_batch(options['batch_size'])
+                total += processed
+                if processed:
+                    self.stdout.write(f"Processed {processed} outbox emails.")
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} outbox emails in total."))
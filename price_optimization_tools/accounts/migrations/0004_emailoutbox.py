@@ -0,0 +1,34 @@
+# Generated by Django 4.2.16 on 2026-10-18 13:30
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_customuser_username_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255)),
+                ('body', models.TextField()),
+                ('from_email', models.CharField(blank=True, max_length=255)),
+                ('recipient', models.EmailField(max_length=254)),
+                ('content_subtype', models.CharField(default='plain', max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('next_attempt_timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_timestamp', models.DateTimeField(auto_now_add=True)),
+                ('sent_timestamp', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_timestamp'], name='email_outbox_due_idx')],
+            },
+        ),
+    ]
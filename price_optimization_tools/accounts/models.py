@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
+from django.utils import timezone
 
 # Custom manager for user model to handle user creation and superuser creation
 class CustomUserManager(BaseUserManager):
@@ -47,7 +48,7 @@ class CustomUser(AbstractUser):
     """
     
     # The `username` field is still required by AbstractUser, but we'll make it unique with a default empty string
-    username = models.CharField(unique=True, default='')  
+    username = models.CharField(max_length=150, unique=True, default='')  
     
     # Email field for user identification, made unique so no two users can have the same email
     email = models.EmailField(unique=True)  
@@ -78,3 +79,58 @@ class CustomUser(AbstractUser):
         - This returns the user's email address when the user object is printed or logged.
         """
         return self.email
+
+
+# Outbox of emails waiting to be delivered by the `send_outbox_emails` worker
+class EmailOutbox(models.Model):
+    """
+    Model to represent an email queued for delivery outside of the request.
+    - Views queue messages here instead of talking to the SMTP server while the client waits.
+    - The `send_outbox_emails` worker sends due messages in batches over one reused connection,
+      retrying failed deliveries with exponential backoff.
+    """
+
+    # Delivery states of a queued email
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    # Message content, as passed to `EmailMessage`
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255, blank=True)
+    recipient = models.EmailField()
+    content_subtype = models.CharField(max_length=20, default='plain')  # 'html' for HTML bodies
+
+    # Delivery state: `pending` until sent, `failed` once every attempt has been used up
+    status = models.CharField(
+        max_length=10,
+        choices=[(PENDING, 'Pending'), (SENT, 'Sent'), (FAILED, 'Failed')],
+        default=PENDING,
+    )
+
+    # Number of failed delivery attempts, and the error raised by the last one
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    # Earliest time the next delivery attempt may run (pushed back after each failure)
+    next_attempt_timestamp = models.DateTimeField(default=timezone.now)
+
+    # Timestamps indicating when the email was queued and when it was sent
+    created_timestamp = models.DateTimeField(auto_now_add=True)
+    sent_timestamp = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        """
+        Meta options for the EmailOutbox model.
+        - `indexes`: index used by the worker to find the pending emails that are due.
+        """
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_timestamp'], name='email_outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        """
+        String representation of the EmailOutbox instance.
+        """
+        return f"{self.subject} to {self.recipient} ({self.status})"
@@ -0,0 +1,106 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+from .models import EmailOutbox
+
+# Number of due emails sent per batch (over a single connection to the mail server)
+EMAIL_OUTBOX_BATCH_SIZE = getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 100)
+
+# Number of delivery attempts before an email is marked as failed
+EMAIL_OUTBOX_MAX_ATTEMPTS = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+
+# Delay (in seconds) before the first retry; it doubles after every further failure, up to the maximum
+EMAIL_OUTBOX_RETRY_DELAY = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 60)
+EMAIL_OUTBOX_MAX_RETRY_DELAY = getattr(settings, 'EMAIL_OUTBOX_MAX_RETRY_DELAY', 60 * 60)
+
+
+def queue_email(subject, body, recipient, from_email=None, content_subtype='plain'):
+    """
+    Queues an email in the outbox and returns the `EmailOutbox` entry.
+    - Runs in the caller's transaction, so the email is only sent if the surrounding write commits.
+    """
+    return EmailOutbox.objects.create(
+        subject=subject,
+        body=body,
+        from_email=settings.EMAIL_HOST_USER if from_email is None else from_email,
+        recipient=recipient,
+        content_subtype=content_subtype,
+    )
+
+
+def retry_delay(attempts):
+    """
+    Returns the backoff before the next attempt after `attempts` failed deliveries.
+    """
+    return timedelta(seconds=min(EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1), EMAIL_OUTBOX_MAX_RETRY_DELAY))
+
+
+def send_outbox_batch(batch_size=EMAIL_OUTBOX_BATCH_SIZE):
+    """
+    Sends one batch of due outbox emails, oldest first, and returns the number of emails processed.
+    - One connection to the mail server (from `EMAIL_BACKEND`) is opened for the whole batch
+      instead of one per message.
+    - A failed email is rescheduled with exponential backoff (see `retry_delay`) and marked as
+      `failed` after `EMAIL_OUTBOX_MAX_ATTEMPTS` attempts; the rest of the batch is still sent.
+    - The claimed rows are locked until the batch is recorded, and rows locked by another worker
+      are skipped on databases that support `SKIP LOCKED`.
+    """
+    with transaction.atomic():
+        emails = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status=EmailOutbox.PENDING, next_attempt_timestamp__lte=timezone.now())
+            .order_by('next_attempt_timestamp', 'id')[:batch_size]
+        )
+        if not emails:
+            return 0
+
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as exc:
+            # The mail server is unreachable; count it as a failed attempt for the whole batch
+            for email in emails:
+                record_failure(email, exc)
+        else:
+            try:
+                for email in emails:
+                    send_email(connection, email)
+            finally:
+                connection.close()
+
+        EmailOutbox.objects.bulk_update(
+            emails, ['status', 'attempts', 'last_error', 'next_attempt_timestamp', 'sent_timestamp']
+        )
+    return len(emails)
+
+
+def send_email(connection, email):
+    """
+    Sends one outbox email over an open connection and records the outcome on the instance.
+    """
+    message = EmailMessage(
+        email.subject, email.body, email.from_email, [email.recipient], connection=connection
+    )
+    message.content_subtype = email.content_subtype
+    try:
+        message.send()
+    except Exception as exc:
+        record_failure(email, exc)
+        return
+    email.status = EmailOutbox.SENT
+    email.sent_timestamp = timezone.now()
+    email.last_error = ''
+
+
+def record_failure(email, exc):
+    """
+    Records a failed delivery attempt on an outbox email and schedules its retry.
+    """
+    email.attempts += 1
+    email.last_error = f"{type(exc).__name__}: {exc}"
+    if email.attempts >= EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = EmailOutbox.FAILED
+    else:
+        email.next_attempt_timestamp = timezone.now() + retry_delay(email.attempts)
@@ -35,3 +35,28 @@ class IsBuyer(permissions.BasePermission):
         - Returns True if the user is a buyer, otherwise returns False.
         """
         return request.user.role == 'buyer'  # Check if the user's role is 'buyer'
+
+
+class HasRole(permissions.BasePermission):
+    """
+    Custom permission class to check if the user has one of several roles.
+    - Grants access only to authenticated users whose role is one of `roles`.
+    - Replaces chained `IsAdmin`/`IsSupplier`/`IsBuyer` checks with a single set lookup;
+      instances hold no request state, so views share the module-level instances below.
+    """
+    def __init__(self, *roles):
+        self.roles = frozenset(roles)
+
+    def has_permission(self, request, view):
+        """
+        Checks if the user's role is one of the allowed roles.
+        - Returns True if it is, otherwise returns False (also for anonymous users).
+        """
+        return bool(request.user and request.user.is_authenticated) and request.user.role in self.roles
+
+
+# Admins and Suppliers (catalog writes)
+IS_ADMIN_OR_SUPPLIER = HasRole('admin', 'supplier')
+
+# Admins, Suppliers and Buyers (catalog and pricing reads)
+IS_ANY_ROLE = HasRole('admin', 'supplier', 'buyer')
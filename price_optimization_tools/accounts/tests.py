@@ -1,3 +1,115 @@
-from django.test import TestCase
+import io
+import smtplib
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from .models import CustomUser, EmailOutbox
+from .outbox import EMAIL_OUTBOX_MAX_ATTEMPTS, send_outbox_batch
+
+
+class UnreachableEmailBackend(BaseEmailBackend):
+    """
+    Email backend whose mail server always rejects the message, used to exercise retries.
+    """
+
+    def send_messages(self, email_messages):
+        raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+
+
+class RoleClaimAuthenticationTests(TestCase):
+    """
+    Tests for the role claim issued at login and the stateless `RoleClaimJWTAuthentication`.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            email='buyer@example.com', password='password', username='buyer', role='buyer'
+        )
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post(reverse('login'), {'email': 'buyer@example.com', 'password': 'password'})
+        self.assertEqual(response.status_code, 200)
+        return response.data['access']
+
+    def test_login_token_carries_role_claim(self):
+        token = AccessToken(self.login())
+
+        self.assertEqual(token['role'], 'buyer')
+        self.assertEqual(token['username'], 'buyer')
+
+    def test_role_claim_authenticates_without_user_query(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.login()}')
+        url = reverse('product-categories')
+        self.client.get(url)
+
+        # The category facets are cached, so the only query is the catalog fingerprint lookup;
+        # any other query here would come from authentication
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        # Buyers may read the catalog but not write it
+        response = self.client.post(reverse('product-list-create'), {}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_token_without_role_claim_loads_user(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        url = reverse('product-categories')
+        self.client.get(url)
+
+        # The catalog fingerprint lookup and the user lookup
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+
+class EmailOutboxTests(TestCase):
+    """
+    Tests for the verification email outbox and the `send_outbox_emails` worker.
+    """
+
+    def register(self):
+        response = APIClient().post(reverse('register'), {
+            'email': 'new@example.com', 'password': 'password', 'username': 'new', 'role': 'buyer',
+        })
+        self.assertEqual(response.status_code, 201)
+
+    def test_registration_queues_verification_email(self):
+        self.register()
+
+        # Nothing is sent inside the request
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(EmailOutbox.objects.get().status, EmailOutbox.PENDING)
+
+        call_command('send_outbox_emails', once=True, stdout=io.StringIO())
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['new@example.com'])
+        self.assertIn('/accounts/verify-email/', mail.outbox[0].body)
+        self.assertEqual(EmailOutbox.objects.get().status, EmailOutbox.SENT)
+
+    @override_settings(EMAIL_BACKEND='accounts.tests.UnreachableEmailBackend')
+    def test_failed_delivery_is_retried_with_backoff(self):
+        self.register()
+
+        self.assertEqual(send_outbox_batch(), 1)
+        email = EmailOutbox.objects.get()
+        self.assertEqual((email.status, email.attempts), (EmailOutbox.PENDING, 1))
+        self.assertIn('SMTPServerDisconnected', email.last_error)
+
+        # The retry is not due yet
+        self.assertEqual(send_outbox_batch(), 0)
+
+        for _ in range(EMAIL_OUTBOX_MAX_ATTEMPTS - 1):
+            EmailOutbox.objects.update(next_attempt_timestamp=email.created_timestamp)
+            send_outbox_batch()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (EmailOutbox.FAILED, EMAIL_OUTBOX_MAX_ATTEMPTS))
 
-# Create your tests here.
@@ -2,6 +2,8 @@ from django.shortcuts import render
 from rest_framework import generics
 from .models import CustomUser
 from .serializers import UserSerializer
+from .authentication import ROLE_CLAIM
+from .outbox import queue_email
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -9,7 +11,7 @@ from rest_framework import status
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework.response import Response
-from django.core.mail import EmailMessage
+from django.db import transaction
 from django.urls import reverse
 from django.conf import settings
 from django.utils.http import urlsafe_base64_encode
@@ -35,9 +37,10 @@ class RegisterView(APIView):
 
     def send_verification_email(self, user):
         """
-        Sends a verification email to the newly created user.
+        Queues a verification email for the newly created user.
         - Generates a token and a link for email verification.
-        - Sends the email using Django's EmailMessage class.
+        - Adds the email to the outbox; the `send_outbox_emails` worker delivers it, so the
+          request does not wait for the mail server.
         """
         
         # Generate a unique UID and token for the user
@@ -53,31 +56,26 @@ class RegisterView(APIView):
         subject = 'Verify Your Email Address'
         message = render_to_string('email_verification.html', {'verification_link': verification_link, 'user_name': user.username})
         
-        # Create the email message
-        email = EmailMessage(
-            subject,
-            message,
-            settings.EMAIL_HOST_USER,
-            [user.email],
-        )
-        email.content_subtype = "html"  # Set the content type to HTML
-        email.send()  # Send the email
+        # Queue the email in the outbox as HTML
+        queue_email(subject, message, user.email, from_email=settings.EMAIL_HOST_USER, content_subtype="html")
 
     def perform_create(self, serializer):
         """
-        This method saves the user instance and sends the verification email.
+        This method saves the user instance and queues the verification email.
         - The user is saved with `is_active=False`, meaning the user will not be able to log in until email verification.
+        - The user and the queued email are written in one transaction.
         """
-        user = serializer.save(is_active=False)  # User is inactive until email is verified
-        
-        # Send the email verification after saving the user
-        self.send_verification_email(user)
+        with transaction.atomic():
+            user = serializer.save(is_active=False)  # User is inactive until email is verified
+
+            # Queue the email verification after saving the user
+            self.send_verification_email(user)
 
     def post(self, request, *args, **kwargs):
         """
         Handles POST requests for user registration.
         - Accepts the user data, validates it, and creates the user.
-        - Sends a verification email upon successful registration.
+        - Queues a verification email upon successful registration.
         """
         
         # Serialize the incoming data (user registration data)
@@ -146,7 +144,20 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """
     Custom serializer for JWT token obtainment.
     - Extends the default `TokenObtainPairSerializer` to add custom fields like user role.
+    - Embeds the role and username as token claims, so `RoleClaimJWTAuthentication` can
+      authenticate requests without loading the user from the database.
     """
+
+    @classmethod
+    def get_token(cls, user):
+        """
+        Returns the refresh token for `user` with the `role` and `username` claims added.
+        - Access tokens derived from it (at login and on refresh) copy these claims.
+        """
+        token = super().get_token(user)
+        token[ROLE_CLAIM] = user.role
+        token['username'] = user.username
+        return token
     
     def validate(self, attrs):
         """
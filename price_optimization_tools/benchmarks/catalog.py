@@ -0,0 +1,55 @@
+import random
+from decimal import Decimal
+from pricing.models import PricingOptimization
+from products.models import Product
+from products.snapshots import refresh_product_snapshots
+
+# Categories used by the synthetic catalog
+CATEGORIES = ('Electronics', 'Stationary', 'Home', 'Garden', 'Toys', 'Sports', 'Books', 'Beauty')
+
+# Words the synthetic product names and descriptions are built from
+WORDS = (
+    'eco', 'smart', 'wireless', 'compact', 'premium', 'classic', 'portable', 'solar',
+    'bottle', 'lamp', 'desk', 'earbuds', 'notebook', 'charger', 'backpack', 'speaker',
+)
+
+
+def generate_catalog(count, batch_size=10000, seed=0, with_pricing=True):
+    """
+    Inserts `count` synthetic products (and their `PricingOptimization` and `ProductSnapshot` rows) into the database.
+    - Rows are generated and inserted in batches of `batch_size`, so memory stays flat and the
+      generator scales to a 1M-product catalog.
+    - The data is deterministic for a given `seed`, so benchmark runs are comparable.
+    - Returns the number of products created.
+    """
+    rng = random.Random(seed)
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        products = []
+        for index in range(created, created + size):
+            selling_price = Decimal(rng.randint(100, 30000)) / 100
+            name = ' '.join(rng.choice(WORDS) for _ in range(3)).title()
+            products.append(Product(
+                name=f"{name} {index}",
+                category=rng.choice(CATEGORIES),
+                cost_price=(selling_price * Decimal(rng.randint(30, 95)) / 100).quantize(Decimal('0.01')),
+                selling_price=selling_price,
+                description=' '.join(rng.choice(WORDS) for _ in range(12)),
+                stock_available=rng.randint(0, 5000),
+                units_sold=rng.randint(0, 5000),
+            ))
+        products = Product.objects.bulk_create(products)
+
+        if with_pricing:
+            PricingOptimization.objects.bulk_create([
+                PricingOptimization(
+                    product=product,
+                    demand_forecast=rng.randint(0, 2000),
+                    optimized_price=product.selling_price,
+                )
+                for product in products
+            ])
+        refresh_product_snapshots([product.id for product in products])
+        created += size
+    return created
@@ -0,0 +1,211 @@
+"""
+Benchmark of concurrent request throughput on the catalog read endpoints, WSGI versus ASGI.
+- Replays a dashboard fan-out (pricing optimization per category, a product list page and a
+  demand forecast lookup) against Django's WSGI handler driven by `--threads` worker threads,
+  and against its ASGI handler driven by one event loop with `--concurrency` requests in flight.
+  Both handlers are called in-process, so the numbers compare the request paths, not web servers.
+- Runs offline on a throwaway SQLite database filled with a synthetic catalog. `--query-latency`
+  adds a delay (in milliseconds) to every SQL query to model the round trip to a networked
+  PostgreSQL server, which is where async request handling pays off.
+- The response cache is disabled unless `--cache` is passed, so every request reads the database.
+- Usage (from the Django project directory):
+  `python -m benchmarks.concurrency [--products 10000] [--requests 300] [--threads 4] [--concurrency 32] [--query-latency 2]`
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'price_optimization_tool.settings')
+os.environ.setdefault('USE_SQLITE', '1')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.handlers.asgi import ASGIHandler  # noqa: E402
+from django.core.handlers.wsgi import WSGIHandler  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.db.backends.signals import connection_created  # noqa: E402
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from accounts.models import CustomUser  # noqa: E402
+from accounts.views import CustomTokenObtainPairSerializer  # noqa: E402
+from products.models import Product  # noqa: E402
+from .catalog import CATEGORIES, generate_catalog  # noqa: E402
+
+
+def delay_queries(latency):
+    """
+    Returns a database execute wrapper that sleeps `latency` seconds before every query.
+    """
+    def wrapper(execute, sql, params, many, context):
+        time.sleep(latency)
+        return execute(sql, params, many, context)
+    return wrapper
+
+
+def dashboard_requests(product_ids):
+    """
+    Returns the `(method, path, query_string, body)` requests of one dashboard load.
+    """
+    requests = [
+        ('GET', reverse('pricing-optimization'), f'category={category}', b'')
+        for category in CATEGORIES[:4]
+    ]
+    requests.append(('GET', reverse('product-list-create'), 'page_size=100', b''))
+    requests.append(('POST', reverse('demand-forecast'), '', json.dumps({'ids': product_ids[:50]}).encode()))
+    return requests
+
+
+def run_wsgi(requests, authorization, threads):
+    """
+    Sends `requests` through the WSGI handler from `threads` threads; returns the latencies in seconds.
+    """
+    handler = WSGIHandler()
+
+    def send(request):
+        method, path, query_string, body = request
+        environ = {
+            'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': query_string,
+            'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'testserver', 'HTTP_AUTHORIZATION': authorization,
+            'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': io.BytesIO(body), 'wsgi.url_scheme': 'http', 'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+        }
+        statuses = []
+        started = time.perf_counter()
+        response = handler(environ, lambda status, headers, exc_info=None: statuses.append(status))
+        try:
+            for _ in response:
+                pass
+        finally:
+            response.close()
+        if not statuses[0].startswith('200'):
+            raise AssertionError(f"WSGI {method} {path} returned {statuses[0]}")
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(send, requests))
+
+
+async def run_asgi(requests, authorization, concurrency):
+    """
+    Sends `requests` through the ASGI handler with `concurrency` requests in flight; returns the latencies in seconds.
+    """
+    handler = ASGIHandler()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(request):
+        method, path, query_string, body = request
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '',
+            'query_string': query_string.encode(), 'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+            'headers': [
+                (b'host', b'testserver'), (b'authorization', authorization.encode()),
+                (b'content-type', b'application/json'), (b'content-length', str(len(body)).encode()),
+            ],
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        async def collect(message):
+            messages.append(message)
+
+        async with semaphore:
+            started = time.perf_counter()
+            await handler(scope, receive, collect)
+            latency = time.perf_counter() - started
+        if messages[0]['status'] != 200:
+            raise AssertionError(f"ASGI {method} {path} returned {messages[0]['status']}")
+        return latency
+
+    return await asyncio.gather(*(send(request) for request in requests))
+
+
+def summarize(latencies, elapsed):
+    """
+    Returns the throughput and latency percentiles of a run.
+    """
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'requests_per_s': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=int, default=10000, help='Number of synthetic products in the catalog')
+    parser.add_argument('--requests', type=int, default=300, help='Requests sent per server type')
+    parser.add_argument('--threads', type=int, default=4, help='WSGI worker threads')
+    parser.add_argument('--concurrency', type=int, default=32, help='ASGI requests in flight')
+    parser.add_argument('--query-latency', type=float, default=2.0, help='Delay added to every SQL query, in milliseconds')
+    parser.add_argument('--cache', action='store_true', help='Keep the catalog response cache enabled')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    options = parser.parse_args()
+
+    setup_test_environment()
+    database_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    caches = None if options.cache else override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+    )
+    try:
+        if caches:
+            caches.enable()
+        generate_catalog(options.products)
+        user = CustomUser.objects.create_user(
+            email='benchmark@example.com', password='password', username='benchmark', role='admin'
+        )
+        authorization = f'Bearer {CustomTokenObtainPairSerializer.get_token(user).access_token}'
+        product_ids = list(Product.objects.order_by('id').values_list('id', flat=True)[:50])
+
+        fan_out = dashboard_requests(product_ids)
+        requests = [fan_out[index % len(fan_out)] for index in range(options.requests)]
+
+        # Every connection opened from now on (one per worker thread) models a networked database
+        if options.query_latency:
+            wrapper = delay_queries(options.query_latency / 1000)
+            connection_created.connect(lambda connection, **kwargs: connection.execute_wrappers.append(wrapper), weak=False)
+            for existing in connections.all():
+                existing.execute_wrappers.append(wrapper)
+
+        results = {}
+        started = time.perf_counter()
+        latencies = run_wsgi(requests, authorization, options.threads)
+        results['wsgi'] = summarize(latencies, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        latencies = asyncio.run(run_asgi(requests, authorization, options.concurrency))
+        results['asgi'] = summarize(latencies, time.perf_counter() - started)
+    finally:
+        if caches:
+            caches.disable()
+        connection.creation.destroy_test_db(database_name, verbosity=0)
+        teardown_test_environment()
+
+    print(f"{options.products} products, {options.requests} requests, "
+          f"{options.query_latency:g} ms added per query, cache {'on' if options.cache else 'off'}")
+    for name, label in (('wsgi', f'WSGI ({options.threads} threads)'), ('asgi', f'ASGI ({options.concurrency} in flight)')):
+        result = results[name]
+        print(f"{label:<22} {result['requests_per_s']:8.1f} req/s   "
+              f"p50 {result['p50_ms']:8.1f} ms   p95 {result['p95_ms']:8.1f} ms")
+
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump({'options': vars(options), 'results': results}, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
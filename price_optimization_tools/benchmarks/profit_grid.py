@@ -0,0 +1,80 @@
+"""
+Benchmark of the vectorized profit-maximizing price optimizer (`PRICING_STRATEGY = 'profit_grid'`).
+- Generates a synthetic catalog in memory and times `batch_profit_maximizing_price` on it,
+  alongside the default stock-factor blend for comparison. No database is used.
+- Usage (from the Django project directory):
+  `python -m benchmarks.profit_grid [--products 100000] [--price-points 200] [--repeat 3]`
+"""
+import argparse
+import os
+import time
+
+# Keep NumPy on a single core so results are comparable between machines
+os.environ.setdefault('OMP_NUM_THREADS', '1')
+os.environ.setdefault('OPENBLAS_NUM_THREADS', '1')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'price_optimization_tool.settings')
+os.environ.setdefault('USE_SQLITE', '1')
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+from pricing.engine import batch_demand_forecast, batch_optimized_price, batch_profit_maximizing_price  # noqa: E402
+
+
+def synthetic_catalog(products, seed=0):
+    """
+    Returns pricing input columns for `products` random products (prices in cents, like the database).
+    """
+    rng = np.random.default_rng(seed)
+    selling_price = rng.integers(100, 30000, products) / 100
+    cost_price = np.round(selling_price * rng.uniform(0.3, 1.0, products), 2)
+    return {
+        'cost_price': cost_price,
+        'selling_price': selling_price,
+        'stock_available': rng.integers(0, 5000, products),
+        'units_sold': rng.integers(0, 5000, products),
+    }
+
+
+def best_of(repeat, function, *args, **kwargs):
+    """
+    Runs `function` `repeat` times and returns the fastest wall-clock time in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(*args, **kwargs)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--price-points', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    options = parser.parse_args()
+
+    catalog = synthetic_catalog(options.products)
+    demand = batch_demand_forecast(catalog['units_sold'], catalog['stock_available'], catalog['selling_price'])
+
+    blend = best_of(
+        options.repeat, batch_optimized_price,
+        catalog['cost_price'], catalog['selling_price'], catalog['stock_available'], demand,
+    )
+    grid = best_of(
+        options.repeat, batch_profit_maximizing_price,
+        catalog['cost_price'], catalog['selling_price'], catalog['stock_available'], catalog['units_sold'],
+        price_points=options.price_points,
+    )
+
+    cells = options.products * options.price_points
+    print(f"blend:       {options.products} products in {blend:.3f}s")
+    print(f"profit_grid: {options.products} products x {options.price_points} price points "
+          f"in {grid:.3f}s ({cells / grid / 1e6:.1f}M candidates/s)")
+
+
+if __name__ == '__main__':
+    main()
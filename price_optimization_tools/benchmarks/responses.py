@@ -0,0 +1,98 @@
+"""
+Benchmark of JSON encoding and response compression for a large catalog payload.
+- Builds the `GET /pricing/pricing-optimization/` payload of a synthetic `--products` catalog
+  (the same rows the view reads from the snapshot table) and times rendering it with DRF's
+  `JSONRenderer` (standard `json` module) and with `FastJSONRenderer` (orjson).
+- Then compresses the rendered JSON with every content coding `ResponseCompressionMiddleware`
+  can negotiate (gzip, and Brotli when the `brotli` package is installed) and reports the time
+  and the bytes on the wire of each.
+- Runs offline on a throwaway SQLite database.
+- Usage (from the Django project directory):
+  `python -m benchmarks.responses [--products 100000] [--repeat 5] [--output results.json]`
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'price_optimization_tool.settings')
+os.environ.setdefault('USE_SQLITE', '1')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment, teardown_test_environment  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from price_optimization_tool.compression import available_encodings, compress_content  # noqa: E402
+from price_optimization_tool.renderers import FastJSONRenderer  # noqa: E402
+from pricing.views import PricingOptimizationView  # noqa: E402
+from products.models import ProductSnapshot  # noqa: E402
+from .catalog import generate_catalog  # noqa: E402
+
+
+def pricing_payload():
+    """
+    Returns the pricing optimization payload of the whole catalog, as built by the view.
+    """
+    columns = PricingOptimizationView.columns
+    rows = ProductSnapshot.objects.order_by('pk').values_list('pk', *columns[1:])
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def timed(function, repeat):
+    """
+    Calls `function` `repeat` times; returns its last result and the median time per call, in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return result, statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=int, default=100000, help='Number of synthetic products in the catalog')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed calls per measurement')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    options = parser.parse_args()
+
+    setup_test_environment()
+    database_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        generate_catalog(options.products)
+        payload = pricing_payload()
+    finally:
+        connection.creation.destroy_test_db(database_name, verbosity=0)
+        teardown_test_environment()
+
+    results = {'encode': {}, 'compress': {}}
+    for name, renderer in (('json', JSONRenderer()), ('orjson', FastJSONRenderer())):
+        content, median = timed(lambda: renderer.render(payload), options.repeat)
+        results['encode'][name] = {'median_ms': median * 1000, 'bytes': len(content)}
+    if results['encode']['json']['bytes'] != results['encode']['orjson']['bytes']:
+        raise AssertionError("FastJSONRenderer output differs from JSONRenderer output")
+
+    results['compress']['identity'] = {'median_ms': 0.0, 'bytes': len(content)}
+    for encoding in available_encodings():
+        compressed, median = timed(lambda: compress_content(content, encoding), options.repeat)
+        results['compress'][encoding] = {'median_ms': median * 1000, 'bytes': len(compressed)}
+
+    print(f"Pricing optimization payload of {options.products} products")
+    for name, result in results['encode'].items():
+        print(f"encode {name:<10} {result['median_ms']:10.1f} ms  {result['bytes']:>12,} bytes")
+    for name, result in results['compress'].items():
+        ratio = result['bytes'] / len(content)
+        print(f"wire   {name:<10} {result['median_ms']:10.1f} ms  {result['bytes']:>12,} bytes  ({ratio:.1%})")
+
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump({'options': vars(options), 'results': results}, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,351 @@
+"""
+Benchmark suite for the pricing formulas, the product serializer and the API views.
+- Runs offline: a throwaway SQLite test database is created and filled with a synthetic catalog
+  of `--products` rows (see `benchmarks.catalog.generate_catalog`; scales to 1M products).
+- Views are called through the DRF test client as an authenticated admin, so the measured time
+  covers routing, authentication, permission checks, the database queries and rendering.
+- Results are written as JSON (`--output`). Given a `--baseline` results file, every benchmark is
+  compared with it and the command exits with status 1 when one is more than `--threshold`
+  percent slower, so the suite can gate a CI job.
+- Usage (from the Django project directory):
+  `python -m benchmarks.run [--products 10000] [--output results.json] [--baseline old.json] [--threshold 10]`
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'price_optimization_tool.settings')
+os.environ.setdefault('USE_SQLITE', '1')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment, teardown_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+from accounts.models import CustomUser  # noqa: E402
+from pricing.engine import compute_pricing, load_pricing_inputs  # noqa: E402
+from pricing.ingestion import sales_event_buffer  # noqa: E402
+from products.models import Product  # noqa: E402
+from products.serializers import ProductSerializer  # noqa: E402
+from products.signals import calculate_demand_forecast, calculate_optimized_price  # noqa: E402
+from .catalog import generate_catalog  # noqa: E402
+
+# Number of products used by the per-item benchmarks (formulas, serializer, batch requests)
+SAMPLE_SIZE = 1000
+
+# Registered benchmarks: name -> (setup function returning the timed callable, operations per call)
+BENCHMARKS = {}
+
+
+def benchmark(name, operations=1):
+    """
+    Registers a benchmark.
+    - The decorated function receives the benchmark context and returns the callable that is timed.
+    - `operations` is the number of items one call processes, used to report throughput.
+    """
+    def register(setup):
+        BENCHMARKS[name] = (setup, operations)
+        return setup
+    return register
+
+
+class Context:
+    """
+    State shared by the benchmarks: the authenticated client and a sample of the catalog.
+    """
+
+    def __init__(self):
+        user = CustomUser.objects.create_user(
+            email='benchmark@example.com', password='password', username='benchmark', role='admin'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+        self.products = list(Product.objects.select_related('pricing_optimization').order_by('id')[:SAMPLE_SIZE])
+        self.ids = [product.id for product in self.products]
+
+    def request(self, method, url, expected_status, **kwargs):
+        """
+        Sends one request with the test client and checks its status, so a broken view fails loudly.
+        """
+        response = getattr(self.client, method)(url, **kwargs)
+        if response.status_code != expected_status:
+            raise AssertionError(f"{method.upper()} {url} returned {response.status_code}, expected {expected_status}")
+        return response
+
+
+# Pricing formulas
+
+@benchmark('formulas.calculate_demand_forecast', operations=SAMPLE_SIZE)
+def bench_demand_forecast(context):
+    rows = [(product.units_sold, product.stock_available, product.selling_price) for product in context.products]
+    return lambda: [calculate_demand_forecast(*row) for row in rows]
+
+
+@benchmark('formulas.calculate_optimized_price', operations=SAMPLE_SIZE)
+def bench_optimized_price(context):
+    rows = [
+        (product.cost_price, product.selling_price, product.stock_available, product.pricing_optimization.demand_forecast)
+        for product in context.products
+    ]
+    return lambda: [calculate_optimized_price(*row) for row in rows]
+
+
+@benchmark('engine.compute_pricing', operations=SAMPLE_SIZE)
+def bench_compute_pricing(context):
+    inputs = load_pricing_inputs(Product.objects.filter(id__in=context.ids))
+    return lambda: compute_pricing(inputs)
+
+
+# Serializers
+
+@benchmark('serializers.product_serializer', operations=SAMPLE_SIZE)
+def bench_product_serializer(context):
+    products = context.products
+    return lambda: ProductSerializer(products, many=True).data
+
+
+# Pricing views
+
+@benchmark('views.pricing_optimization.cold')
+def bench_pricing_optimization_cold(context):
+    url = reverse('pricing-optimization')
+
+    def run():
+        cache.clear()
+        context.request('get', url, 200)
+    return run
+
+
+@benchmark('views.pricing_optimization.cached')
+def bench_pricing_optimization_cached(context):
+    url = reverse('pricing-optimization')
+    return lambda: context.request('get', url, 200)
+
+
+@benchmark('views.demand_forecast', operations=100)
+def bench_demand_forecast_view(context):
+    url = reverse('demand-forecast')
+    payload = {'ids': context.ids[:100]}
+    return lambda: context.request('post', url, 200, data=payload, format='json')
+
+
+@benchmark('views.demand_curves.category')
+def bench_demand_curves(context):
+    url = reverse('demand-curves')
+    payload = {'categories': ['Electronics', 'Home'], 'group_by': 'category'}
+
+    def run():
+        cache.clear()
+        context.request('post', url, 200, data=payload, format='json')
+    return run
+
+
+@benchmark('views.sales_events', operations=100)
+def bench_sales_events(context):
+    url = reverse('sales-events')
+    payload = [{'product_id': product_id, 'quantity': 1} for product_id in context.ids[:100]]
+
+    def run():
+        context.request('post', url, 202, data=payload, format='json')
+        # Include the write-behind flush, so the time covers the whole ingestion path
+        sales_event_buffer.flush()
+    return run
+
+
+# Product views
+
+@benchmark('views.products.list_page.cold')
+def bench_product_list(context):
+    url = reverse('product-list-create')
+
+    def run():
+        cache.clear()
+        context.request('get', url, 200)
+    return run
+
+
+@benchmark('views.products.detail')
+def bench_product_detail(context):
+    url = reverse('product-detail', args=[context.ids[0]])
+    return lambda: context.request('get', url, 200)
+
+
+@benchmark('views.products.create')
+def bench_product_create(context):
+    url = reverse('product-list-create')
+    payload = {
+        'name': 'Benchmark Product', 'category': 'Electronics', 'cost_price': '10.00',
+        'selling_price': '15.00', 'description': 'Created by the benchmark suite',
+        'stock_available': 100, 'units_sold': 20,
+    }
+    return lambda: context.request('post', url, 201, data=payload, format='json')
+
+
+@benchmark('views.products.update')
+def bench_product_update(context):
+    product = context.products[0]
+    url = reverse('product-detail', args=[product.id])
+    payload = {**ProductSerializer(product).data, 'stock_available': 250}
+    return lambda: context.request('put', url, 200, data=payload, format='json')
+
+
+@benchmark('views.products.delete')
+def bench_product_delete(context):
+    # Each call creates and deletes a fresh product (the time includes the insert), so rows never run out
+    def run():
+        product = Product.objects.create(
+            name='Disposable Product', category='Toys', cost_price=1, selling_price=2,
+            description='Deleted by the benchmark suite', stock_available=1, units_sold=1,
+        )
+        context.request('delete', reverse('product-detail', args=[product.id]), 204)
+    return run
+
+
+@benchmark('views.products.import', operations=100)
+def bench_product_import(context):
+    url = reverse('product-import')
+    header = 'name,description,cost_price,selling_price,category,stock_available,units_sold,customer_rating\n'
+    rows = ''.join(f'Imported Product {index},Imported by the benchmark suite,5.0,12.99,Home,500,200,4\n' for index in range(100))
+    content = (header + rows).encode()
+
+    def run():
+        upload = io.BytesIO(content)
+        upload.name = 'product_data.csv'
+        context.request('post', url, 201, data={'file': upload}, format='multipart')
+    return run
+
+
+@benchmark('views.products.batch_update', operations=100)
+def bench_product_batch(context):
+    url = reverse('product-batch')
+    payload = [{'id': product_id, 'stock_available': 300} for product_id in context.ids[:100]]
+    return lambda: context.request('patch', url, 200, data=payload, format='json')
+
+
+@benchmark('views.products.categories.cold')
+def bench_categories(context):
+    url = reverse('product-categories')
+
+    def run():
+        cache.clear()
+        context.request('get', url, 200, data={'aggregates': 'true'})
+    return run
+
+
+def measure(function, repeat, number):
+    """
+    Times `repeat` rounds of `number` calls to `function` after one warm-up call.
+    - Returns the median and fastest time per call, in seconds.
+    """
+    function()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - started) / number)
+    return statistics.median(timings), min(timings)
+
+
+def run_benchmarks(context, repeat, number, selected=None):
+    """
+    Runs the registered benchmarks whose name contains one of the `selected` substrings (all by default).
+    - Returns `{name: {"median_s", "min_s", "operations", "ops_per_s"}}`.
+    """
+    results = {}
+    for name, (setup, operations) in BENCHMARKS.items():
+        if selected and not any(part in name for part in selected):
+            continue
+        median, fastest = measure(setup(context), repeat, number)
+        results[name] = {
+            'median_s': median,
+            'min_s': fastest,
+            'operations': operations,
+            'ops_per_s': operations / median if median else None,
+        }
+        print(f"{name:<45} {median * 1000:10.3f} ms  {operations / median:12.1f} ops/s", flush=True)
+    return results
+
+
+def compare_results(results, baseline, threshold):
+    """
+    Compares benchmark results with a baseline results file.
+    - A benchmark regresses when its median time grew by more than `threshold` percent.
+    - Benchmarks missing from either side are ignored.
+    - Returns the list of `(name, baseline_s, current_s, change_percent)` regressions.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if not previous or not previous['median_s']:
+            continue
+        change = (current['median_s'] - previous['median_s']) / previous['median_s'] * 100
+        print(f"{name:<45} {change:+8.1f}%")
+        if change > threshold:
+            regressions.append((name, previous['median_s'], current['median_s'], change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=int, default=10000, help='Number of synthetic products in the catalog')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing rounds per benchmark')
+    parser.add_argument('--number', type=int, default=3, help='Calls per timing round')
+    parser.add_argument('--filter', action='append', help='Only run benchmarks whose name contains this text')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare with the results in this JSON file')
+    parser.add_argument('--threshold', type=float, default=10.0, help='Allowed slowdown in percent before failing')
+    options = parser.parse_args()
+
+    setup_test_environment()
+    database_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        started = time.perf_counter()
+        generate_catalog(options.products)
+        print(f"Generated {options.products} products in {time.perf_counter() - started:.1f}s", flush=True)
+
+        # Keep the sale events in the buffer until a benchmark flushes them explicitly
+        sales_event_buffer.max_delay = None
+        results = run_benchmarks(Context(), options.repeat, options.number, options.filter)
+    finally:
+        connection.creation.destroy_test_db(database_name, verbosity=0)
+        teardown_test_environment()
+
+    report = {
+        'meta': {
+            'products': options.products,
+            'repeat': options.repeat,
+            'number': options.number,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'created': timezone.now().isoformat(),
+        },
+        'benchmarks': results,
+    }
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(report, output, indent=2)
+
+    if options.baseline:
+        with open(options.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare_results(results, baseline, options.threshold)
+        if regressions:
+            for name, previous, current, change in regressions:
+                print(f"REGRESSION {name}: {previous * 1000:.3f} ms -> {current * 1000:.3f} ms ({change:+.1f}%)")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+# Upper bounds (in seconds) of the request latency histogram buckets
+METRICS_LATENCY_BUCKETS = tuple(getattr(
+    settings, 'METRICS_LATENCY_BUCKETS', (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+))
+
+# Upper bounds of the SQL-queries-per-request histogram buckets (a high count usually means an N+1)
+METRICS_QUERY_COUNT_BUCKETS = tuple(getattr(
+    settings, 'METRICS_QUERY_COUNT_BUCKETS', (0, 1, 2, 5, 10, 20, 50, 100, 500)
+))
+
+# Add a `Server-Timing` header (SQL time and query count, total time) to every response
+METRICS_SERVER_TIMING = getattr(settings, 'METRICS_SERVER_TIMING', False)
+
+# HTTP methods reported by name; anything else is reported as `other` so clients cannot add series
+METRICS_HTTP_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+# Bearer token required by the `/metrics` endpoint; when empty the endpoint is open
+METRICS_TOKEN = getattr(settings, 'METRICS_TOKEN', '')
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram in the Prometheus layout (cumulative `le` buckets, sum and count).
+    - Observing a value is one binary search and two additions; callers hold the registry lock.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """
+        Returns `(upper_bound, cumulative_count)` pairs, ending with the `+Inf` bucket.
+        """
+        total = 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            total += count
+            yield bound, total
+
+
+class MetricsRegistry:
+    """
+    Process-local store of the request metrics, labeled by view name and HTTP method.
+    - Each server process keeps (and exposes) its own counters; Prometheus sums them per instance.
+    - Updates happen under one lock held for a few dictionary operations per request.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = {}
+            self.latency = {}
+            self.queries = {}
+            self.query_counts = {}
+            self.query_seconds = {}
+
+    def record(self, view, method, status_code, duration, query_count, query_duration):
+        """
+        Records one handled request.
+        """
+        key = (view, method)
+        with self.lock:
+            status_key = (view, method, str(status_code))
+            self.requests[status_key] = self.requests.get(status_key, 0) + 1
+            if key not in self.latency:
+                self.latency[key] = Histogram(METRICS_LATENCY_BUCKETS)
+                self.queries[key] = Histogram(METRICS_QUERY_COUNT_BUCKETS)
+            self.latency[key].observe(duration)
+            self.queries[key].observe(query_count)
+            self.query_counts[key] = self.query_counts.get(key, 0) + query_count
+            self.query_seconds[key] = self.query_seconds.get(key, 0.0) + query_duration
+
+    def render(self):
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        with self.lock:
+            lines += metric_header('http_requests_total', 'counter', 'HTTP requests handled, by view, method and status.')
+            for (view, method, status_code), value in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{labels(view=view, method=method, status=status_code)} {value}')
+
+            for name, histograms, description in (
+                ('http_request_duration_seconds', self.latency, 'Time spent handling requests, by view and method.'),
+                ('db_queries_per_request', self.queries, 'SQL queries run per request, by view and method.'),
+            ):
+                lines += metric_header(name, 'histogram', description)
+                for (view, method), histogram in sorted(histograms.items()):
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{name}_bucket{labels(view=view, method=method, le=bound)} {count}')
+                    lines.append(f'{name}_sum{labels(view=view, method=method)} {histogram.sum}')
+                    lines.append(f'{name}_count{labels(view=view, method=method)} {histogram.count}')
+
+            for name, values, description in (
+                ('db_queries_total', self.query_counts, 'SQL queries run, by view and method.'),
+                ('db_query_duration_seconds_total', self.query_seconds, 'Time spent in SQL queries, by view and method.'),
+            ):
+                lines += metric_header(name, 'counter', description)
+                for (view, method), value in sorted(values.items()):
+                    lines.append(f'{name}{labels(view=view, method=method)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def metric_header(name, metric_type, description):
+    return [f'# HELP {name} {description}', f'# TYPE {name} {metric_type}']
+
+
+def labels(**values):
+    """
+    Formats Prometheus labels, escaping backslashes, quotes and newlines in the values.
+    """
+    escaped = (
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in values.items()
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+# Metrics of the requests handled by this process
+metrics_registry = MetricsRegistry()
+
+
+class QueryTimer:
+    """
+    Counts the SQL queries of a request and the time spent in them.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+# Query timer of the request being handled in the current context (None outside requests)
+current_query_timer = ContextVar('current_query_timer', default=None)
+
+
+def time_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper adding each query to the current request's `QueryTimer`.
+    - The timer is looked up in a context variable, which `sync_to_async` copies into the worker
+      threads running the ORM calls of async views, so their queries are counted as well.
+    """
+    timer = current_query_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.duration += time.perf_counter() - started
+        timer.count += 1
+
+
+def install_query_timing(connection, **kwargs):
+    """
+    Adds `time_query` to a database connection's execute wrappers (once).
+    - Connected to `connection_created`, so every thread's connections get it, including the
+      worker threads Django runs async views' database calls in.
+    """
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+connection_created.connect(install_query_timing)
+
+
+class RequestMetricsMiddleware:
+    """
+    Records the latency, SQL query count and SQL time of every request in `metrics_registry`.
+    - Queries are timed by a database execute wrapper (`time_query`) on every connection, so the
+      cost is one extra function call per query and nothing is kept per query.
+    - Requests are labeled with the URL name of the matched view (`unmatched` for 404s outside
+      any route), keeping the number of series bounded.
+    - With `METRICS_SERVER_TIMING` enabled, adds a `Server-Timing` header so the SQL and total
+      time of a request show up in the browser's developer tools.
+    - For streaming responses (NDJSON/CSV exports) only the time until the response starts is
+      measured; rows read while the body streams are not counted.
+    - Supports both WSGI and ASGI, so it does not force async views back into a thread.
+    - Keep it first in `MIDDLEWARE` so the latency covers the other middleware too.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # Connections opened before the middleware was loaded did not get the wrapper yet
+        for connection in connections.all():
+            install_query_timing(connection)
+        timer = QueryTimer()
+        token = current_query_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_query_timer.reset(token)
+        return self.record(request, response, time.perf_counter() - started, timer)
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        token = current_query_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_query_timer.reset(token)
+        return self.record(request, response, time.perf_counter() - started, timer)
+
+    @staticmethod
+    def record(request, response, duration, timer):
+        """
+        Records a handled request in `metrics_registry` and adds the optional `Server-Timing` header.
+        """
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name if match else None) or 'unmatched'
+        method = request.method if request.method in METRICS_HTTP_METHODS else 'other'
+        metrics_registry.record(view, method, response.status_code, duration, timer.count, timer.duration)
+
+        if METRICS_SERVER_TIMING:
+            response['Server-Timing'] = (
+                f'db;dur={timer.duration * 1000:.1f};desc="{timer.count} queries", total;dur={duration * 1000:.1f}'
+            )
+        return response
+
+
+def metrics_view(request):
+    """
+    Serves the request metrics of this process in the Prometheus text format.
+    - When `METRICS_TOKEN` is set, the scraper must send it as `Authorization: Bearer <token>`.
+    """
+    if METRICS_TOKEN:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(supplied.encode(), METRICS_TOKEN.encode()):
+            return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+    return HttpResponse(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
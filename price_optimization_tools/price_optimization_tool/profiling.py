@@ -0,0 +1,162 @@
+import cProfile
+import logging
+import os
+import random
+import re
+import time
+from pathlib import Path
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework.exceptions import APIException
+from accounts.authentication import RoleClaimJWTAuthentication
+
+logger = logging.getLogger(__name__)
+
+# Fraction of requests (0.0 - 1.0) profiled at random
+PROFILING_SAMPLE_RATE = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+
+# Request header asking for the request to be profiled; only honoured for admins ('' disables it)
+PROFILING_HEADER = getattr(settings, 'PROFILING_HEADER', 'X-Profile')
+
+# Directory the profiles are written to
+PROFILING_DIR = getattr(settings, 'PROFILING_DIR', Path(settings.BASE_DIR) / 'profiles')
+
+# Number of most recent profiles kept in `PROFILING_DIR`; older ones are deleted
+PROFILING_KEEP = getattr(settings, 'PROFILING_KEEP', 50)
+
+
+def is_admin_request(request):
+    """
+    Returns True if the request is authenticated as an admin, by JWT or by session.
+    - Only called for requests carrying the profiling header, so other requests never pay for
+      decoding the token here (DRF authenticates them again in the view as usual).
+    """
+    try:
+        authenticated = RoleClaimJWTAuthentication().authenticate(request)
+    except APIException:
+        authenticated = None
+    user = authenticated[0] if authenticated else getattr(request, 'user', None)
+    return bool(user and user.is_authenticated) and getattr(user, 'role', None) == 'admin'
+
+
+def profile_filename(request, duration):
+    """
+    Returns a file name for a request profile: time, view name, method and duration, e.g.
+    `20240101-120000-123456-pricing-optimization-GET-840ms.prof`.
+    """
+    match = getattr(request, 'resolver_match', None)
+    view = re.sub(r'[^A-Za-z0-9_.-]+', '_', (match.view_name if match else None) or 'unmatched')
+    stamp = time.strftime('%Y%m%d-%H%M%S') + f'-{time.time_ns() // 1000 % 1000000:06d}'
+    return f'{stamp}-{view}-{request.method}-{duration * 1000:.0f}ms.prof'
+
+
+def prune_profiles(directory, keep):
+    """
+    Deletes all but the `keep` most recent profiles in `directory`.
+    """
+    profiles = sorted(Path(directory).glob('*.prof'), key=lambda path: path.stat().st_mtime, reverse=True)
+    for path in profiles[keep:]:
+        path.unlink(missing_ok=True)
+
+
+class RequestProfilingMiddleware:
+    """
+    Profiles selected live requests with cProfile and writes each profile to `PROFILING_DIR`.
+    - A request is profiled when it wins the `PROFILING_SAMPLE_RATE` draw, or when it carries the
+      `PROFILING_HEADER` header and is authenticated as an admin.
+    - Profiles are named after the view (see `profile_filename`) and can be read with `pstats`
+      or a viewer such as snakeviz; only the `PROFILING_KEEP` most recent files are kept.
+      Header-triggered responses name the file in an `X-Profile-File` header.
+    - Requests that are not profiled only cost a header lookup (and a random draw when sampling
+      is enabled). With sampling and the header both disabled the middleware is not loaded at all.
+    - Under ASGI, cProfile only sees the event loop thread: code the async views run in worker
+      threads (ORM queries, synchronous handlers) shows up as time spent awaiting them, and
+      other requests progressing on the loop meanwhile are captured too.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not PROFILING_SAMPLE_RATE and not PROFILING_HEADER:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.header = f"HTTP_{PROFILING_HEADER.upper().replace('-', '_')}" if PROFILING_HEADER else None
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        requested = self.header is not None and self.header in request.META and is_admin_request(request)
+        if not requested and not self.sampled():
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this thread; serve the request unprofiled
+            return self.get_response(request)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        return self.finish(request, response, profiler, time.perf_counter() - started, requested)
+
+    async def __acall__(self, request):
+        requested = (
+            self.header is not None and self.header in request.META
+            and await sync_to_async(is_admin_request)(request)
+        )
+        if not requested and not self.sampled():
+            return await self.get_response(request)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this thread; serve the request unprofiled
+            return await self.get_response(request)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+        return self.finish(request, response, profiler, time.perf_counter() - started, requested)
+
+    @staticmethod
+    def sampled():
+        """
+        Returns True if a request wins the `PROFILING_SAMPLE_RATE` draw.
+        """
+        return bool(PROFILING_SAMPLE_RATE) and random.random() < PROFILING_SAMPLE_RATE
+
+    def finish(self, request, response, profiler, duration, requested):
+        """
+        Saves a request profile, naming it in the `X-Profile-File` header of admin-requested responses.
+        """
+        try:
+            filename = self.save(profiler, profile_filename(request, duration))
+        except OSError:
+            logger.exception("Writing the request profile failed")
+        else:
+            if requested:
+                response['X-Profile-File'] = filename
+        return response
+
+    @staticmethod
+    def save(profiler, filename):
+        """
+        Writes a profile to `PROFILING_DIR` and prunes the old ones; returns the file name.
+        - The profile is written to a temporary file and renamed, so readers never see a partial file.
+        """
+        directory = Path(PROFILING_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / filename
+        partial = path.with_suffix('.partial')
+        profiler.dump_stats(partial)
+        os.replace(partial, path)
+        prune_profiles(directory, PROFILING_KEEP)
+        return filename
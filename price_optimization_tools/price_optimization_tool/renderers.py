@@ -0,0 +1,57 @@
+from decimal import Decimal
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+# Optional dependency: without orjson, `FastJSONRenderer` renders with DRF's standard encoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# DRF's encoder, whose `default` converts the values orjson cannot encode natively
+json_encoder = JSONEncoder()
+
+
+def orjson_default(value):
+    """
+    Converts a value orjson cannot encode natively, exactly like DRF's encoder does.
+    - Decimals (three per catalog row) are checked first, before DRF's long chain of type checks.
+    """
+    if type(value) is Decimal:
+        return float(value)
+    return json_encoder.default(value)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer encoding with orjson, producing the same bytes as DRF's `JSONRenderer`.
+    - orjson encodes the catalog payloads several times faster than the standard `json` module
+      (see `python -m benchmarks.responses`).
+    - Values are encoded the way DRF's encoder does: decimals as numbers, UTC datetimes with a
+      `Z` suffix, other datetimes, dates and times in ISO 8601, and anything orjson does not
+      know natively (lazy strings, UUIDs, numpy values, ...) through `JSONEncoder.default`.
+    - Falls back to DRF's renderer when orjson is not installed, when the client asks for an
+      indented response (`Accept: application/json; indent=4`, the browsable API), when
+      unicode escaping or non-compact output is configured, and for values orjson refuses
+      (e.g. integers beyond 64 bits).
+    - Unlike DRF's strict JSON, NaN and infinite floats are encoded as `null`.
+    """
+    options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (
+            orjson is None or not api_settings.UNICODE_JSON or not api_settings.COMPACT_JSON
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(data, default=orjson_default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escape the line and paragraph separators like DRF does, so the output is valid JavaScript
+        if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+            content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return content
@@ -0,0 +1,159 @@
+import random
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+# Database aliases (from `DATABASES`) that read-only request traffic is spread over
+DATABASE_REPLICAS = list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+# HTTP methods whose requests read from a replica (views can add more, see `ReplicaRoutingMiddleware`)
+REPLICA_READ_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+# How long (in seconds) reads stay on the primary after a write; should exceed the replication lag
+REPLICA_PIN_SECONDS = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+
+class RequestDatabaseState:
+    """
+    Per-request routing state: whether reads may use a replica, and whether they are pinned to the primary.
+    - One instance is shared by everything the request runs, including the worker threads
+      `sync_to_async` starts for async views (which copy the context variable holding it).
+    """
+
+    def __init__(self, replica_reads, pinned=False, user_id=None):
+        self.replica_reads = replica_reads
+        self.pinned = pinned
+        self.user_id = user_id
+        self.wrote = False
+
+
+# Routing state of the request being handled in the current context (None outside requests)
+current_database_state = ContextVar('current_database_state', default=None)
+
+
+class ReplicaRouter:
+    """
+    Database router sending read-only request traffic to the `DATABASE_REPLICAS` and everything else to `default`.
+    - Reads go to a random replica only while a request marked as read-only by
+      `ReplicaRoutingMiddleware` is being handled; management commands, workers and tests without
+      replicas keep using the primary.
+    - The first write of a request pins its remaining reads to the primary, so a request (and,
+      through the user's pin, the user's next requests) always sees its own changes.
+    - Reads inside a transaction on the primary stay on the primary, so `atomic()` blocks and
+      `select_for_update()` read consistent data.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = current_database_state.get()
+        if not DATABASE_REPLICAS or state is None or not state.replica_reads or state.pinned:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = current_database_state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary, so objects loaded from any of them may be related
+        return True
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Marks read-only requests so `ReplicaRouter` can serve their queries from a replica.
+    - Requests with a `REPLICA_READ_METHODS` method are read-only, as are requests to views that
+      list their method in a `replica_read_methods` attribute (e.g. POST endpoints that only
+      look data up).
+    - A request that writes pins its user to the primary for `REPLICA_PIN_SECONDS`, with a
+      `replica-pin:<user_id>` cache entry; while it exists, the user's reads stay on the primary
+      (read-your-writes across requests). The user is read from the request's JWT, which the
+      SPA sends as a Bearer header (it sends no cookies to the cross-origin API).
+    - Does nothing when no replica is configured.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = self.request_state(request)
+        if state.user_id is not None:
+            state.pinned = cache.get(replica_pin_key(state.user_id)) is not None
+        token = current_database_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_database_state.reset(token)
+        if self.pins(state):
+            cache.set(replica_pin_key(state.user_id), 1, REPLICA_PIN_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        state = self.request_state(request)
+        if state.user_id is not None:
+            state.pinned = await cache.aget(replica_pin_key(state.user_id)) is not None
+        token = current_database_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_database_state.reset(token)
+        if self.pins(state):
+            await cache.aset(replica_pin_key(state.user_id), 1, REPLICA_PIN_SECONDS)
+        return response
+
+    @staticmethod
+    def request_state(request):
+        return RequestDatabaseState(
+            replica_reads=request.method in REPLICA_READ_METHODS,
+            user_id=request_user_id(request) if DATABASE_REPLICAS else None,
+        )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Views can declare extra read-only methods (DRF views expose their class as `view_func.cls`)
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        state = current_database_state.get()
+        if state is not None and request.method in getattr(view_class, 'replica_read_methods', ()):
+            state.replica_reads = True
+
+    @staticmethod
+    def pins(state):
+        return state.wrote and state.user_id is not None
+
+
+def replica_pin_key(user_id):
+    """
+    Returns the cache key pinning a user's reads to the primary after one of their writes.
+    """
+    return f'replica-pin:{user_id}'
+
+
+def request_user_id(request):
+    """
+    Returns the id of the user the request's JWT was issued to, or None for requests without a valid token.
+    - Middleware runs before DRF authenticates the request, so the token is validated here; only
+      its signature and claims are checked, no query runs.
+    """
+    authentication = JWTStatelessUserAuthentication()
+    header = authentication.get_header(request)
+    try:
+        raw_token = authentication.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            return None
+        return authentication.get_validated_token(raw_token).get(jwt_settings.USER_ID_CLAIM)
+    except AuthenticationFailed:
+        # Invalid tokens are rejected by the view's own authentication
+        return None
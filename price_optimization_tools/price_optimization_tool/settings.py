@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 from datetime import timedelta
 from corsheaders.defaults import default_headers
@@ -51,6 +53,9 @@ INSTALLED_APPS = [
 
 # Middleware configuration for handling requests and responses
 MIDDLEWARE = [
+    'price_optimization_tool.metrics.RequestMetricsMiddleware',  # Per-view latency and SQL metrics (served at /metrics)
+    'price_optimization_tool.routers.ReplicaRoutingMiddleware',  # Routes read-only requests to the read replicas
+    'price_optimization_tool.compression.ResponseCompressionMiddleware',  # Brotli/gzip compression of larger responses
     'django.middleware.security.SecurityMiddleware',  # Basic security middleware
     'django.contrib.sessions.middleware.SessionMiddleware',  # Session management
     'django.middleware.common.CommonMiddleware',  # Common middleware to handle things like redirects
@@ -60,6 +65,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',  # Prevents clickjacking attacks
     "corsheaders.middleware.CorsMiddleware",  # Middleware to handle CORS (Cross-Origin Resource Sharing)
     "django.middleware.common.CommonMiddleware",  # Common middleware to manage various settings
+    'price_optimization_tool.profiling.RequestProfilingMiddleware',  # Opt-in cProfile capture of sampled/admin-requested requests
 ]
 
 ROOT_URLCONF = 'price_optimization_tool.urls'  # Root URL configuration for the project
@@ -97,6 +103,37 @@ DATABASES = {
     }
 }
 
+# Use a local SQLite database when running the test suite (or when `USE_SQLITE=1` is set),
+# so tests and offline tooling do not require a running PostgreSQL server
+if 'test' in sys.argv or os.environ.get('USE_SQLITE') == '1':
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+    }
+    # SQLite cannot apply `accounts.0002_customuser_username` (a CharField without max_length),
+    # so the accounts tables are created from the current models instead of the migrations
+    MIGRATION_MODULES = {'accounts': None}
+    # A second SQLite file acting as a read replica; the test suite always defines one for the routing tests
+    if 'test' in sys.argv or os.environ.get('SQLITE_REPLICA_PATH'):
+        DATABASES['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_REPLICA_PATH') or BASE_DIR / 'db_replica.sqlite3',
+        }
+elif os.environ.get('DATABASE_REPLICA_HOST') or os.environ.get('DATABASE_REPLICA_NAME'):
+    # A PostgreSQL read replica (a streaming standby, or another local database when testing by hand)
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ.get('DATABASE_REPLICA_HOST', DATABASES['default']['HOST']),
+        'NAME': os.environ.get('DATABASE_REPLICA_NAME', DATABASES['default']['NAME']),
+        'TEST': {'MIRROR': 'default'},  # Tests read the replica through the primary's test database
+    }
+
+# Database aliases that read-only request traffic is routed to (see `price_optimization_tool.routers`);
+# the test suite keeps everything on `default` and enables routing in the routing tests only
+DATABASE_REPLICAS = [] if 'test' in sys.argv else [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['price_optimization_tool.routers.ReplicaRouter']  # Sends replica reads away from the primary
+REPLICA_PIN_SECONDS = 5  # Reads stay on the primary this long after a client's write (above the replication lag)
+
 
 # Password validation settings (improves security of user authentication)
 AUTH_PASSWORD_VALIDATORS = [
@@ -135,10 +172,80 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'  # Default primary key type
 # REST framework JWT authentication settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',  # Using JWT for authentication
+        'accounts.authentication.RoleClaimJWTAuthentication',  # JWT authentication using the role claim (no user query)
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'price_optimization_tool.renderers.FastJSONRenderer',  # JSON encoded with orjson (same output as DRF's renderer)
+        'rest_framework.renderers.BrowsableAPIRenderer',  # HTML browsable API
     ),
 }
 
+# Cache configuration (local-memory cache; works without an external cache server)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'price-optimization-tool',
+    }
+}
+
+# Lifetime (in seconds) of cached catalog data such as category facets
+CATALOG_CACHE_TIMEOUT = 60 * 60
+
+# Longest time (in seconds) a request may spend rebuilding a cached catalog response while
+# concurrent identical requests serve the previous response (or, without one, wait for it)
+CATALOG_CACHE_LOCK_TIMEOUT = 10
+
+# Keyset pagination settings for the product listing endpoint
+PRODUCT_PAGE_SIZE = 100  # Default number of products returned per page
+PRODUCT_MAX_PAGE_SIZE = 1000  # Largest page size a client may request via `page_size`
+
+# Number of rows read from the database per round trip when streaming NDJSON/CSV exports
+EXPORT_CHUNK_SIZE = 2000
+
+# Number of CSV rows validated and inserted per batch by the bulk product import
+IMPORT_BATCH_SIZE = 2000
+
+# Largest number of products accepted by one request to the batch upsert/delete endpoint
+BATCH_MAX_ITEMS = 5000
+
+# Number of pending pricing jobs processed per batch by the `process_pricing_jobs` worker
+PRICING_JOB_BATCH_SIZE = 500
+
+# Optimized price strategy: 'blend' (stock-factor blend of selling and cost price) or
+# 'profit_grid' (profit-maximizing price searched over a grid of candidate prices)
+PRICING_STRATEGY = 'blend'
+PRICE_GRID_POINTS = 200  # Candidate prices evaluated per product by 'profit_grid'
+PRICE_GRID_MAX_MARKUP = 2.0  # Highest candidate price, as a multiple of the selling price
+
+# Sales-based demand forecast (`recompute_pricing --demand-source sales`)
+SALES_HISTORY_WEEKS = 12  # Weeks of weekly sales rollups the forecast is fitted on
+SALES_SMOOTHING_ALPHA = 0.3  # Exponential smoothing factor (higher follows recent weeks more closely)
+SALES_FORECAST_HORIZON_WEEKS = 4  # Weeks of demand covered by the forecast
+
+# Write-behind buffer of the sales event ingestion endpoint (per process)
+SALES_BUFFER_MAX_EVENTS = 5000  # Buffered events that trigger a flush
+SALES_BUFFER_MAX_DELAY = 1.0  # Seconds an event may stay buffered before it is flushed
+
+# Demand curve endpoint (`/pricing/demand-curves/`)
+DEMAND_CURVE_POINTS = 200  # Default number of prices each curve is sampled at
+DEMAND_CURVE_MAX_POINTS = 5000  # Largest number of sampled (or returned) points a request may ask for
+DEMAND_CURVE_TARGET_POINTS = 100  # Default number of points each returned curve is downsampled to
+DEMAND_CURVE_MAX_PRODUCTS = 500  # Largest number of products per request with one curve each (`group_by=product`)
+
+# Request metrics (`/metrics`, Prometheus text format)
+METRICS_SERVER_TIMING = False  # Add a `Server-Timing` header with the SQL and total time of each request
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')  # Bearer token required to scrape `/metrics` (open when empty)
+
+# Request profiling (`RequestProfilingMiddleware`); profiles are read with `python -m pstats <file>`
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0.0))  # Fraction of requests profiled at random
+PROFILING_HEADER = 'X-Profile'  # Header that makes an admin's request profiled ('' disables it)
+PROFILING_DIR = BASE_DIR / 'profiles'  # Directory the `.prof` files are written to
+PROFILING_KEEP = 50  # Number of most recent profiles kept
+
+# Response compression (`ResponseCompressionMiddleware`); Brotli needs the optional `brotli` package
+RESPONSE_COMPRESSION_MIN_SIZE = 1024  # Smallest response body (in bytes) that is compressed
+RESPONSE_COMPRESSION_BROTLI_QUALITY = 5  # Brotli quality (0-11) used for dynamic responses
+
 # Email configuration for sending emails (use for development or production mail sending)
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'  # Use SMTP for email sending
 EMAIL_HOST = 'smtp.gmail.com'  # Gmail SMTP server
@@ -147,6 +254,12 @@ EMAIL_USE_TLS = True  # Use TLS encryption for email
 EMAIL_HOST_USER = ''  # Gmail email address
 EMAIL_HOST_PASSWORD = ''  # Gmail email password (should be kept secret in production)
 
+# Email outbox sender (`python manage.py send_outbox_emails`) settings
+EMAIL_OUTBOX_BATCH_SIZE = 100  # Emails sent per batch over one SMTP connection
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5  # Delivery attempts before an email is marked as failed
+EMAIL_OUTBOX_RETRY_DELAY = 60  # Seconds before the first retry; doubles after each failure
+EMAIL_OUTBOX_MAX_RETRY_DELAY = 60 * 60  # Upper bound (in seconds) of the retry delay
+
 # JWT configuration for access and refresh token lifetimes, token rotation, and more
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=20),  # Access token expires in 20 hours
@@ -0,0 +1,382 @@
+import datetime
+import gzip
+import json
+import os
+import pstats
+import tempfile
+import uuid
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock, skipUnless
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import AsyncClient, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from accounts.models import CustomUser
+from accounts.views import CustomTokenObtainPairSerializer
+from pricing.models import PricingOptimization
+from pricing.tests import create_products
+from products.models import Product, ProductSnapshot
+from products.snapshots import build_snapshots, refresh_product_snapshots
+from . import compression, metrics, profiling, routers
+from .compression import brotli, negotiate_encoding
+from .metrics import metrics_registry
+from .profiling import prune_profiles
+from .renderers import FastJSONRenderer
+from .routers import ReplicaRouter, RequestDatabaseState, current_database_state, replica_pin_key
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics_registry.reset()
+        self.user = CustomUser.objects.create_user(
+            email='buyer@example.com', password='password', username='buyer', role='buyer'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        create_products(3)
+
+    def test_records_latency_and_sql_queries_per_view(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('pricing-optimization'))
+        self.assertEqual(response.status_code, 200)
+        query_count = len(queries)
+
+        output = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('http_requests_total{view="pricing-optimization",method="GET",status="200"} 1', output)
+        self.assertIn('http_request_duration_seconds_count{view="pricing-optimization",method="GET"} 1', output)
+        self.assertIn('http_request_duration_seconds_bucket{view="pricing-optimization",method="GET",le="+Inf"} 1', output)
+        self.assertIn(f'db_queries_total{{view="pricing-optimization",method="GET"}} {query_count}', output)
+        self.assertIn('# TYPE db_queries_per_request histogram', output)
+
+    async def test_counts_queries_of_async_views_under_wsgi_and_asgi(self):
+        token = (await sync_to_async(CustomTokenObtainPairSerializer.get_token)(self.user)).access_token
+        url = reverse('pricing-optimization')
+        self.assertEqual((await sync_to_async(self.client.get)(url)).status_code, 200)
+        await sync_to_async(cache.clear)()
+        response = await AsyncClient().get(url, headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+
+        # Each request runs one query for the cache validators and one for the rows
+        output = metrics_registry.render()
+        self.assertIn('db_queries_per_request_bucket{view="pricing-optimization",method="GET",le="1"} 0', output)
+        self.assertIn('db_queries_total{view="pricing-optimization",method="GET"} 4', output)
+
+    def test_unmatched_paths_and_unknown_methods_share_a_series(self):
+        self.client.get('/no-such-endpoint/')
+        self.client.generic('BREW', reverse('pricing-optimization'))
+
+        output = metrics_registry.render()
+        self.assertIn('http_requests_total{view="unmatched",method="GET",status="404"} 1', output)
+        self.assertIn('http_requests_total{view="pricing-optimization",method="other",status="405"} 1', output)
+
+    def test_server_timing_header_is_optional(self):
+        response = self.client.get(reverse('pricing-optimization'))
+        self.assertNotIn('Server-Timing', response)
+
+        with mock.patch.object(metrics, 'METRICS_SERVER_TIMING', True):
+            response = self.client.get(reverse('product-categories'))
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", total;dur=[\d.]+$')
+
+    def test_metrics_token_is_required_when_configured(self):
+        with mock.patch.object(metrics, 'METRICS_TOKEN', 'scrape-secret'):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+            response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+
+class RequestProfilingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        patcher = mock.patch.object(profiling, 'PROFILING_DIR', self.directory.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        create_products(2)
+
+    def client_for(self, role):
+        user = CustomUser.objects.create_user(
+            email=f'{role}@example.com', password='password', username=role, role=role
+        )
+        token = CustomTokenObtainPairSerializer.get_token(user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+        return client
+
+    def profiles(self):
+        return sorted(path.name for path in Path(self.directory.name).glob('*.prof'))
+
+    def test_profile_header_is_honoured_for_admins_only(self):
+        response = self.client_for('buyer').get(reverse('pricing-optimization'), HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-File', response)
+        self.assertEqual(self.profiles(), [])
+
+        response = self.client_for('admin').get(reverse('pricing-optimization'), HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.profiles(), [response['X-Profile-File']])
+        self.assertIn('-pricing-optimization-GET-', response['X-Profile-File'])
+
+        # The file is a regular cProfile dump
+        stats = pstats.Stats(str(Path(self.directory.name) / response['X-Profile-File']))
+        self.assertGreater(stats.total_calls, 0)
+
+    def test_sampled_requests_are_profiled_and_old_profiles_pruned(self):
+        client = self.client_for('buyer')
+        with mock.patch.object(profiling, 'PROFILING_SAMPLE_RATE', 1.0), \
+                mock.patch.object(profiling, 'PROFILING_KEEP', 2):
+            for _ in range(3):
+                self.assertEqual(client.get(reverse('product-categories')).status_code, 200)
+        profiles = self.profiles()
+        self.assertEqual(len(profiles), 2)
+        self.assertTrue(all('-product-categories-GET-' in name for name in profiles))
+
+        with mock.patch.object(profiling, 'PROFILING_SAMPLE_RATE', 0.0):
+            client.get(reverse('product-categories'))
+        self.assertEqual(self.profiles(), profiles)
+
+    def test_prune_profiles_keeps_the_most_recent_files(self):
+        directory = Path(self.directory.name)
+        for index in range(4):
+            path = directory / f'{index}.prof'
+            path.write_bytes(b'')
+            os.utime(path, (index, index))
+        prune_profiles(directory, 1)
+        self.assertEqual(self.profiles(), ['3.prof'])
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Tests for `ReplicaRouter` against two databases holding different rows, so the data in a
+    response shows which one served it. A `TransactionTestCase`, because the transaction a
+    `TestCase` wraps each test in would keep every read on the primary.
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(routers, 'DATABASE_REPLICAS', ['replica'])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = CustomUser.objects.create_user(
+            email='supplier@example.com', password='password', username='supplier', role='supplier'
+        )
+        self.user.save(using='replica', force_insert=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        refresh_product_snapshots([product.id for product in Product.objects.bulk_create([self.product('On primary')])])
+        self.replica_product, = Product.objects.using('replica').bulk_create([self.product('On replica')])
+        PricingOptimization.objects.using('replica').bulk_create([
+            PricingOptimization(product=self.replica_product, demand_forecast=50, optimized_price='12.50')
+        ])
+        ProductSnapshot.objects.using('replica').bulk_create(build_snapshots(Product.objects.using('replica')))
+
+    @staticmethod
+    def product(name):
+        return Product(
+            name=name, category='Home', cost_price='5.00', selling_price='12.99',
+            description=name, stock_available=10, units_sold=2,
+        )
+
+    def listed_names(self):
+        response = self.client.get(reverse('product-list-create'), {'paginate': 'false'})
+        self.assertEqual(response.status_code, 200)
+        return [row['name'] for row in response.json()]
+
+    def test_reads_go_to_the_replica(self):
+        self.assertEqual(self.listed_names(), ['On replica'])
+
+        # POST views declaring themselves read-only use the replica too
+        response = self.client.post(reverse('demand-forecast'), {'ids': [self.replica_product.id]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['product_name'], 'On replica')
+
+    def test_reads_after_a_write_stay_on_the_primary(self):
+        def bearer_client(user):
+            # A fresh client per request, sending only the Bearer token like the SPA (no cookies)
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {CustomTokenObtainPairSerializer.get_token(user).access_token}')
+            return client
+
+        def listed_names(user):
+            response = bearer_client(user).get(reverse('product-list-create'), {'paginate': 'false'})
+            self.assertEqual(response.status_code, 200)
+            return sorted(row['name'] for row in response.json())
+
+        response = bearer_client(self.user).post(reverse('product-list-create'), {
+            'name': 'New', 'category': 'Home', 'cost_price': '5.00', 'selling_price': '12.99',
+            'description': 'New', 'stock_available': 10, 'units_sold': 2,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.cookies, {})
+
+        # The writing user's reads are pinned to the primary, so they see their own write
+        self.assertEqual(listed_names(self.user), ['New', 'On primary'])
+
+        # Other users keep reading from the replica, and so does the writer once the pin expires
+        other = CustomUser.objects.create_user(
+            email='buyer@example.com', password='password', username='buyer', role='buyer'
+        )
+        self.assertEqual(listed_names(other), ['On replica'])
+        cache.delete(replica_pin_key(self.user.id))
+        self.assertEqual(listed_names(self.user), ['On replica'])
+
+    def test_streamed_exports_read_from_the_replica(self):
+        # The export rows are only read once the response streams, after the middleware returned
+        for url in (reverse('product-list-create'), reverse('pricing-optimization')):
+            response = self.client.get(url, {'format': 'ndjson'})
+            self.assertEqual(response.status_code, 200)
+            rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+            self.assertEqual([row['name'] for row in rows], ['On replica'])
+
+    def test_routing_is_disabled_without_replicas(self):
+        with mock.patch.object(routers, 'DATABASE_REPLICAS', []):
+            self.assertEqual(self.listed_names(), ['On primary'])
+
+    async def test_async_views_read_from_the_replica(self):
+        token = (await sync_to_async(CustomTokenObtainPairSerializer.get_token)(self.user)).access_token
+        response = await AsyncClient().get(
+            reverse('product-list-create'), {'paginate': 'false'}, headers={'Authorization': f'Bearer {token}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['name'] for row in response.json()], ['On replica'])
+
+    def test_router_pins_reads_after_writes_and_inside_transactions(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Product))
+
+        token = current_database_state.set(RequestDatabaseState(replica_reads=True))
+        self.addCleanup(current_database_state.reset, token)
+        self.assertEqual(router.db_for_read(Product), 'replica')
+        with transaction.atomic():
+            self.assertEqual(router.db_for_read(Product), 'default')
+
+        self.assertEqual(router.db_for_write(Product), 'default')
+        self.assertIsNone(router.db_for_read(Product))
+
+
+class FastJSONRendererTests(TestCase):
+    def test_output_matches_drf_json_renderer(self):
+        data = {
+            'price': Decimal('12.50'),
+            'created': datetime.datetime(2024, 1, 5, 12, 0, 0, 123, tzinfo=datetime.timezone.utc),
+            'offset': datetime.datetime(2024, 1, 5, 12, 0, tzinfo=datetime.timezone(datetime.timedelta(hours=5, minutes=30))),
+            'naive': datetime.datetime(2024, 1, 5, 12, 0),
+            'day': datetime.date(2024, 1, 5),
+            'time': datetime.time(8, 30, 15, 5),
+            'uuid': uuid.UUID(int=1),
+            'lazy': gettext_lazy('Permission denied'),
+            'nested': [{'name': 'Caf\u00e9 \u2028 mug', 1: None, 'ok': True}],
+        }
+        expected = JSONRenderer().render(data)
+        self.assertEqual(FastJSONRenderer().render(data), expected)
+        self.assertIn(b'"2024-01-05T12:00:00.000123Z"', expected)
+
+    def test_falls_back_for_indented_output_and_big_integers(self):
+        data = {'id': 1, 'big': 2 ** 70}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        indented = FastJSONRenderer().render({'id': 1}, 'application/json; indent=4')
+        self.assertEqual(indented, b'{\n    "id": 1\n}')
+
+    def test_catalog_responses_are_unchanged(self):
+        user = CustomUser.objects.create_user(
+            email='buyer@example.com', password='password', username='buyer', role='buyer'
+        )
+        client = APIClient()
+        client.force_authenticate(user=user)
+        products = create_products(3)
+        response = client.post(reverse('demand-forecast'), {'ids': [product.id for product in products]}, format='json')
+        self.assertIsInstance(response.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+
+class ResponseCompressionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = CustomUser.objects.create_user(
+            email='buyer@example.com', password='password', username='buyer', role='buyer'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+        create_products(30)
+
+    def test_negotiates_the_preferred_encoding(self):
+        with mock.patch.object(compression, 'brotli', object()):
+            self.assertEqual(negotiate_encoding('gzip, deflate, br'), 'br')
+            self.assertEqual(negotiate_encoding('gzip, br;q=0.5'), 'gzip')
+            self.assertEqual(negotiate_encoding('br;q=0, *'), 'gzip')
+        with mock.patch.object(compression, 'brotli', None):
+            self.assertEqual(negotiate_encoding('br, gzip;q=0.1'), 'gzip')
+            self.assertIsNone(negotiate_encoding('br'))
+        self.assertIsNone(negotiate_encoding(''))
+        self.assertIsNone(negotiate_encoding('identity, gzip;q=0'))
+
+    def test_large_json_responses_are_gzipped(self):
+        url = reverse('pricing-optimization')
+        plain = self.client.get(url)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(plain['Vary'].count('Accept-Encoding'), 1)
+
+        with mock.patch.object(compression, 'brotli', None):
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(response['ETag'], 'W/' + plain['ETag'])
+
+        # The weak ETag still matches on the next conditional request
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    @skipUnless(brotli, "brotli is not installed")
+    def test_brotli_is_preferred_when_installed(self):
+        url = reverse('pricing-optimization')
+        plain = self.client.get(url)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+
+        response = self.client.get(url, {'format': 'csv'}, HTTP_ACCEPT_ENCODING='br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(b''.join(response.streaming_content)).count(b'\r\n'), 31)
+
+    def test_small_responses_are_not_compressed(self):
+        with mock.patch.object(compression, 'RESPONSE_COMPRESSION_MIN_SIZE', 10 ** 6):
+            response = self.client.get(reverse('pricing-optimization'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_streamed_exports_are_compressed_chunk_by_chunk(self):
+        url = reverse('pricing-optimization')
+        plain = b''.join(self.client.get(url, {'format': 'ndjson'}).streaming_content)
+        with mock.patch.object(compression, 'brotli', None):
+            response = self.client.get(url, {'format': 'ndjson'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), plain)
+        self.assertEqual(len(plain.splitlines()), 30)
+
+    async def test_async_streamed_exports_are_compressed(self):
+        user = await CustomUser.objects.aget(email='buyer@example.com')
+        token = (await sync_to_async(CustomTokenObtainPairSerializer.get_token)(user)).access_token
+        with mock.patch.object(compression, 'brotli', None):
+            response = await AsyncClient().get(
+                reverse('pricing-optimization'), {'format': 'ndjson'},
+                headers={'Authorization': f'Bearer {token}', 'Accept-Encoding': 'gzip'},
+            )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        rows = [json.loads(line) for line in gzip.decompress(content).splitlines()]
+        self.assertEqual(len(rows), 30)
+
+    def test_precompressed_content_types_are_skipped(self):
+        with mock.patch.object(compression, 'RESPONSE_COMPRESSION_EXCLUDED_TYPES', ('application/json',)):
+            response = self.client.get(reverse('pricing-optimization'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
@@ -17,6 +17,7 @@ from django.contrib import admin
 from django.urls import path
 from django.urls import re_path as url
 from django.conf.urls import include
+from .metrics import metrics_view
 
 # URL patterns for the project
 # These define the routing of requests to the appropriate views for each app
@@ -40,5 +41,9 @@ urlpatterns = [
     # This will include all the routes defined in the `pricing.urls` module
     # Typically includes routes for managing pricing and optimization data
     url('pricing/', include('pricing.urls')),
+
+    # Request metrics of this server process in the Prometheus text format
+    # Per-view latency histograms, request counts, and SQL query counts and time
+    path('metrics', metrics_view, name='metrics'),
 ]
 
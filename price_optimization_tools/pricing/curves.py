@@ -0,0 +1,108 @@
+import hashlib
+import json
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max, Min, Sum
+from rest_framework import serializers
+from products.caching import catalog_validators, get_or_build
+from products.models import Product
+from .engine import batch_demand_curves, lttb_indices
+
+# Default and largest number of price points each demand curve is sampled at
+DEMAND_CURVE_POINTS = getattr(settings, 'DEMAND_CURVE_POINTS', 200)
+DEMAND_CURVE_MAX_POINTS = getattr(settings, 'DEMAND_CURVE_MAX_POINTS', 5000)
+
+# Default number of points each returned curve is downsampled to
+DEMAND_CURVE_TARGET_POINTS = getattr(settings, 'DEMAND_CURVE_TARGET_POINTS', 100)
+
+# Largest number of products a request may ask one curve each for (`group_by='product'`)
+DEMAND_CURVE_MAX_PRODUCTS = getattr(settings, 'DEMAND_CURVE_MAX_PRODUCTS', 500)
+
+# How the products' curves can be combined: one curve per product, or summed per category / year added
+DEMAND_CURVE_GROUPINGS = ('product', 'category', 'year')
+
+
+def demand_curves_key(params):
+    """
+    Returns the cache key of a demand curve request, derived from its normalized parameters alone.
+    - The catalog fingerprint is stored as the version of the cached entry (see `get_or_build`),
+      so a catalog change replaces the entry instead of leaving it next to the new one.
+    """
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return f"demand-curves:{hashlib.md5(payload.encode()).hexdigest()}"
+
+
+def get_demand_curves(ids=None, categories=None, group_by='product', points=DEMAND_CURVE_POINTS,
+                      target_points=DEMAND_CURVE_TARGET_POINTS):
+    """
+    Returns the demand-vs-price curves for the selected products, from the cache when possible.
+    - See `compute_demand_curves` for the parameters and the result.
+    """
+    params = {
+        'ids': sorted(ids or []), 'categories': sorted(categories or []),
+        'group_by': group_by, 'points': points, 'target_points': target_points,
+    }
+    fingerprint, _ = catalog_validators()
+    return get_or_build(demand_curves_key(params), lambda: compute_demand_curves(**params), version=fingerprint)
+
+
+def compute_demand_curves(ids=None, categories=None, group_by='product', points=DEMAND_CURVE_POINTS,
+                          target_points=DEMAND_CURVE_TARGET_POINTS):
+    """
+    Computes demand-vs-price curves for the products selected by `ids` and/or `categories`.
+    - All curves share one price axis of `points` prices, from the lowest cost price to twice the
+      highest selling price of the selection; demand at each price uses the same relationship as
+      `calculate_demand_forecast`.
+    - `group_by='product'` returns one curve per product, for at most `DEMAND_CURVE_MAX_PRODUCTS`
+      products; larger selections raise `ValidationError` (returned by DRF as a 400 response).
+    - `group_by='category'|'year'` sums the products' curves per category or per year the product
+      was added. Demand is linear in `units_sold` and `stock_available`, so the sum of a group's
+      curves is the curve of its summed columns: the sums and counts are aggregated in SQL and
+      one curve is evaluated per group, however many products the selection holds.
+    - Each curve is then downsampled to `target_points` points with LTTB, keeping its shape.
+    - Returns `{"price_range": [min, max], "curves": [{"key", "label", "products", "points": [[price, demand], ...]}]}`.
+    """
+    products = Product.objects.all()
+    if ids:
+        products = products.filter(id__in=ids)
+    if categories:
+        products = products.filter(category__in=categories)
+
+    if group_by == 'product':
+        rows = list(products.order_by('id').values_list(
+            'id', 'name', 'cost_price', 'selling_price', 'units_sold', 'stock_available',
+        )[:DEMAND_CURVE_MAX_PRODUCTS + 1])
+        if len(rows) > DEMAND_CURVE_MAX_PRODUCTS:
+            raise serializers.ValidationError(
+                f"At most {DEMAND_CURVE_MAX_PRODUCTS} products per request with `group_by=product`; "
+                f"group the curves by `category` or `year` instead."
+            )
+        labels = [(product_id, name) for product_id, name, *_ in rows]
+        rows = [(1, *values) for _, _, *values in rows]
+    else:
+        field = 'category' if group_by == 'category' else 'create_timestamp__year'
+        groups = list(products.order_by(field).values(field).annotate(
+            products=Count('id'), low=Min('cost_price'), high=Max('selling_price'),
+            units_sold=Sum('units_sold'), stock_available=Sum('stock_available'),
+        ).values_list(field, 'products', 'low', 'high', 'units_sold', 'stock_available'))
+        labels = [(key, str(key)) for key, *_ in groups]
+        rows = [values for _, *values in groups]
+    if not rows:
+        return {'price_range': None, 'curves': []}
+
+    counts, cost_prices, selling_prices, units_sold, stock = zip(*rows)
+    low = float(min(cost_prices))
+    high = max(float(max(selling_prices)) * 2, low + 0.01)
+    prices = np.linspace(low, high, points)
+    curves = batch_demand_curves(units_sold, stock, prices)
+
+    result = []
+    for row, (key, label) in enumerate(labels):
+        kept = lttb_indices(prices, curves[row], target_points)
+        result.append({
+            'key': key,
+            'label': label,
+            'products': int(counts[row]),
+            'points': np.round(np.column_stack([prices[kept], curves[row][kept]]), 2).tolist(),
+        })
+    return {'price_range': [round(low, 2), round(high, 2)], 'curves': result}
@@ -0,0 +1,303 @@
+import numpy as np
+from decimal import Decimal
+from django.conf import settings
+from products.snapshots import refresh_product_snapshots
+from products.models import Product
+from .models import PricingOptimization
+
+# Columns loaded from `Product` for a pricing batch, in `values_list` order
+PRICING_INPUT_COLUMNS = ('id', 'cost_price', 'selling_price', 'stock_available', 'units_sold')
+
+# Strategy used to compute the optimized price: 'blend' (stock-factor blend of selling and cost
+# price) or 'profit_grid' (profit-maximizing price found by `batch_profit_maximizing_price`)
+PRICING_STRATEGY = getattr(settings, 'PRICING_STRATEGY', 'blend')
+PRICING_STRATEGIES = ('blend', 'profit_grid')
+
+# Candidate price grid of the 'profit_grid' strategy: number of price points per product, and the
+# highest candidate as a multiple of the current selling price (the lowest candidate is the cost price)
+PRICE_GRID_POINTS = getattr(settings, 'PRICE_GRID_POINTS', 200)
+PRICE_GRID_MAX_MARKUP = getattr(settings, 'PRICE_GRID_MAX_MARKUP', 2.0)
+
+# Price above which the demand model no longer depends on price: its price factor `1 - price / 100`
+# is floored at 0.1, so profit would grow without bound and the grid never searches beyond it
+PRICE_GRID_DEMAND_LIMIT = 90.0
+
+# Number of products evaluated per chunk, bounding the size of the products x price-points matrices
+PRICE_GRID_CHUNK_SIZE = 10000
+
+
+def round_like_python(values, decimals=0):
+    """
+    Rounds an array exactly like Python's built-in `round(value, decimals)` does for floats.
+    - `np.round` scales by 10**decimals before rounding, so values that sit (almost) exactly
+      half-way between two results can round differently from Python, which rounds the
+      exact binary value. Those few ambiguous entries are re-rounded with `round` itself.
+    - With `decimals=0` the result is an int64 array, matching `round(value)` returning an int.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if decimals == 0:
+        # `np.rint` rounds the exact value half-to-even, identical to `round(value)`
+        return np.rint(values).astype(np.int64)
+
+    rounded = np.round(values, decimals)
+    scaled = values * 10 ** decimals
+    tolerance = 1e-6 + np.abs(scaled) * 1e-12
+    ambiguous = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < tolerance)
+    for index in ambiguous:
+        rounded[index] = round(float(values[index]), decimals)
+    return rounded
+
+
+def batch_demand_forecast(units_sold, stock_available, selling_price):
+    """
+    Vectorized `calculate_demand_forecast` over column arrays.
+    - Price factor reduces demand as selling price increases, with a minimum threshold of 0.1.
+    - Returns an int64 array rounded exactly like the scalar function.
+    """
+    units_sold = np.asarray(units_sold, dtype=np.float64)
+    stock_available = np.asarray(stock_available, dtype=np.float64)
+    selling_price = np.asarray(selling_price, dtype=np.float64)
+
+    price_factor = np.maximum(1 - (selling_price / 100), 0.1)
+    demand_forecast = units_sold * price_factor + (stock_available / 10)
+    return round_like_python(demand_forecast)
+
+
+def batch_optimized_price(cost_price, selling_price, stock_available, demand_forecast):
+    """
+    Vectorized `calculate_optimized_price` over column arrays.
+    - Stock factor reduces price as stock increases, and increases price as demand grows.
+    - Returns a float64 array rounded to 2 decimals exactly like the scalar function.
+    """
+    cost_price = np.asarray(cost_price, dtype=np.float64)
+    selling_price = np.asarray(selling_price, dtype=np.float64)
+    stock_available = np.asarray(stock_available, dtype=np.float64)
+    demand_forecast = np.asarray(demand_forecast, dtype=np.float64)
+
+    stock_factor = 1 - (stock_available / (stock_available + demand_forecast + 1))
+    optimized_price = selling_price * (1 - stock_factor) + cost_price * stock_factor
+    return round_like_python(optimized_price, 2)
+
+
+def batch_profit_maximizing_price(cost_price, selling_price, stock_available, units_sold,
+                                  price_points=PRICE_GRID_POINTS, max_markup=PRICE_GRID_MAX_MARKUP):
+    """
+    Finds, for every product at once, the candidate price that maximizes the expected profit.
+    - Each product gets `price_points` evenly spaced candidates from its cost price (the floor;
+      the optimizer never prices below cost) up to `max_markup` times its selling price, but no
+      higher than `PRICE_GRID_DEMAND_LIMIT`.
+    - Demand at each candidate uses the same price-dependent relationship as
+      `calculate_demand_forecast`: `units_sold * max(1 - price / 100, 0.1) + stock_available / 10`.
+    - Profit `(price - cost_price) * demand` is evaluated as a products x price-points matrix
+      (in chunks of `PRICE_GRID_CHUNK_SIZE` products to bound memory) and the best column is
+      picked per row; ties go to the lowest price.
+    - When the best candidate is the top of the grid, the cap binds: that capped price is still
+      the most profitable one the demand model supports, so it is kept (never above
+      `PRICE_GRID_DEMAND_LIMIT`). Products whose `max_markup` cap falls below their cost price
+      are searched up to `PRICE_GRID_DEMAND_LIMIT` instead.
+    - Products costing `PRICE_GRID_DEMAND_LIMIT` or more have no profitable price in the
+      price-dependent range, and get the formula price of `batch_optimized_price`.
+    - Returns a float64 array of prices rounded to 2 decimals like `round_like_python`.
+    """
+    cost_price = np.asarray(cost_price, dtype=np.float64)
+    selling_price = np.asarray(selling_price, dtype=np.float64)
+    stock_available = np.asarray(stock_available, dtype=np.float64)
+    units_sold = np.asarray(units_sold, dtype=np.float64)
+
+    limit = np.minimum(selling_price * max_markup, PRICE_GRID_DEMAND_LIMIT)
+    upper = np.where(limit > cost_price, limit, np.maximum(cost_price, PRICE_GRID_DEMAND_LIMIT))
+    steps = np.linspace(0.0, 1.0, price_points)
+    best_price = np.empty(len(cost_price), dtype=np.float64)
+
+    for start in range(0, len(cost_price), PRICE_GRID_CHUNK_SIZE):
+        rows = slice(start, start + PRICE_GRID_CHUNK_SIZE)
+        cost = cost_price[rows, None]
+
+        # Candidate prices: one row per product, one column per price point
+        prices = cost + (upper[rows, None] - cost) * steps
+        demand = units_sold[rows, None] * np.maximum(1 - prices / 100, 0.1) + stock_available[rows, None] / 10
+        profit = (prices - cost) * demand
+
+        best = np.argmax(profit, axis=1)
+        best_price[rows] = prices[np.arange(len(best)), best]
+
+    best_price = np.minimum(round_like_python(best_price, 2), PRICE_GRID_DEMAND_LIMIT)
+    unprofitable = cost_price >= PRICE_GRID_DEMAND_LIMIT
+    if unprofitable.any():
+        demand_forecast = batch_demand_forecast(
+            units_sold[unprofitable], stock_available[unprofitable], selling_price[unprofitable]
+        )
+        best_price[unprofitable] = batch_optimized_price(
+            cost_price[unprofitable], selling_price[unprofitable], stock_available[unprofitable], demand_forecast
+        )
+    return best_price
+
+
+def batch_demand_curves(units_sold, stock_available, prices):
+    """
+    Evaluates the `calculate_demand_forecast` relationship for every product at every price.
+    - Returns a `(products, len(prices))` float64 array (unrounded, so curves stay smooth).
+    """
+    units_sold = np.asarray(units_sold, dtype=np.float64)
+    stock_available = np.asarray(stock_available, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+
+    price_factor = np.maximum(1 - (prices / 100), 0.1)
+    return units_sold[:, None] * price_factor + (stock_available / 10)[:, None]
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Selects `threshold` points of a series with the Largest-Triangle-Three-Buckets algorithm.
+    - The first and last points are always kept; every bucket in between keeps the point forming
+      the largest triangle with the previously kept point and the average of the next bucket,
+      which preserves peaks, troughs and the overall shape of the curve.
+    - Returns the sorted indices of the kept points (all indices if the series is short enough).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    length = len(x)
+    if threshold >= length or threshold < 3:
+        return np.arange(length)
+
+    edges = np.linspace(1, length - 1, threshold - 1).astype(np.int64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, length - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else length
+        next_end = max(next_end, end + 1)
+        average_x = x[end:next_end].mean()
+        average_y = y[end:next_end].mean()
+
+        # Twice the triangle area for every candidate in the bucket, computed at once
+        areas = np.abs(
+            (x[previous] - average_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (average_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        indices[bucket + 1] = previous
+    return indices
+
+
+def exponential_smoothing(series, alpha):
+    """
+    Fits simple exponential smoothing to many series at once and returns each series' final level.
+    - `series` is a `(products, periods)` array, oldest period first. Each level starts at the
+      series' first non-zero observation (so products that started selling recently are not
+      dragged down by the empty weeks before) and is updated as
+      `level = alpha * value + (1 - alpha) * level`.
+    - The recursion unrolls into fixed weights per period, so all products are fitted with a
+      single matrix-vector product instead of a Python loop over products and periods.
+    """
+    series = np.asarray(series, dtype=np.float64)
+    products, periods = series.shape
+    if periods == 0:
+        return np.zeros(products)
+
+    # Weight of period t in the final level: alpha * (1 - alpha)**(periods - 1 - t); the first
+    # observation is the initial level and keeps the remaining (1 - alpha)**(periods - 1)
+    decay = (1 - alpha) ** np.arange(periods - 1, -1, -1, dtype=np.float64)
+    weights = alpha * decay
+    weights[0] = decay[0]
+    levels = series @ weights
+
+    # Series starting later: their first observation gets the initial-level weight instead
+    first = np.argmax(series != 0, axis=1)
+    late = first > 0
+    rows = np.flatnonzero(late)
+    levels[late] += series[rows, first[late]] * decay[first[late]] * (1 - alpha)
+    return levels
+
+
+def load_pricing_inputs(queryset=None):
+    """
+    Loads the pricing input columns of the given `Product` queryset into NumPy arrays.
+    - Returns a dict mapping each name in `PRICING_INPUT_COLUMNS` to an array.
+    """
+    if queryset is None:
+        queryset = Product.objects.all()
+    rows = list(queryset.values_list(*PRICING_INPUT_COLUMNS))
+    columns = zip(*rows) if rows else [()] * len(PRICING_INPUT_COLUMNS)
+    return {
+        name: np.array(column, dtype=np.int64 if name in ('id', 'stock_available', 'units_sold') else np.float64)
+        for name, column in zip(PRICING_INPUT_COLUMNS, columns)
+    }
+
+
+def compute_pricing(inputs, sales_demand=None, strategy=None):
+    """
+    Evaluates the demand forecast and the optimized price for every product in `inputs`.
+    - `inputs` is a dict of column arrays as returned by `load_pricing_inputs`.
+    - `strategy` selects how the optimized price is computed (one of `PRICING_STRATEGIES`);
+      it defaults to the `PRICING_STRATEGY` setting.
+    - `sales_demand` optionally holds a demand forecast fitted on recent sales (see
+      `pricing.sales.forecast_demand_from_sales`), aligned with `inputs['id']`; it replaces the
+      formula-based forecast wherever it is not NaN. It cannot be combined with the 'profit_grid'
+      strategy, whose price-dependent demand is the `units_sold` formula: the stored forecast
+      would contradict the demand the price was optimized for, so a `ValueError` is raised.
+    - Returns a `(demand_forecast, optimized_price)` tuple of arrays aligned with `inputs['id']`.
+    """
+    if sales_demand is not None and (strategy or PRICING_STRATEGY) == 'profit_grid':
+        raise ValueError("A sales-based demand forecast cannot be combined with the 'profit_grid' strategy.")
+    demand_forecast = batch_demand_forecast(
+        inputs['units_sold'], inputs['stock_available'], inputs['selling_price']
+    )
+    if sales_demand is not None:
+        sales_demand = np.asarray(sales_demand, dtype=np.float64)
+        has_sales = ~np.isnan(sales_demand)
+        demand_forecast[has_sales] = round_like_python(sales_demand[has_sales])
+    if (strategy or PRICING_STRATEGY) == 'profit_grid':
+        optimized_price = batch_profit_maximizing_price(
+            inputs['cost_price'], inputs['selling_price'], inputs['stock_available'], inputs['units_sold']
+        )
+    else:
+        optimized_price = batch_optimized_price(
+            inputs['cost_price'], inputs['selling_price'], inputs['stock_available'], demand_forecast
+        )
+    return demand_forecast, optimized_price
+
+
+def build_pricing_rows(products, provided_values=None):
+    """
+    Builds unsaved `PricingOptimization` instances for a list of saved `Product` instances.
+    - The demand forecast and optimized price are computed for all products in one vectorized pass.
+    - `provided_values` is an optional list of `(demand_forecast, optimized_price)` pairs aligned with
+      `products`; provided (non-None) values take precedence over the computed ones.
+    """
+    if provided_values is None:
+        provided_values = [(None, None)] * len(products)
+
+    demand_forecast, optimized_price = compute_pricing({
+        'id': [product.id for product in products],
+        'cost_price': [product.cost_price for product in products],
+        'selling_price': [product.selling_price for product in products],
+        'stock_available': [product.stock_available for product in products],
+        'units_sold': [product.units_sold for product in products],
+    })
+    return [
+        PricingOptimization(
+            product=product,
+            demand_forecast=int(computed_demand) if demand is None else demand,
+            optimized_price=Decimal(str(computed_price)) if price is None else price,
+        )
+        for product, (demand, price), computed_demand, computed_price
+        in zip(products, provided_values, demand_forecast, optimized_price)
+    ]
+
+
+def upsert_pricing_rows(pricing_rows):
+    """
+    Creates or updates the given `PricingOptimization` rows with a single bulk statement per batch.
+    - `updated_timestamp` is refreshed on updated rows too, which moves the catalog fingerprint
+      (see `products.caching.catalog_validators`) although bulk statements send no model signals.
+    - The products' `ProductSnapshot` rows are rebuilt from their current product and pricing values.
+    """
+    PricingOptimization.objects.bulk_create(
+        pricing_rows,
+        update_conflicts=True,
+        unique_fields=['product'],
+        update_fields=['demand_forecast', 'optimized_price', 'updated_timestamp'],
+    )
+    refresh_product_snapshots([row.product_id for row in pricing_rows])
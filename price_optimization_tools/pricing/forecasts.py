@@ -0,0 +1,50 @@
+from django.conf import settings
+from products.models import ProductSnapshot
+
+# Largest number of product ids looked up per query; longer id lists are split into chunks of this size
+DEMAND_FORECAST_CHUNK_SIZE = getattr(settings, 'DEMAND_FORECAST_CHUNK_SIZE', 500)
+
+# Snapshot columns read for each product, in the order `forecast_result` expects them
+FORECAST_COLUMNS = (
+    'pk', 'name', 'category', 'cost_price', 'selling_price', 'stock_available', 'units_sold',
+    'create_timestamp', 'demand_forecast',
+)
+
+
+def forecast_result(row):
+    """
+    Builds the demand forecast result of one product from its `FORECAST_COLUMNS` values.
+    - `status` is `ok`, or `no_forecast` when the product has no demand forecast yet (no
+      `PricingOptimization` row, or one without a forecast); `demand_forecast` is null then.
+    """
+    product_id, name, category, cost_price, selling_price, stock, units_sold, created, demand_forecast = row
+    return {
+        "id": product_id,
+        "status": "ok" if demand_forecast is not None else "no_forecast",
+        "product_name": name,
+        "product_category": category,
+        "product_cost_price": cost_price,
+        "product_selling_price": selling_price,
+        "product_available_stock": stock,
+        "product_units_sold": units_sold,
+        "product_added_year": created.year,
+        "demand_forecast": demand_forecast,
+    }
+
+
+def get_demand_forecasts(product_ids):
+    """
+    Returns one demand forecast result per requested product id, in request order.
+    - Products and their forecast are read from the denormalized `ProductSnapshot` table, one
+      query per chunk of `DEMAND_FORECAST_CHUNK_SIZE` ids, so the query count only depends on
+      the number of chunks (never on the rows found) and no single `IN` list grows unbounded.
+    - Ids without a product get a `{"id": ..., "status": "not_found"}` marker; repeated ids get
+      one result each.
+    """
+    unique_ids = list(dict.fromkeys(product_ids))
+    results = {}
+    for start in range(0, len(unique_ids), DEMAND_FORECAST_CHUNK_SIZE):
+        chunk = unique_ids[start:start + DEMAND_FORECAST_CHUNK_SIZE]
+        for row in ProductSnapshot.objects.filter(pk__in=chunk).values_list(*FORECAST_COLUMNS):
+            results[row[0]] = forecast_result(row)
+    return [results.get(product_id, {"id": product_id, "status": "not_found"}) for product_id in product_ids]
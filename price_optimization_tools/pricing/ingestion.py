@@ -0,0 +1,182 @@
+import atexit
+import logging
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from products.snapshots import refresh_product_snapshots
+from products.models import Product
+from .jobs import enqueue_pricing_jobs
+from .sales import record_sales_events
+
+logger = logging.getLogger(__name__)
+
+# Number of buffered sale events that triggers a flush
+SALES_BUFFER_MAX_EVENTS = getattr(settings, 'SALES_BUFFER_MAX_EVENTS', 5000)
+
+# Longest time (in seconds) a sale event may stay buffered before it is flushed
+SALES_BUFFER_MAX_DELAY = getattr(settings, 'SALES_BUFFER_MAX_DELAY', 1.0)
+
+# Number of products updated per counter UPDATE statement
+COUNTER_UPDATE_BATCH_SIZE = 500
+
+
+class SalesEventBuffer:
+    """
+    Process-local write-behind buffer for sale events.
+    - Requests append validated, unsaved `SalesEvent` instances; the buffer is flushed to the
+      database once it holds `max_events` events, or `max_delay` seconds after its first event
+      (by a timer thread, so a quiet process still flushes), and when the process exits.
+    - Appending and draining happen under one lock, so concurrent requests never lose or
+      double-count events. A flush swaps the buffered list out, so requests keep appending while
+      the previous batch is written.
+    - A failed flush puts its events back and re-arms the timer, so they are retried without
+      waiting for a new event. Events of products deleted in the meantime are dropped when the
+      buffer is flushed (see `apply_sales_events`), so they never block the other events.
+    - Events still buffered when the process is killed are lost; use a short `max_delay` if that matters.
+    """
+
+    def __init__(self, max_events=SALES_BUFFER_MAX_EVENTS, max_delay=SALES_BUFFER_MAX_DELAY):
+        self.max_events = max_events
+        self.max_delay = max_delay
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.events = []
+        self.timer = None
+
+    def add(self, events):
+        """
+        Buffers a list of sale events and returns True if the buffer is now due for a flush.
+        """
+        with self.lock:
+            self.events.extend(events)
+            self.schedule_flush()
+            return len(self.events) >= self.max_events
+
+    def schedule_flush(self):
+        """
+        Starts the flush timer if it is not running; called with `lock` held.
+        """
+        if self.timer is None and self.max_delay is not None and self.events:
+            # Flush the events of a quiet process once the delay has passed
+            self.timer = threading.Timer(self.max_delay, self.flush_from_timer)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def drain(self):
+        """
+        Removes and returns every buffered event.
+        """
+        with self.lock:
+            events, self.events = self.events, []
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        return events
+
+    def requeue(self, events):
+        """
+        Puts back events whose flush failed, ahead of the events buffered since, and re-arms the flush timer.
+        """
+        with self.lock:
+            self.events[:0] = events
+            self.schedule_flush()
+
+    def flush(self):
+        """
+        Writes every buffered event to the database and returns the number of events written.
+        - Flushes are serialized, so the counter updates of two flushes never interleave.
+        - If the write fails, the events are put back in the buffer (to be retried by the timer)
+          and the error is raised. Events of deleted products are dropped, not counted.
+        """
+        with self.flush_lock:
+            events = self.drain()
+            if not events:
+                return 0
+            try:
+                return apply_sales_events(events)
+            except Exception:
+                self.requeue(events)
+                raise
+
+    def flush_from_timer(self):
+        """
+        Timer callback flushing the buffer outside of a request.
+        """
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Flushing buffered sale events failed; they will be retried")
+        finally:
+            # The timer thread has its own database connection; do not leave it open
+            close_old_connections()
+
+
+def apply_sales_events(events):
+    """
+    Writes a batch of sale events and applies their aggregated effect to the product counters.
+    - Events of products deleted since they were buffered are logged and dropped: their rows
+      would violate the foreign key and fail the whole batch. The remaining products are locked
+      first, in id order, so they cannot be deleted before the batch commits, and concurrent
+      flushes (or the pricing worker, see `pricing.jobs.process_pricing_jobs`) lock them in the
+      same order: products by id, then their pricing jobs. Returns the number of events written.
+    - The events and sales rollups are stored with `record_sales_events`.
+    - `units_sold` and `stock_available` are changed with atomic `F()` increments/decrements,
+      summed per product first, so each product row is updated once per flush however many of
+      its sales were buffered. Stock is floored at zero.
+    - A pricing recomputation is enqueued once per affected product after the counters change,
+      and the products' `ProductSnapshot` rows are rebuilt with the new counters.
+    """
+    with transaction.atomic():
+        product_ids = {event.product_id for event in events}
+        existing = set(
+            Product.objects.select_for_update().filter(id__in=product_ids).order_by('id').values_list('id', flat=True)
+        )
+        if missing := product_ids - existing:
+            dropped = [event for event in events if event.product_id in missing]
+            logger.warning(
+                "Dropping %d buffered sale events of deleted products %s", len(dropped), sorted(missing)
+            )
+            events = [event for event in events if event.product_id in existing]
+            if not events:
+                return 0
+
+        quantities = defaultdict(int)
+        for event in events:
+            quantities[event.product_id] += event.quantity
+
+        record_sales_events(events)
+
+        now = timezone.now()
+        product_ids = sorted(quantities)
+        for start in range(0, len(product_ids), COUNTER_UPDATE_BATCH_SIZE):
+            batch = product_ids[start:start + COUNTER_UPDATE_BATCH_SIZE]
+            # One UPDATE per batch: each product's own quantity is picked with a CASE expression
+            delta = Case(*[When(id=product_id, then=Value(quantities[product_id])) for product_id in batch])
+            Product.objects.filter(id__in=batch).update(
+                units_sold=F('units_sold') + delta,
+                stock_available=Greatest(F('stock_available') - delta, Value(0)),
+                updated_timestamp=now,
+            )
+
+        enqueue_pricing_jobs(product_ids)
+        refresh_product_snapshots(product_ids)
+    return len(events)
+
+
+# Buffer shared by every request handled by this process
+sales_event_buffer = SalesEventBuffer()
+
+
+@atexit.register
+def flush_sales_event_buffer_at_exit():
+    """
+    Flushes the events still buffered when the process shuts down cleanly.
+    """
+    try:
+        sales_event_buffer.flush()
+    except Exception:
+        logger.exception("Flushing buffered sale events at exit failed")
@@ -0,0 +1,124 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .engine import build_pricing_rows, upsert_pricing_rows
+from .models import PricingJob, PricingOptimization
+
+# Number of pending pricing jobs claimed and processed per worker batch
+PRICING_JOB_BATCH_SIZE = getattr(settings, 'PRICING_JOB_BATCH_SIZE', 500)
+
+# Product fields the demand forecast and optimized price are computed from
+PRICING_INPUT_FIELDS = ('cost_price', 'selling_price', 'stock_available', 'units_sold')
+
+# Fields of a job holding the values supplied with the product write
+PRICING_JOB_VALUE_FIELDS = ('demand_forecast', 'optimized_price')
+
+
+def pricing_inputs_changed(product):
+    """
+    Returns True if a pricing input of `product` differs from the value it was loaded with.
+    - Products that were not loaded from the database (e.g. built in memory) count as changed.
+    """
+    loaded = getattr(product, '_loaded_values', None)
+    if loaded is None:
+        return True
+    return any(field in loaded and loaded[field] != getattr(product, field) for field in PRICING_INPUT_FIELDS)
+
+
+def products_needing_pricing(products):
+    """
+    Returns the ids of the saved `products` whose pricing must be recomputed.
+    - That is every product whose pricing inputs changed (see `pricing_inputs_changed`) or that
+      has no `PricingOptimization` row yet; other writes (e.g. a description edit) leave the
+      pricing, including manually set prices, untouched.
+    - The pricing rows are looked up with one query, for the unchanged products only.
+    """
+    needed = {product.pk for product in products if pricing_inputs_changed(product)}
+    unchanged = [product.pk for product in products if product.pk not in needed]
+    if unchanged:
+        priced = set(PricingOptimization.objects.filter(product_id__in=unchanged).values_list('product_id', flat=True))
+        needed.update(product_id for product_id in unchanged if product_id not in priced)
+    return needed
+
+
+def enqueue_pricing_job(product_id, demand_forecast=None, optimized_price=None):
+    """
+    Enqueues a pricing recomputation for a product, merging it into the pending job if there is one.
+    - Values that are provided (not None) replace the ones stored on the pending job; missing
+      values keep what an earlier write supplied, or are computed by the worker.
+    - Runs in the caller's transaction, so the job is only visible once the product write commits.
+    """
+    values = {
+        field: value
+        for field, value in (('demand_forecast', demand_forecast), ('optimized_price', optimized_price))
+        if value is not None
+    }
+
+    # Merge into the pending job for the product, if any
+    if PricingJob.objects.filter(product_id=product_id).update(updated_timestamp=timezone.now(), **values):
+        return
+
+    try:
+        with transaction.atomic():
+            PricingJob.objects.create(product_id=product_id, **values)
+    except IntegrityError:
+        # A concurrent write enqueued the job first; merge into it instead
+        PricingJob.objects.filter(product_id=product_id).update(updated_timestamp=timezone.now(), **values)
+
+
+def enqueue_pricing_jobs(product_ids, pricing_values=None):
+    """
+    Enqueues a pricing recomputation for many products with bulk inserts.
+    - `pricing_values` optionally holds one `(demand_forecast, optimized_price)` tuple per product;
+      as with `enqueue_pricing_job`, provided values replace the ones stored on a pending job and
+      missing values keep what an earlier write supplied.
+    - Jobs are grouped by the values they supply, one bulk upsert per group (at most four).
+    """
+    if pricing_values is None:
+        pricing_values = [(None, None)] * len(product_ids)
+    groups = {}
+    for product_id, values in zip(product_ids, pricing_values):
+        supplied = {field: value for field, value in zip(PRICING_JOB_VALUE_FIELDS, values) if value is not None}
+        groups.setdefault(tuple(supplied), []).append(PricingJob(product_id=product_id, **supplied))
+
+    for fields, jobs in groups.items():
+        if fields:
+            PricingJob.objects.bulk_create(
+                jobs, update_conflicts=True, unique_fields=['product'], update_fields=[*fields, 'updated_timestamp']
+            )
+        else:
+            # Products that already have a pending job keep it (and any values supplied with it)
+            PricingJob.objects.bulk_create(jobs, ignore_conflicts=True)
+
+
+def process_pricing_jobs(batch_size=PRICING_JOB_BATCH_SIZE):
+    """
+    Processes one batch of pending pricing jobs, oldest first.
+    - The jobs are claimed (locked and deleted) and the resulting `PricingOptimization` rows are
+      upserted in the same transaction, so a failed batch leaves its jobs pending.
+    - Jobs locked by another worker are skipped on databases that support `SKIP LOCKED`.
+    - Lock order: every catalog write locks the `Product` row before the product's `PricingJob`
+      row (a product save updates the product, then enqueues its job). The worker claims the
+      product rows together with the job rows, so it follows the same order and never waits on
+      a product while holding its job; jobs whose product is being written are skipped until
+      the next batch.
+    - A product saved while its job is being processed gets a new job once this batch commits.
+    - Returns the number of jobs processed (0 when the queue is empty).
+    """
+    with transaction.atomic():
+        # Lock each job's product together with the job (product before job, see above)
+        jobs = list(
+            PricingJob.objects.select_related('product')
+            .select_for_update(skip_locked=True, of=('self', 'product'))
+            .order_by('created_timestamp', 'id')[:batch_size]
+        )
+        if not jobs:
+            return 0
+
+        PricingJob.objects.filter(id__in=[job.id for job in jobs]).delete()
+
+        # Compute every product's pricing in one vectorized pass; values supplied with the write take precedence
+        upsert_pricing_rows(build_pricing_rows(
+            [job.product for job in jobs], [(job.demand_forecast, job.optimized_price) for job in jobs]
+        ))
+    return len(jobs)
@@ -0,0 +1,45 @@
+import time
+from django.core.management.base import BaseCommand
+from pricing.jobs import PRICING_JOB_BATCH_SIZE, process_pricing_jobs
+
+
+class Command(BaseCommand):
+    """
+    Management command running the pricing job worker.
+    - Processes the `PricingJob` queue filled by product saves in batches, writing each product's
+      demand forecast and optimized price with the batch pricing engine.
+    - Runs until interrupted, polling the queue when it is empty; `--once` drains the queue and exits.
+    - Usage: `python manage.py process_pricing_jobs [--batch-size N] [--poll-interval S] [--once]`
+    """
+    help = "Process pending pricing recomputation jobs in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=PRICING_JOB_BATCH_SIZE,
+            help=f"Number of jobs processed per batch (default: {PRICING_JOB_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help="Seconds to wait before checking an empty queue again (default: 1).",
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Process every pending job and exit instead of waiting for new ones.",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        try:
+            while True:
+                processed = process_pricing_jobs(options['batch_size'])
+                total += processed
+                if processed:
+                    self.stdout.write(f"Processed {processed} pricing jobs.")
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} pricing jobs in total."))
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.16 on 2026-10-18 13:30
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pricing', '0002_remove_pricingoptimization_customer_rating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pricingoptimization',
+            name='updated_timestamp',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='pricingoptimization',
+            index=models.Index(fields=['updated_timestamp'], name='pricing_updated_timestamp_idx'),
+        ),
+    ]
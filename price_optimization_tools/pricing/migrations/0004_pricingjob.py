@@ -0,0 +1,29 @@
+# Generated by Django 4.2.16 on 2026-10-18 13:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_product_updated_timestamp_index'),
+        ('pricing', '0003_pricingoptimization_updated_timestamp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PricingJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('demand_forecast', models.PositiveIntegerField(blank=True, null=True)),
+                ('optimized_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('created_timestamp', models.DateTimeField(auto_now_add=True)),
+                ('updated_timestamp', models.DateTimeField(auto_now=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='pricing_job', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_timestamp', 'id'], name='pricing_job_created_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from products.models import Product
 
 class PricingOptimization(models.Model):
@@ -22,9 +23,149 @@ class PricingOptimization(models.Model):
     # It is stored as a decimal with up to 10 digits, 2 of which are after the decimal point.
     optimized_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
 
+    # Timestamp indicating the last update to the pricing values
+    # Used together with `Product.updated_timestamp` to derive `Last-Modified`/`ETag` for catalog reads.
+    updated_timestamp = models.DateTimeField(auto_now=True)  # Automatically updated on save
+
+    class Meta:
+        """
+        Meta options for the PricingOptimization model.
+        - `indexes`: index on `updated_timestamp` so the latest pricing change is found without a table scan.
+        """
+        indexes = [
+            models.Index(fields=['updated_timestamp'], name='pricing_updated_timestamp_idx'),
+        ]
+
     def __str__(self):
         """
         String representation of the PricingOptimization instance.
         - Returns a readable format for identifying the product associated with the pricing optimization.
         """
         return f"Pricing Optimization for {self.product.name}"
+
+
+class PricingJob(models.Model):
+    """
+    Model to represent a pending recomputation of a product's `PricingOptimization` entry.
+    - Jobs are enqueued when a `Product` is saved and processed in batches by the
+      `process_pricing_jobs` worker command, outside of the request.
+    - There is at most one pending job per product: saving a product that already has a
+      pending job merges the new values into it instead of adding a second job.
+    """
+
+    # The product whose pricing must be recomputed (one pending job per product)
+    # If the product is deleted, its pending job is deleted as well.
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name="pricing_job")
+
+    # Values supplied with the product write (optional); missing values are computed by the worker
+    demand_forecast = models.PositiveIntegerField(null=True, blank=True)
+    optimized_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+
+    # Timestamp indicating when the job was first enqueued (jobs are processed oldest first)
+    created_timestamp = models.DateTimeField(auto_now_add=True)
+
+    # Timestamp indicating the last time a product write was merged into the job
+    updated_timestamp = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """
+        Meta options for the PricingJob model.
+        - `indexes`: index matching the worker's oldest-first ordering.
+        """
+        indexes = [
+            models.Index(fields=['created_timestamp', 'id'], name='pricing_job_created_idx'),
+        ]
+
+    def __str__(self):
+        """
+        String representation of the PricingJob instance.
+        """
+        return f"Pricing Job for product {self.product_id}"
+
+
+class SalesEvent(models.Model):
+    """
+    Model to represent a single sale of a product (the raw sales history).
+    - Every recorded event is also added to the `DailySalesRollup` and `WeeklySalesRollup`
+      aggregates, which the demand forecast reads instead of scanning these rows.
+    """
+
+    # The product that was sold; its sales history is deleted together with it
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="sales_events")
+
+    # Number of units sold and the price charged per unit
+    quantity = models.PositiveIntegerField()
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    # Timestamp indicating when the sale happened
+    sold_timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        """
+        Meta options for the SalesEvent model.
+        - `indexes`: index on `(product, sold_timestamp)` for per-product history queries.
+        """
+        indexes = [
+            models.Index(fields=['product', 'sold_timestamp'], name='sales_event_product_time_idx'),
+        ]
+
+    def __str__(self):
+        """
+        String representation of the SalesEvent instance.
+        """
+        return f"{self.quantity} x product {self.product_id} at {self.sold_timestamp}"
+
+
+class SalesRollup(models.Model):
+    """
+    Abstract base for the per-product sales aggregates of one period.
+    - Rows are incremented as events are recorded (see `pricing.sales.record_sales_events`),
+      never recomputed from the raw events.
+    """
+
+    # The product the sales belong to
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+
+    # Total units sold, revenue and number of sale events in the period
+    units_sold = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    event_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class DailySalesRollup(SalesRollup):
+    """
+    Model to represent the sales of a product on one day.
+    """
+
+    # The day the sales happened (in the project time zone)
+    day = models.DateField()
+
+    class Meta:
+        """
+        Meta options for the DailySalesRollup model.
+        - `constraints`: one row per product and day; it is the conflict target of the incremental upsert.
+        """
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'day'], name='daily_sales_rollup_unique'),
+        ]
+
+
+class WeeklySalesRollup(SalesRollup):
+    """
+    Model to represent the sales of a product in one week (weeks start on Monday).
+    """
+
+    # The Monday the week starts on
+    week_start = models.DateField()
+
+    class Meta:
+        """
+        Meta options for the WeeklySalesRollup model.
+        - `constraints`: one row per product and week; it is the conflict target of the incremental upsert.
+        """
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'week_start'], name='weekly_sales_rollup_unique'),
+        ]
@@ -0,0 +1,147 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from .engine import exponential_smoothing
+from .models import DailySalesRollup, SalesEvent, WeeklySalesRollup
+
+# Number of weeks of sales history the demand forecast is fitted on
+SALES_HISTORY_WEEKS = getattr(settings, 'SALES_HISTORY_WEEKS', 12)
+
+# Smoothing factor of the weekly demand level (higher values follow recent weeks more closely)
+SALES_SMOOTHING_ALPHA = getattr(settings, 'SALES_SMOOTHING_ALPHA', 0.3)
+
+# Number of weeks of demand covered by a sales-based demand forecast
+SALES_FORECAST_HORIZON_WEEKS = getattr(settings, 'SALES_FORECAST_HORIZON_WEEKS', 4)
+
+# Number of rollup rows written per upsert statement
+ROLLUP_UPSERT_BATCH_SIZE = 100
+
+
+def week_start(day):
+    """
+    Returns the Monday of the week containing `day`.
+    """
+    return day - timedelta(days=day.weekday())
+
+
+def record_sales_events(events):
+    """
+    Saves a list of unsaved `SalesEvent` instances and adds them to the sales rollups.
+    - The events and the rollup increments are written in one transaction.
+    - Returns the saved events.
+    """
+    with transaction.atomic():
+        events = SalesEvent.objects.bulk_create(events)
+        update_sales_rollups(events)
+    return events
+
+
+def update_sales_rollups(events):
+    """
+    Adds a list of sales events to the daily and weekly rollups.
+    - The events are first summed per product and period in memory, so each rollup row is
+      touched once per call however many events it receives.
+    """
+    daily = defaultdict(lambda: [0, Decimal('0'), 0])
+    for event in events:
+        # Events are bucketed by their day in the project time zone
+        sold = event.sold_timestamp
+        day = timezone.localdate(sold) if timezone.is_aware(sold) else sold.date()
+        totals = daily[(event.product_id, day)]
+        totals[0] += event.quantity
+        totals[1] += event.quantity * Decimal(event.unit_price)
+        totals[2] += 1
+
+    weekly = defaultdict(lambda: [0, Decimal('0'), 0])
+    for (product_id, day), (units, revenue, count) in daily.items():
+        totals = weekly[(product_id, week_start(day))]
+        totals[0] += units
+        totals[1] += revenue
+        totals[2] += count
+
+    increment_rollups(DailySalesRollup, 'day', daily)
+    increment_rollups(WeeklySalesRollup, 'week_start', weekly)
+
+
+def increment_rollups(model, period_field, totals):
+    """
+    Adds `{(product_id, period): [units_sold, revenue, event_count]}` totals to a rollup table.
+    - Uses `INSERT ... ON CONFLICT DO UPDATE SET column = column + excluded.column` (supported by
+      PostgreSQL and SQLite), so missing rows are created and existing rows are incremented
+      atomically in one statement per batch, without reading them first. The ORM's
+      `bulk_create(update_conflicts=True)` can only overwrite the existing values.
+    """
+    if not totals:
+        return
+
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = ['product_id', period_field, 'units_sold', 'revenue', 'event_count']
+    fields = [model._meta.get_field(column) for column in columns]
+    quoted = [connection.ops.quote_name(field.column) for field in fields]
+    increments = ', '.join(f'{column} = {table}.{column} + excluded.{column}' for column in quoted[2:])
+
+    rows = [(product_id, period, *values) for (product_id, period), values in totals.items()]
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), ROLLUP_UPSERT_BATCH_SIZE):
+            batch = rows[start:start + ROLLUP_UPSERT_BATCH_SIZE]
+            placeholders = ', '.join(['(' + ', '.join(['%s'] * len(columns)) + ')'] * len(batch))
+            params = [
+                field.get_db_prep_save(value, connection)
+                for row in batch for field, value in zip(fields, row)
+            ]
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(quoted)}) VALUES {placeholders} "
+                f"ON CONFLICT ({quoted[0]}, {quoted[1]}) DO UPDATE SET {increments}",
+                params,
+            )
+
+
+def load_weekly_sales(product_ids, weeks=SALES_HISTORY_WEEKS, today=None):
+    """
+    Loads the weekly units sold of the given products from `WeeklySalesRollup`.
+    - Returns a `(len(product_ids), weeks)` array, oldest week first and ending with the current
+      week; weeks without sales are zero.
+    - Also returns a boolean array marking the products with any sales in the window.
+    """
+    product_ids = np.asarray(product_ids, dtype=np.int64)
+    last_week = week_start(today or timezone.localdate())
+    first_week = last_week - timedelta(weeks=weeks - 1)
+
+    sales = np.zeros((len(product_ids), weeks), dtype=np.float64)
+    has_history = np.zeros(len(product_ids), dtype=bool)
+    if not len(product_ids):
+        return sales, has_history
+
+    # Filter on the id range rather than a long IN list; keyset batches are contiguous id ranges
+    rows = WeeklySalesRollup.objects.filter(
+        product_id__gte=int(product_ids.min()),
+        product_id__lte=int(product_ids.max()),
+        week_start__range=(first_week, last_week),
+    ).values_list('product_id', 'week_start', 'units_sold')
+
+    positions = {product_id: index for index, product_id in enumerate(product_ids.tolist())}
+    for product_id, start, units_sold in rows:
+        row = positions.get(product_id)
+        if row is None:
+            continue
+        sales[row, (start - first_week).days // 7] = units_sold
+        has_history[row] = True
+    return sales, has_history
+
+
+def forecast_demand_from_sales(product_ids, weeks=SALES_HISTORY_WEEKS, alpha=SALES_SMOOTHING_ALPHA,
+                               horizon_weeks=SALES_FORECAST_HORIZON_WEEKS, today=None):
+    """
+    Forecasts the demand of the given products over the next `horizon_weeks` from their weekly sales.
+    - Fits simple exponential smoothing to every product's weekly series at once (see
+      `exponential_smoothing`) and scales the resulting weekly level to the horizon.
+    - Returns a float array aligned with `product_ids`, with NaN for products without sales in the window.
+    """
+    sales, has_history = load_weekly_sales(product_ids, weeks, today)
+    demand = exponential_smoothing(sales, alpha) * horizon_weeks
+    demand[~has_history] = np.nan
+    return demand
@@ -1,4 +1,8 @@
 from rest_framework import serializers
+from products.batch import BATCH_MAX_ITEMS
+from .curves import (
+    DEMAND_CURVE_GROUPINGS, DEMAND_CURVE_MAX_POINTS, DEMAND_CURVE_POINTS, DEMAND_CURVE_TARGET_POINTS,
+)
 from .models import PricingOptimization
 
 class PricingOptimizationSerializer(serializers.ModelSerializer):
@@ -17,3 +21,40 @@ class PricingOptimizationSerializer(serializers.ModelSerializer):
         """
         model = PricingOptimization
         fields = '__all__'  # Serialize all fields from the PricingOptimization model.
+
+
+class SalesEventSerializer(serializers.Serializer):
+    """
+    Serializer validating one sale event sent to the sales event ingestion endpoint.
+    - `unit_price` defaults to the product's selling price and `sold_timestamp` to the time of the request.
+    """
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+    unit_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    sold_timestamp = serializers.DateTimeField(required=False)
+
+
+class DemandCurveRequestSerializer(serializers.Serializer):
+    """
+    Serializer validating a demand curve request.
+    - Products are selected by `ids`, `categories`, or both (at least one is required).
+    - `points` is the number of prices each curve is sampled at; `target_points` the number of
+      points each returned curve is downsampled to.
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, max_length=BATCH_MAX_ITEMS)
+    categories = serializers.ListField(child=serializers.CharField(max_length=255), required=False, max_length=100)
+    group_by = serializers.ChoiceField(choices=DEMAND_CURVE_GROUPINGS, default='product')
+    points = serializers.IntegerField(min_value=2, max_value=DEMAND_CURVE_MAX_POINTS, default=DEMAND_CURVE_POINTS)
+    target_points = serializers.IntegerField(min_value=3, max_value=DEMAND_CURVE_MAX_POINTS, default=DEMAND_CURVE_TARGET_POINTS)
+
+    def validate(self, attrs):
+        if not attrs.get('ids') and not attrs.get('categories'):
+            raise serializers.ValidationError("Provide product `ids` or `categories`.")
+        return attrs
+
+
+class DemandForecastRequestSerializer(serializers.Serializer):
+    """
+    Serializer validating a demand forecast request: a non-empty list of product `ids`.
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=BATCH_MAX_ITEMS)
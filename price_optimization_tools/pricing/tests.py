@@ -1,3 +1,876 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import random
+import threading
+import time
+import numpy as np
+from unittest import mock, skipUnless
+from asgiref.sync import sync_to_async
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.core.management import CommandError, call_command
+from django.core.cache import cache
+from django.test import AsyncClient, SimpleTestCase, TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import CustomUser
+from accounts.views import CustomTokenObtainPairSerializer
+from products import exports
+from products.caching import catalog_validators, get_or_build
+from products.exports import msgpack, pyarrow
+from products.models import Product
+from products.snapshots import refresh_product_snapshots
+from products.signals import calculate_demand_forecast, calculate_optimized_price
+from . import forecasts
+from .curves import DEMAND_CURVE_TARGET_POINTS, demand_curves_key
+from .engine import (
+    batch_demand_forecast, batch_optimized_price, batch_profit_maximizing_price, exponential_smoothing,
+    lttb_indices, round_like_python,
+)
+from .ingestion import SalesEventBuffer, sales_event_buffer
+from .jobs import process_pricing_jobs
+from .models import DailySalesRollup, PricingJob, PricingOptimization, SalesEvent, WeeklySalesRollup
+from .sales import record_sales_events
 
-# Create your tests here.
+
+def create_products(count, with_pricing=True):
+    """
+    Creates `count` products for tests.
+    - When `with_pricing` is True, each product also gets a `PricingOptimization` entry.
+    - The products' `ProductSnapshot` rows are built as the application's bulk write paths do.
+    """
+    products = Product.objects.bulk_create([
+        Product(
+            name=f"Product {index}",
+            category="Electronics" if index % 2 else "Stationary",
+            cost_price="10.00",
+            selling_price="15.00",
+            description=f"Description {index}",
+            stock_available=100,
+            units_sold=20,
+        )
+        for index in range(count)
+    ])
+    if with_pricing:
+        PricingOptimization.objects.bulk_create([
+            PricingOptimization(product=product, demand_forecast=50, optimized_price="12.50")
+            for product in products
+        ])
+    refresh_product_snapshots([product.id for product in products])
+    return products
+
+
+class PricingOptimizationViewTests(TestCase):
+    """
+    Tests for the `PricingOptimizationView` endpoint.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            email='buyer@example.com', password='password', username='buyer', role='buyer'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('pricing-optimization')
+
+    def count_queries(self):
+        """
+        Requests the endpoint and returns the response together with the number of queries it ran.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(context.captured_queries)
+
+    def test_query_count_is_constant(self):
+        create_products(3)
+        _, small_catalog_queries = self.count_queries()
+
+        create_products(30)
+        response, large_catalog_queries = self.count_queries()
+
+        # One query for the cache validators and a single query for the rows
+        self.assertEqual(len(response.json()), 33)
+        self.assertEqual(small_catalog_queries, 2)
+        self.assertEqual(large_catalog_queries, small_catalog_queries)
+
+    def test_optimized_price_is_null_without_pricing_row(self):
+        priced = create_products(1)[0]
+        unpriced = create_products(1, with_pricing=False)[0]
+
+        response, _ = self.count_queries()
+        rows = {row['id']: row for row in response.json()}
+
+        self.assertEqual(rows[priced.id]['optimized_price'], 12.5)
+        self.assertIsNone(rows[unpriced.id]['optimized_price'])
+        self.assertEqual(
+            list(rows[unpriced.id].keys()),
+            ['id', 'name', 'category', 'description', 'cost_price', 'selling_price', 'optimized_price'],
+        )
+
+    def test_streaming_exports_match_json_rows(self):
+        create_products(3)
+        create_products(1, with_pricing=False)
+        json_rows = self.client.get(self.url).json()
+
+        response = self.client.get(self.url, {'format': 'ndjson'})
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], json_rows)
+
+        response = self.client.get(self.url, HTTP_ACCEPT='text/csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(list(rows[0].keys()), list(json_rows[0].keys()))
+        self.assertEqual([int(row['id']) for row in rows], [row['id'] for row in json_rows])
+        self.assertEqual(rows[-1]['optimized_price'], '')
+
+    @skipUnless(msgpack and pyarrow, "msgpack and pyarrow are optional dependencies")
+    def test_binary_exports_match_json_rows(self):
+        create_products(3)
+        create_products(1, with_pricing=False)
+        json_rows = self.client.get(self.url).json()
+
+        with mock.patch.object(exports, 'EXPORT_CHUNK_SIZE', 3):
+            response = self.client.get(self.url, HTTP_ACCEPT='application/msgpack')
+            self.assertEqual(response['Content-Type'], 'application/msgpack')
+            header, *rows = msgpack.Unpacker(io.BytesIO(b''.join(response.streaming_content)))
+            self.assertEqual([dict(zip(header, row)) for row in rows], json_rows)
+
+            response = self.client.get(self.url, {'format': 'arrow'})
+            table = pyarrow.ipc.open_stream(b''.join(response.streaming_content)).read_all()
+        self.assertEqual(table.schema.field('selling_price').type, pyarrow.decimal128(10, 2))
+        self.assertEqual(table.column_names, list(json_rows[0].keys()))
+        self.assertEqual(table.column('id').to_pylist(), [row['id'] for row in json_rows])
+        self.assertEqual(table.column('optimized_price').to_pylist(), [Decimal('12.50')] * 3 + [None])
+
+        # Errors are rendered in the negotiated format too
+        response = self.client.get(self.url, {'format': 'msgpack', 'min_price': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('min_price', msgpack.unpackb(response.content))
+
+
+class BatchPricingEngineTests(SimpleTestCase):
+    """
+    Tests that the vectorized pricing engine matches the scalar pricing formulas exactly.
+    """
+
+    def test_round_like_python_on_half_way_values(self):
+        values = [index / 1000 + 0.005 for index in range(20000)] + [2.675, 1.005, 0.125, 0.375]
+        self.assertEqual(list(round_like_python(values, 2)), [round(value, 2) for value in values])
+        self.assertEqual(list(round_like_python([0.5, 1.5, 2.5, -0.5], 0)), [0, 2, 2, 0])
+
+    def test_batch_formulas_match_scalar_functions(self):
+        rng = random.Random(42)
+        rows = []
+        for _ in range(5000):
+            selling_price = Decimal(rng.randint(1, 30000)) / 100
+            cost_price = (selling_price * Decimal(rng.randint(30, 100)) / 100).quantize(Decimal('0.01'))
+            rows.append((cost_price, selling_price, rng.randint(0, 5000), rng.randint(0, 5000)))
+        cost_prices, selling_prices, stock, units_sold = zip(*rows)
+
+        demand = batch_demand_forecast(units_sold, stock, selling_prices)
+        prices = batch_optimized_price(cost_prices, selling_prices, stock, demand)
+
+        expected_demand = [calculate_demand_forecast(u, s, p) for _, p, s, u in rows]
+        expected_prices = [
+            calculate_optimized_price(c, p, s, d) for (c, p, s, _), d in zip(rows, expected_demand)
+        ]
+        self.assertEqual(demand.tolist(), expected_demand)
+        self.assertEqual(prices.tolist(), expected_prices)
+
+    def test_profit_grid_matches_brute_force_search(self):
+        rng = random.Random(3)
+        rows = [
+            (rng.randint(100, 15000) / 100, rng.randint(100, 30000) / 100, rng.randint(0, 500), rng.randint(0, 500))
+            for _ in range(300)
+        ]
+        cost_prices, selling_prices, stock, units_sold = zip(*rows)
+
+        prices = batch_profit_maximizing_price(cost_prices, selling_prices, stock, units_sold, price_points=50)
+
+        for (cost, selling, stock_available, units), price in zip(rows, prices):
+            if cost >= 90:
+                # No profitable price where demand depends on price: the formula price is used instead
+                demand = calculate_demand_forecast(units, stock_available, selling)
+                self.assertEqual(price, calculate_optimized_price(cost, selling, stock_available, demand))
+                continue
+            upper = min(selling * 2, 90) if min(selling * 2, 90) > cost else 90
+            candidates = [cost + (upper - cost) * step / 49 for step in range(50)]
+            best = max(range(50), key=lambda step: (
+                (candidates[step] - cost) * (units * max(1 - candidates[step] / 100, 0.1) + stock_available / 10)
+            ))
+            self.assertAlmostEqual(price, round(candidates[best], 2), places=2)
+            self.assertGreaterEqual(price, cost)
+            self.assertLessEqual(price, 90)
+
+    def test_profit_grid_finds_an_optimum_inside_the_grid(self):
+        # Profit (price - 10) * (100 - price) peaks at 55, between the cost price and the grid ceiling (90)
+        prices = batch_profit_maximizing_price([10.0], [50.0], [0], [100])
+
+        self.assertAlmostEqual(prices[0], 55, delta=80 / 199)
+
+    def test_profit_grid_keeps_the_capped_optimum_at_the_ceiling(self):
+        # Profit (price - 10) * (30 - 0.2 * price) still rises at the top of the grid (2 x 15.00)
+        prices = batch_profit_maximizing_price([10.0, 95.0], [15.0, 120.0], [100, 10], [20, 5])
+
+        def profit(price):
+            return (price - 10) * (20 * max(1 - price / 100, 0.1) + 100 / 10)
+
+        blend = calculate_optimized_price(10.0, 15.0, 100, calculate_demand_forecast(20, 100, 15.0))
+        self.assertEqual(prices[0], 30.0)
+        self.assertGreater(profit(prices[0]), profit(blend))
+        # Costing more than the price-dependent range, the second product gets the formula price
+        self.assertEqual(
+            prices[1], calculate_optimized_price(95.0, 120.0, 10, calculate_demand_forecast(5, 10, 120.0))
+        )
+
+    def test_lttb_keeps_endpoints_and_peaks(self):
+        x = np.arange(1000, dtype=float)
+        y = np.sin(x / 50)
+        y[437] = 25
+
+        kept = lttb_indices(x, y, 60)
+
+        self.assertEqual(len(kept), 60)
+        self.assertEqual((kept[0], kept[-1]), (0, 999))
+        self.assertIn(437, kept)
+        self.assertTrue(np.all(np.diff(kept) > 0))
+
+    def test_exponential_smoothing_matches_recursive_fit(self):
+        rng = random.Random(7)
+        series = [[0] * rng.randint(0, 8) for _ in range(200)]
+        for values in series:
+            values.extend(rng.randint(0, 50) for _ in range(12 - len(values)))
+
+        expected = []
+        for values in series:
+            observed = [value for index, value in enumerate(values) if any(values[:index + 1])]
+            level = observed[0] if observed else 0.0
+            for value in observed[1:]:
+                level = 0.3 * value + 0.7 * level
+            expected.append(level)
+
+        for level, expected_level in zip(exponential_smoothing(series, 0.3), expected):
+            self.assertAlmostEqual(level, expected_level)
+
+
+class RecomputePricingCommandTests(TestCase):
+    """
+    Tests for the `recompute_pricing` management command.
+    """
+
+    def test_creates_and_updates_pricing_rows(self):
+        priced = create_products(3)
+        unpriced = create_products(2, with_pricing=False)
+
+        call_command('recompute_pricing', batch_size=2, stdout=io.StringIO())
+
+        self.assertEqual(PricingOptimization.objects.count(), 5)
+        demand = calculate_demand_forecast(20, 100, Decimal('15.00'))
+        price = calculate_optimized_price(Decimal('10.00'), Decimal('15.00'), 100, demand)
+        for product in [*priced, *unpriced]:
+            pricing = PricingOptimization.objects.get(product=product)
+            self.assertEqual(pricing.demand_forecast, demand)
+            self.assertEqual(pricing.optimized_price, Decimal(str(price)))
+
+    def test_profit_grid_strategy(self):
+        product = create_products(1)[0]
+
+        call_command('recompute_pricing', strategy='profit_grid', stdout=io.StringIO())
+
+        # Profit (price - 10) * (30 - 0.2 * price) keeps rising up to the top of the grid (2 x 15.00),
+        # so the capped price is used
+        pricing = PricingOptimization.objects.get(product=product)
+        self.assertEqual(pricing.optimized_price, Decimal('30.00'))
+        self.assertEqual(pricing.demand_forecast, calculate_demand_forecast(20, 100, Decimal('15.00')))
+
+    def test_profit_grid_rejects_the_sales_demand_source(self):
+        create_products(1)
+
+        with self.assertRaises(CommandError):
+            call_command('recompute_pricing', strategy='profit_grid', demand_source='sales', stdout=io.StringIO())
+        self.assertEqual(PricingOptimization.objects.get().optimized_price, Decimal('12.50'))
+
+
+class CatalogFilterTests(TestCase):
+    """
+    Tests for the search and filter query parameters of the catalog read endpoints.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            email='buyer@example.com', password='password', username='buyer', role='buyer'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.products = create_products(6)
+        Product.objects.filter(id=self.products[0].id).update(name='Wireless Earbuds', selling_price='59.99')
+        Product.objects.filter(id=self.products[1].id).update(description='Earbuds case', stock_available=5)
+        refresh_product_snapshots([self.products[0].id, self.products[1].id])
+
+    def fetch_ids(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        rows = data['results'] if isinstance(data, dict) else data
+        return [row['id'] for row in rows]
+
+    def test_filters_apply_to_both_endpoints(self):
+        for url in (reverse('pricing-optimization'), reverse('product-list-create')):
+            self.assertEqual(self.fetch_ids(url, search='earBUDS'), [self.products[0].id, self.products[1].id])
+            self.assertEqual(self.fetch_ids(url, search='earbuds', max_stock=10), [self.products[1].id])
+            self.assertEqual(self.fetch_ids(url, min_price='20'), [self.products[0].id])
+            self.assertEqual(
+                self.fetch_ids(url, category='Stationary'), [product.id for product in self.products[::2]]
+            )
+
+    def test_invalid_filter_returns_bad_request(self):
+        response = self.client.get(reverse('pricing-optimization'), {'min_price': 'cheap'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('min_price', response.data)
+
+
+class CatalogResponseCacheTests(TestCase):
+    """
+    Tests for the response cache and conditional GET support of the catalog read endpoints.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            email='buyer@example.com', password='password', username='buyer', role='buyer'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('pricing-optimization')
+
+    def test_etag_only_depends_on_the_database(self):
+        products = create_products(3)
+        first = self.client.get(self.url)
+
+        # Another worker (with its own, empty cache) computes the same ETag for the same data
+        cache.clear()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        # Each change replaces the cached response of the URL instead of adding another entry
+        for stock in (1, 2, 3):
+            Product.objects.filter(pk=products[0].pk).update(stock_available=stock, updated_timestamp=timezone.now())
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(len([key for key in cache._cache if ':catalog:response:' in key]), 1)
+
+    def test_unchanged_catalog_returns_not_modified(self):
+        create_products(3)
+        response = self.client.get(self.url)
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_cached_until_pricing_changes(self):
+        products = create_products(2)
+        first = self.client.get(self.url)
+
+        # Only the validator query runs; the rows come from the cache
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.content, first.content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pricing = products[0].pricing_optimization
+            pricing.optimized_price = '9.99'
+            pricing.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual(response.json()[0]['optimized_price'], 9.99)
+
+    def test_waiting_request_reuses_concurrent_rebuild(self):
+        # Simulate another request holding the rebuild lock and storing the value shortly after
+        cache.add('catalog:test:lock', 1)
+        threading.Timer(0.2, cache.set, args=('catalog:test', (None, 'rebuilt'))).start()
+        builds = []
+
+        value = get_or_build('catalog:test', lambda: builds.append(1) or 'built here')
+
+        self.assertEqual(value, 'rebuilt')
+        self.assertEqual(builds, [])
+
+    def test_rebuild_of_another_version_replaces_the_entry(self):
+        self.assertEqual(get_or_build('catalog:test', lambda: 'old', version='v1'), 'old')
+        self.assertEqual(get_or_build('catalog:test', lambda: 'unused', version='v1'), 'old')
+        self.assertEqual(get_or_build('catalog:test', lambda: 'new', version='v2'), 'new')
+
+        # The new version replaced the old entry under the same key
+        self.assertEqual(cache.get('catalog:test'), ('v2', 'new'))
+
+    def test_previous_version_is_served_during_a_rebuild(self):
+        get_or_build('catalog:test', lambda: 'old', version='v1')
+
+        # Another request holds the rebuild lock: the previous value is served without waiting
+        cache.add('catalog:test:lock', 1)
+        started = time.monotonic()
+        self.assertEqual(get_or_build('catalog:test', lambda: 'new', version='v2'), 'old')
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_waiting_request_takes_over_a_released_lock(self):
+        # Another request releases the lock without storing this version (e.g. after a failed rebuild)
+        cache.add('catalog:test:lock', 1)
+        threading.Timer(0.2, cache.delete, args=('catalog:test:lock',)).start()
+        started = time.monotonic()
+        self.assertEqual(get_or_build('catalog:test', lambda: 'new', version='v2'), 'new')
+        self.assertLess(time.monotonic() - started, 5)
+
+    def test_stale_response_keeps_its_own_etag(self):
+        products = create_products(2)
+        first = self.client.get(self.url)
+
+        # The pricing changes while another request holds the rebuild lock of this URL
+        Product.objects.filter(pk=products[0].pk).update(stock_available=1, updated_timestamp=timezone.now())
+        lock_keys = [key.split(':', 2)[2] for key in cache._cache if ':catalog:response:' in key]
+        cache.add(f'{lock_keys[0]}:lock', 1)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.content, first.content)
+        self.assertEqual(response['ETag'], first['ETag'])
+
+        cache.delete(f'{lock_keys[0]}:lock')
+        self.assertNotEqual(self.client.get(self.url)['ETag'], first['ETag'])
+
+
+class PricingJobQueueTests(TestCase):
+    """
+    Tests for the pricing job queue filled by product saves and its worker command.
+    """
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email='supplier@example.com', password='password', username='supplier', role='supplier'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_product_writes_are_merged_into_one_job(self):
+        product = {
+            'name': 'Lamp', 'category': 'Home', 'cost_price': '5.00', 'selling_price': '12.99',
+            'description': 'A lamp', 'stock_available': 10, 'units_sold': 2,
+        }
+        response = self.client.post(reverse('product-list-create'), {**product, 'optimized_price': '11.00'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        url = reverse('product-detail', args=[response.data['id']])
+        self.client.put(url, {**product, 'stock_available': 20}, format='json')
+        self.client.put(url, {**product, 'stock_available': 30}, format='json')
+
+        # The request only enqueued the work, and the three writes share a single job
+        self.assertEqual(PricingJob.objects.count(), 1)
+        self.assertFalse(PricingOptimization.objects.exists())
+
+        call_command('process_pricing_jobs', once=True, stdout=io.StringIO())
+
+        self.assertFalse(PricingJob.objects.exists())
+        pricing = PricingOptimization.objects.get(product_id=response.data['id'])
+        self.assertEqual(str(pricing.optimized_price), '11.00')
+        self.assertEqual(pricing.demand_forecast, calculate_demand_forecast(2, 30, '12.99'))
+
+    def test_only_pricing_input_changes_enqueue_a_job(self):
+        product = create_products(1)[0]
+        PricingOptimization.objects.filter(product=product).update(optimized_price='99.00')
+        product = Product.objects.get(pk=product.pk)
+
+        # A description edit keeps the manually set price
+        product.description = 'Updated description'
+        product.save()
+        self.assertFalse(PricingJob.objects.exists())
+
+        product.stock_available = 5
+        product.save()
+        self.assertEqual(PricingJob.objects.count(), 1)
+        process_pricing_jobs()
+        product.save()
+        self.assertFalse(PricingJob.objects.exists())
+        self.assertNotEqual(str(PricingOptimization.objects.get(product=product).optimized_price), '99.00')
+
+    def test_worker_processes_jobs_in_batches(self):
+        for product in create_products(5, with_pricing=False):
+            product.save()
+
+        self.assertEqual(process_pricing_jobs(batch_size=2), 2)
+        self.assertEqual(PricingJob.objects.count(), 3)
+        self.assertEqual(process_pricing_jobs(batch_size=10), 3)
+        self.assertEqual(process_pricing_jobs(batch_size=10), 0)
+        self.assertEqual(PricingOptimization.objects.count(), 5)
+
+
+class SalesHistoryTests(TestCase):
+    """
+    Tests for the sales event rollups and the sales-based demand forecast.
+    """
+
+    def sell(self, product, quantity, unit_price, sold_timestamp):
+        return SalesEvent(product=product, quantity=quantity, unit_price=unit_price, sold_timestamp=sold_timestamp)
+
+    def test_rollups_are_incremented_as_events_arrive(self):
+        product = create_products(1)[0]
+        monday = datetime(2026, 10, 12, 9, tzinfo=dt_timezone.utc)
+        record_sales_events([
+            self.sell(product, 2, '10.00', monday),
+            self.sell(product, 3, '10.00', monday + timedelta(hours=5)),
+            self.sell(product, 1, '12.00', monday + timedelta(days=2)),
+            self.sell(product, 7, '9.00', monday - timedelta(days=1)),
+        ])
+        record_sales_events([self.sell(product, 4, '10.00', monday)])
+
+        day = DailySalesRollup.objects.get(product=product, day=monday.date())
+        self.assertEqual((day.units_sold, day.revenue, day.event_count), (9, Decimal('90.00'), 3))
+        weeks = WeeklySalesRollup.objects.filter(product=product).order_by('week_start')
+        self.assertEqual(
+            [(week.week_start, week.units_sold, week.event_count) for week in weeks],
+            [(monday.date() - timedelta(days=7), 7, 1), (monday.date(), 10, 4)],
+        )
+
+    def test_recompute_pricing_uses_sales_history(self):
+        with_sales, without_sales = create_products(2)
+        now = timezone.now()
+        record_sales_events([self.sell(with_sales, 10, '15.00', now - timedelta(weeks=weeks)) for weeks in range(3)])
+
+        call_command('recompute_pricing', demand_source='sales', stdout=io.StringIO())
+
+        # A steady 10 units per week over the 4-week horizon; no sales falls back to the formula
+        self.assertEqual(PricingOptimization.objects.get(product=with_sales).demand_forecast, 40)
+        self.assertEqual(
+            PricingOptimization.objects.get(product=without_sales).demand_forecast,
+            calculate_demand_forecast(20, 100, '15.00'),
+        )
+
+
+class SalesEventIngestionTests(TestCase):
+    """
+    Tests for the buffered sales event ingestion endpoint.
+    """
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email='supplier@example.com', password='password', username='supplier', role='supplier'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('sales-events')
+
+        # Flush explicitly in these tests instead of from the timer thread
+        sales_event_buffer.drain()
+        self.max_delay, sales_event_buffer.max_delay = sales_event_buffer.max_delay, None
+
+    def tearDown(self):
+        sales_event_buffer.max_delay = self.max_delay
+        sales_event_buffer.drain()
+
+    def test_counters_change_when_the_buffer_is_flushed(self):
+        first, second = create_products(2)
+
+        response = self.client.post(self.url, [
+            {'product_id': first.id, 'quantity': 3},
+            {'product_id': first.id, 'quantity': 2, 'unit_price': '14.00'},
+            {'product_id': second.id, 'quantity': 1},
+        ], format='json')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data, {'accepted': 3, 'flushed': 0})
+        self.assertEqual(Product.objects.get(id=first.id).units_sold, 20)
+
+        self.assertEqual(sales_event_buffer.flush(), 3)
+
+        first.refresh_from_db()
+        self.assertEqual((first.units_sold, first.stock_available), (25, 95))
+        self.assertEqual(WeeklySalesRollup.objects.get(product=first).revenue, Decimal('73.00'))
+        self.assertEqual(sorted(PricingJob.objects.values_list('product_id', flat=True)), [first.id, second.id])
+
+    def test_invalid_event_rejects_the_batch(self):
+        product = create_products(1)[0]
+
+        response = self.client.post(self.url, [
+            {'product_id': product.id, 'quantity': 1},
+            {'product_id': 999999, 'quantity': 1},
+            {'product_id': product.id, 'quantity': 0},
+        ], format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertEqual(sales_event_buffer.flush(), 0)
+
+    def test_events_of_deleted_products_are_dropped(self):
+        kept, deleted = create_products(2)
+        sales_event_buffer.add([
+            SalesEvent(product_id=deleted.id, quantity=1, unit_price='15.00'),
+            SalesEvent(product_id=kept.id, quantity=2, unit_price='15.00'),
+        ])
+        deleted.delete()
+
+        with self.assertLogs('pricing.ingestion', 'WARNING'):
+            self.assertEqual(sales_event_buffer.flush(), 1)
+
+        kept.refresh_from_db()
+        self.assertEqual(kept.units_sold, 22)
+        self.assertEqual(sales_event_buffer.drain(), [])
+
+    def test_flush_locks_products_in_id_order_before_their_jobs(self):
+        products = create_products(3)
+        sales_event_buffer.add([
+            SalesEvent(product_id=product.id, quantity=1, unit_price='15.00') for product in reversed(products)
+        ])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(sales_event_buffer.flush(), 3)
+
+        statements = [query['sql'] for query in queries]
+        lock = next(index for index, sql in enumerate(statements) if 'products_product' in sql)
+        self.assertIn('ORDER BY "products_product"."id" ASC', statements[lock])
+        self.assertLess(lock, min(index for index, sql in enumerate(statements) if 'pricing_pricingjob' in sql))
+
+    def test_failed_flush_is_retried_by_the_timer(self):
+        product = create_products(1)[0]
+        buffer = SalesEventBuffer(max_events=10 ** 6, max_delay=60)
+        buffer.add([SalesEvent(product_id=product.id, quantity=1, unit_price='15.00')])
+
+        with mock.patch('pricing.ingestion.apply_sales_events', side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            buffer.flush()
+
+        self.assertIsNotNone(buffer.timer)
+        self.assertEqual(buffer.flush(), 1)
+        self.assertIsNone(buffer.timer)
+
+    def test_failed_flush_still_accepts_the_events(self):
+        product = create_products(1)[0]
+
+        with mock.patch.object(sales_event_buffer, 'max_events', 1), \
+                mock.patch('pricing.ingestion.apply_sales_events', side_effect=RuntimeError), \
+                self.assertLogs('pricing.views', 'ERROR'):
+            response = self.client.post(self.url, [{'product_id': product.id, 'quantity': 1}], format='json')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data, {'accepted': 1, 'flushed': 0})
+        self.assertEqual(sales_event_buffer.flush(), 1)
+
+    def test_concurrent_producers_lose_no_events(self):
+        product = create_products(1)[0]
+        buffer = SalesEventBuffer(max_events=10 ** 6, max_delay=None)
+
+        def produce():
+            for _ in range(500):
+                buffer.add([SalesEvent(product_id=product.id, quantity=1, unit_price='15.00')])
+
+        threads = [threading.Thread(target=produce) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(buffer.flush(), 4000)
+        product.refresh_from_db()
+        self.assertEqual((product.units_sold, product.stock_available), (4020, 0))
+
+
+class DemandCurveViewTests(TestCase):
+    """
+    Tests for the server-side demand curve endpoint.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            email='buyer@example.com', password='password', username='buyer', role='buyer'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('demand-curves')
+
+    def test_curves_are_grouped_and_downsampled(self):
+        create_products(5)
+
+        response = self.client.post(self.url, {
+            'categories': ['Electronics', 'Stationary'], 'group_by': 'category', 'points': 500, 'target_points': 50,
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['price_range'], [10.0, 30.0])
+        curves = {curve['key']: curve for curve in response.data['curves']}
+        self.assertEqual((curves['Electronics']['products'], curves['Stationary']['products']), (2, 3))
+        self.assertEqual(len(curves['Stationary']['points']), 50)
+        # At the lowest price each product's demand is 20 * (1 - 10 / 100) + 100 / 10 = 28
+        self.assertEqual(curves['Stationary']['points'][0], [10.0, 84.0])
+        self.assertEqual(curves['Stationary']['points'][-1][0], 30.0)
+
+    def test_cached_until_the_catalog_changes(self):
+        products = create_products(2)
+        request = {'ids': [product.id for product in products], 'points': 20}
+        first = self.client.post(self.url, request, format='json').data
+
+        # Only the catalog fingerprint is queried; the curves come from the cache
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.post(self.url, request, format='json').data, first)
+
+        products[0].units_sold = 40
+        products[0].save()
+        response = self.client.post(self.url, request, format='json')
+        self.assertEqual(response.data['curves'][0]['points'][0][1], 46.0)
+
+        # The new curves replace the previous entry under the same key, versioned by the catalog fingerprint
+        key = demand_curves_key({
+            'ids': request['ids'], 'categories': [], 'group_by': 'product', 'points': 20,
+            'target_points': DEMAND_CURVE_TARGET_POINTS,
+        })
+        self.assertEqual(cache.get(key), (catalog_validators()[0], response.data))
+
+    def test_grouped_curves_sum_the_product_curves(self):
+        products = create_products(4)
+        Product.objects.filter(id=products[0].id).update(units_sold=35, stock_available=7, cost_price='4.00')
+        Product.objects.filter(id=products[2].id).update(selling_price='40.00')
+        request = {'ids': [product.id for product in products], 'points': 50, 'target_points': 50}
+
+        per_product = self.client.post(self.url, request, format='json').data
+        with self.assertNumQueries(2):
+            # The catalog fingerprint, and one aggregate query for the groups
+            grouped = self.client.post(self.url, {**request, 'group_by': 'category'}, format='json').data
+
+        self.assertEqual(grouped['price_range'], per_product['price_range'])
+        stationary = [curve['points'] for curve in per_product['curves'] if curve['key'] in (products[0].id, products[2].id)]
+        curve = next(curve for curve in grouped['curves'] if curve['key'] == 'Stationary')
+        self.assertEqual(curve['products'], 2)
+        for point, *product_points in zip(curve['points'], *stationary):
+            self.assertEqual(point[0], product_points[0][0])
+            self.assertAlmostEqual(point[1], sum(demand for _, demand in product_points), delta=0.02)
+
+    def test_product_curves_are_capped(self):
+        create_products(3)
+
+        with mock.patch('pricing.curves.DEMAND_CURVE_MAX_PRODUCTS', 2):
+            response = self.client.post(self.url, {'categories': ['Electronics', 'Stationary']}, format='json')
+            grouped = self.client.post(
+                self.url, {'categories': ['Electronics', 'Stationary'], 'group_by': 'year'}, format='json'
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(grouped.status_code, 200)
+        self.assertEqual(grouped.data['curves'][0]['products'], 3)
+
+    def test_selection_is_required(self):
+        response = self.client.post(self.url, {'group_by': 'year'}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+
+
+class DemandForecastViewTests(TestCase):
+    """
+    Tests for the batched demand forecast lookup.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            email='buyer@example.com', password='password', username='buyer', role='buyer'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('demand-forecast')
+
+    def test_results_follow_request_order_with_markers(self):
+        priced = create_products(1)[0]
+        unpriced = create_products(1, with_pricing=False)[0]
+
+        response = self.client.post(self.url, {'ids': [unpriced.id, 999999, priced.id, unpriced.id]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        self.assertEqual(
+            [(result['id'], result['status']) for result in results],
+            [(unpriced.id, 'no_forecast'), (999999, 'not_found'), (priced.id, 'ok'), (unpriced.id, 'no_forecast')],
+        )
+        self.assertEqual(results[1], {'id': 999999, 'status': 'not_found'})
+        self.assertIsNone(results[0]['demand_forecast'])
+        self.assertEqual(results[2]['demand_forecast'], 50)
+        self.assertEqual(results[2]['product_name'], priced.name)
+
+    def test_query_count_only_depends_on_the_chunk_count(self):
+        ids = [product.id for product in create_products(5)]
+
+        with self.assertNumQueries(1):
+            self.client.post(self.url, {'ids': ids}, format='json')
+        with mock.patch.object(forecasts, 'DEMAND_FORECAST_CHUNK_SIZE', 2), self.assertNumQueries(4):
+            response = self.client.post(self.url, {'ids': [*ids, 999998, 999999]}, format='json')
+        self.assertEqual([result['status'] for result in response.json()], ['ok'] * 5 + ['not_found'] * 2)
+
+    def test_invalid_ids_are_rejected(self):
+        self.assertEqual(self.client.post(self.url, {'ids': ['a']}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'ids': [999999]}, format='json').status_code, 404)
+
+
+class AsyncReadPathTests(TestCase):
+    """
+    Tests that the async read views behave the same when served through the ASGI handler.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            email='buyer@example.com', password='password', username='buyer', role='buyer'
+        )
+        token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.sync_client = APIClient()
+        self.sync_client.force_authenticate(user=self.user)
+        self.async_client = AsyncClient()
+        self.products = create_products(3)
+        create_products(1, with_pricing=False)
+
+    async def test_pricing_optimization_matches_wsgi_response(self):
+        url = reverse('pricing-optimization')
+        expected = (await sync_to_async(self.sync_client.get)(url)).json()
+
+        response = await self.async_client.get(url, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), expected)
+
+        # Conditional requests are answered from the validators, as under WSGI
+        response = await self.async_client.get(url, headers={**self.headers, 'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_pricing_export_streams_asynchronously(self):
+        url = reverse('pricing-optimization')
+        expected = (await sync_to_async(self.sync_client.get)(url)).json()
+
+        response = await self.async_client.get(url, {'format': 'ndjson'}, headers=self.headers)
+        self.assertTrue(response.is_async)
+        lines = b''.join([chunk async for chunk in response.streaming_content]).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+        if pyarrow is not None:
+            response = await self.async_client.get(url, {'format': 'arrow'}, headers=self.headers)
+            body = b''.join([chunk async for chunk in response.streaming_content])
+            self.assertEqual(pyarrow.ipc.open_stream(body).read_all().column('id').to_pylist(), [row['id'] for row in expected])
+
+    async def test_demand_forecast_matches_wsgi_response(self):
+        url = reverse('demand-forecast')
+        payload = {'ids': [product.id for product in self.products]}
+        expected = (await sync_to_async(self.sync_client.post)(url, payload, format='json')).json()
+
+        response = await self.async_client.post(url, payload, content_type='application/json', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), expected)
+
+        response = await self.async_client.post(url, {'ids': [999999]}, content_type='application/json', headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_permission_checks_still_apply(self):
+        response = await self.async_client.get(reverse('pricing-optimization'))
+        self.assertEqual(response.status_code, 401)
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import DemandForecastView, PricingOptimizationView
+from .views import DemandCurveView, DemandForecastView, PricingOptimizationView, SalesEventIngestView
 
 # Define the URL patterns for the demand forecast and pricing optimization API views
 urlpatterns = [
@@ -8,8 +8,18 @@ urlpatterns = [
     # - Returns the demand forecast for each specified product.
     path('demand-forecast/', DemandForecastView.as_view(), name='demand-forecast'),
 
+    # Endpoint for demand-vs-price curves computed on the server
+    # - POST request that accepts product IDs and/or categories and the sampling options.
+    # - Returns downsampled curves, one per product or summed per category / year added.
+    path('demand-curves/', DemandCurveView.as_view(), name='demand-curves'),
+
     # Endpoint for fetching product details along with pricing optimization information
     # - GET request that retrieves the product details and their optimized price.
     # - Includes details such as product name, category, cost price, selling price, and optimized price.
     path('pricing-optimization/', PricingOptimizationView.as_view(), name='pricing-optimization'),
-]
\ No newline at end of file
+
+    # Endpoint for ingesting batches of sale events
+    # - POST request with a list of sale events, buffered in memory and written in bulk.
+    # - Updates `units_sold`/`stock_available` and schedules pricing recomputation when the buffer is flushed.
+    path('sales-events/', SalesEventIngestView.as_view(), name='sales-events'),
+]
@@ -1,119 +1,225 @@
+import logging
+from asgiref.sync import sync_to_async
 from rest_framework.permissions import IsAuthenticated
-from accounts.permissions import IsAdmin, IsSupplier, IsBuyer
+from accounts.permissions import IS_ADMIN_OR_SUPPLIER, IS_ANY_ROLE
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .models import PricingOptimization
-from products.models import Product
+from rest_framework.settings import api_settings
+from django.utils import timezone
+from rest_framework import serializers
+from products.models import Product, ProductSnapshot
+from products.batch import BATCH_MAX_ITEMS
+from products.filters import filter_products
+from products.async_views import AsyncAPIView
+from products.caching import acached_catalog_response
+from products.exports import EXPORT_CHUNK_SIZE, EXPORT_RENDERERS, is_export_request, streaming_export_response
+from .ingestion import sales_event_buffer
+from .models import SalesEvent
+from .curves import get_demand_curves
+from .forecasts import get_demand_forecasts
+from .serializers import DemandCurveRequestSerializer, DemandForecastRequestSerializer, SalesEventSerializer
+
+logger = logging.getLogger(__name__)
 
 # Demand Forecast
-class DemandForecastView(APIView):
+class DemandForecastView(AsyncAPIView):
     """
     View to handle fetching the demand forecast for multiple products.
     - Only authenticated users with appropriate permissions (Admin, Supplier, Buyer) can access.
     - The forecast is calculated based on the product's data from the PricingOptimization model.
+    - The rows are read from the denormalized `ProductSnapshot` table in bounded id chunks
+      (see `get_demand_forecasts`), so the query count does not grow with the rows found.
+    - Async view: the lookup runs in one worker thread hop.
     """
 
     # Permissions for accessing this view: User must be authenticated
     permission_classes = [IsAuthenticated]
+
+    # POST only looks products up, so it may read from a replica (see `ReplicaRoutingMiddleware`)
+    replica_read_methods = ('POST',)
     
-    def post(self, request):
+    async def post(self, request):
         """
         Handles POST requests to fetch the demand forecast for multiple products based on product IDs.
-        - Expects a list of product IDs in the request body.
-        - Returns the forecast data for each product.
+        - Expects a list of product IDs in the request body (at most `BATCH_MAX_ITEMS`).
+        - Returns one result per requested ID, in request order: the forecast data with `status`
+          `ok`, `no_forecast` for products without a demand forecast yet, or a `not_found` marker.
+        - Returns 404 if none of the products exist.
         """
         # Check if the user has the required permissions
-        if not (request.user.is_authenticated and 
-                (IsAdmin().has_permission(request, self) or 
-                 IsSupplier().has_permission(request, self) or 
-                 IsBuyer().has_permission(request, self))):
+        if not IS_ANY_ROLE.has_permission(request, self):
             return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
         
-        # Get product IDs from request data
-        product_ids = request.data.get("ids", [])
-        
         # If no product IDs are provided, return a bad request error
-        if not product_ids:
+        if not isinstance(request.data, dict) or not request.data.get("ids"):
             return Response({"error": "No product IDs provided"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Retrieve products matching the provided IDs
-        products = Product.objects.filter(id__in=product_ids)
-        
+
+        serializer = DemandForecastRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # Prepare the forecast data for each product
+        forecast_data = await sync_to_async(get_demand_forecasts)(serializer.validated_data["ids"])
+
         # If no products were found, return an error
-        if not products.exists():
+        if all(result["status"] == "not_found" for result in forecast_data):
             return Response({"error": "One or more products not found"}, status=status.HTTP_404_NOT_FOUND)
         
-        # Prepare the forecast data for each product
-        forecast_data = []
-        for product in products:
-            forecast_data.append({
-                "product_name": product.name,
-                "product_category": product.category,
-                "product_cost_price": product.cost_price,
-                "product_selling_price": product.selling_price,
-                "product_available_stock": product.stock_available,
-                "product_units_sold": product.units_sold,
-                "product_added_year": product.create_timestamp.year,
-                "demand_forecast": product.pricing_optimization.demand_forecast,
-            })
-        
         # Return the forecast data as a JSON response
         return Response(forecast_data, status=status.HTTP_200_OK)
     
 
-class PricingOptimizationView(APIView):
+class DemandCurveView(APIView):
+    """
+    View to compute demand-vs-price curves on the server for a set of products or categories.
+    - Only authenticated users with appropriate permissions (Admin, Supplier, Buyer) can access.
+    - Curves are sampled with the demand forecast formula, downsampled to a fixed number of points,
+      and cached per request fingerprint until the catalog changes.
+    """
+
+    # Permissions for accessing this view: User must be authenticated
+    permission_classes = [IsAuthenticated]
+
+    # POST only computes curves from the catalog, so it may read from a replica (see `ReplicaRoutingMiddleware`)
+    replica_read_methods = ('POST',)
+
+    def post(self, request):
+        """
+        Handles POST requests for demand curves.
+        - Expects `ids` and/or `categories`, and optionally `group_by` (`product`, `category` or
+          `year`), `points` and `target_points`.
+        - Returns the shared price range and one list of `[price, demand]` points per curve.
+        """
+        # Check if the user has the required permissions
+        if not IS_ANY_ROLE.has_permission(request, self):
+            return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = DemandCurveRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(get_demand_curves(**serializer.validated_data), status=status.HTTP_200_OK)
+
+
+class PricingOptimizationView(AsyncAPIView):
     """
     View to handle fetching the optimized pricing information for products.
     - Returns the product details along with the optimized price from the PricingOptimization model.
+    - The rows are read from the denormalized `ProductSnapshot` table, so no join is needed.
     - Only accessible by authenticated users with appropriate permissions.
+    - Async view: the catalog is read with Django's async ORM.
     """
     
     # Permissions for accessing this view: User must be authenticated
     permission_classes = [IsAuthenticated]
 
-    def get(self, request):
+    # JSON by default; NDJSON and CSV (via `Accept` or `?format=`) stream the catalog as an export
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, *EXPORT_RENDERERS]
+
+    # Columns returned for each product, in output order
+    columns = ['id', 'name', 'category', 'description', 'cost_price', 'selling_price', 'optimized_price']
+
+    async def get(self, request):
         """
         Handles GET requests to fetch product details and their optimized prices.
         - Retrieves product information along with optimized price from the PricingOptimization model.
+        - For NDJSON/CSV (and, when installed, MessagePack/Arrow) requests, streams the rows in chunks
+          instead of building one large response.
+        - The rows can be narrowed with `search`, `category`, `min_price`, `max_price`, `min_stock`
+          and `max_stock` query parameters.
+        - JSON responses are served from the catalog response cache and carry `ETag` and
+          `Last-Modified` headers, so unchanged clients get a 304.
         """
-        pricing_data = []
+        # Check if the user has the required permissions
+        if not IS_ANY_ROLE.has_permission(request, self):
+            return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+
+        # Narrow the catalog with the search and filter query parameters
+        products = filter_products(ProductSnapshot.objects.order_by('pk'), request.query_params)
+
+        # Retrieve the products and their optimized price from the snapshot table alone.
+        # Only the returned columns are read (the primary key is the product id), and
+        # `optimized_price` is null when no PricingOptimization entry exists for the product.
+        pricing_rows = products.values_list('pk', *self.columns[1:])
+
+        # Stream the rows for export formats, reading them from the database in chunks
+        if is_export_request(request):
+            # The rows are read while the response streams, after `ReplicaRoutingMiddleware` has
+            # returned; pick the database now, while the request's routing state is still set
+            pricing_rows = pricing_rows.using(pricing_rows.db)
+            rows = (dict(zip(self.columns, row)) for row in pricing_rows.iterator(chunk_size=EXPORT_CHUNK_SIZE))
+            return streaming_export_response(request, self.columns, rows, 'pricing-optimization', model=ProductSnapshot)
+
+        async def build_data():
+            return [dict(zip(self.columns, row)) async for row in pricing_rows]
+
+        # Return the pricing data from the response cache; it is only rebuilt after the catalog changes
+        return await acached_catalog_response(self, request, build_data)
+
+
+class SalesEventIngestView(APIView):
+    """
+    View to ingest batches of sale events at a high rate.
+    - The events are validated and buffered in memory; the buffer is flushed in bulk (events,
+      sales rollups, `units_sold`/`stock_available` counters and pricing jobs) once it is large
+      or old enough, not once per event or request.
+    - Only accessible by Admins and Suppliers.
+    """
 
+    # Permissions for accessing this view: User must be authenticated
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """
+        Handles POST requests with a JSON list of sale events.
+        - Each event has a `product_id` and a `quantity`, and optionally a `unit_price` and a `sold_timestamp`.
+        - Returns 202 once the events are buffered; nothing is buffered if any event is invalid.
+        """
         # Check if the user has the required permissions
-        if not (request.user.is_authenticated and 
-                (IsAdmin().has_permission(request, self) or 
-                 IsSupplier().has_permission(request, self) or 
-                 IsBuyer().has_permission(request, self))):
+        if not IS_ADMIN_OR_SUPPLIER.has_permission(request, self):
             return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
 
-        # Retrieve all products along with their pricing optimization
-        products = Product.objects.all()
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Expected a non-empty list of sale events"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > BATCH_MAX_ITEMS:
+            return Response({"error": f"At most {BATCH_MAX_ITEMS} sale events per request"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Validate every event with one reused serializer and collect the errors of the invalid ones
+        validator = SalesEventSerializer()
+        validated, errors = [], []
+        for index, item in enumerate(items):
+            try:
+                validated.append((index, validator.run_validation(item)))
+            except serializers.ValidationError as exc:
+                errors.append({"index": index, "errors": exc.detail})
+
+        # Look up every referenced product (and its default unit price) with a single query
+        selling_prices = dict(Product.objects.filter(
+            id__in={event['product_id'] for _, event in validated}
+        ).values_list('id', 'selling_price'))
+        for index, event in validated:
+            if event['product_id'] not in selling_prices:
+                errors.append({"index": index, "errors": {"product_id": ["Product not found."]}})
+        if errors:
+            return Response({"errors": sorted(errors, key=lambda error: error["index"])}, status=status.HTTP_400_BAD_REQUEST)
+
+        now = timezone.now()
+        events = [
+            SalesEvent(
+                product_id=event['product_id'],
+                quantity=event['quantity'],
+                unit_price=event.get('unit_price', selling_prices[event['product_id']]),
+                sold_timestamp=event.get('sold_timestamp', now),
+            )
+            for _, event in validated
+        ]
 
-        # Loop through each product and fetch pricing optimization data
-        for product in products:
+        # Buffer the events; the request that fills the buffer writes it out
+        flushed = 0
+        if sales_event_buffer.add(events):
             try:
-                # Fetch associated PricingOptimization data for each product
-                pricing = PricingOptimization.objects.get(product=product)
-                pricing_data.append({
-                    "id": product.id,
-                    "name": product.name,
-                    "category": product.category,
-                    "description": product.description,
-                    "cost_price": product.cost_price,
-                    "selling_price": product.selling_price,
-                    "optimized_price": pricing.optimized_price  # Include the optimized price
-                })
-            except PricingOptimization.DoesNotExist:
-                # If no PricingOptimization entry exists for this product, handle the case
-                pricing_data.append({
-                    "id": product.id,
-                    "name": product.name,
-                    "category": product.category,
-                    "description": product.description,
-                    "cost_price": product.cost_price,
-                    "selling_price": product.selling_price,
-                    "optimized_price": None  # If no optimized price is found
-                })
-
-        # Return the pricing data as a JSON response
-        return Response(pricing_data, status=status.HTTP_200_OK)
+                flushed = sales_event_buffer.flush()
+            except Exception:
+                # The events are accepted already: failing the request would make the client send them twice
+                logger.exception("Flushing buffered sale events failed; they will be retried")
+        return Response({"accepted": len(events), "flushed": flushed}, status=status.HTTP_202_ACCEPTED)
+
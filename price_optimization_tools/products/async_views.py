@@ -0,0 +1,54 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """
+    `APIView` whose handlers may be coroutines, so read endpoints can use Django's async ORM.
+    - Django treats the view as async: under an ASGI server a request waiting on the database
+      no longer ties up a worker, and under WSGI Django runs it in an event loop transparently.
+    - Coroutine handlers (e.g. an `async def get`) are awaited on the event loop; regular
+      handlers (the write methods) keep their synchronous code and run in a worker thread via
+      `sync_to_async`, exactly as they would in a sync view.
+    - Authentication, permission and throttling checks (`initial`) also run in the worker
+      thread, since authentication may load the user from the database.
+    - Responses are finalized and rendered exactly like `APIView` responses.
+    """
+
+    # Django's own check requires every handler to be async; mixed handlers are dispatched below
+    view_is_async = True
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # `csrf_exempt` (applied by `APIView.as_view`) wraps the view in a plain function; mark it again
+        return markcoroutinefunction(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        """
+        Async counterpart of `APIView.dispatch`, with the same hooks for startup, finalize and exception handling.
+        """
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            # Get the appropriate handler method
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
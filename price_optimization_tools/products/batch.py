@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+from pricing.jobs import enqueue_pricing_jobs, products_needing_pricing
+from .importers import PRICING_FIELDS, ProductImportSerializer
+from .models import Product
+from .snapshots import refresh_product_snapshots
+
+# Largest number of items accepted by a single batch request
+BATCH_MAX_ITEMS = getattr(settings, 'BATCH_MAX_ITEMS', 5000)
+
+
+def upsert_products(items):
+    """
+    Applies a list of product upserts in one transaction.
+    - The products being updated are looked up and locked (`select_for_update`) inside the
+      transaction, so a product deleted concurrently is reported as `not_found`, never counted as
+      updated and then silently skipped.
+    - Items with an `id` are partial updates of that product; items without an `id` create a product.
+    - Each item may also carry `demand_forecast` and `optimized_price`. Pricing is not computed in
+      the request: like a single product save, the batch enqueues `PricingJob`s (carrying the
+      supplied values) for the `process_pricing_jobs` worker, for new products, products whose
+      pricing inputs changed or that have no pricing row yet, and items supplying pricing values.
+    - Updates are written with `bulk_update`, creations with `bulk_create`, then the jobs are
+      enqueued and the products' `ProductSnapshot` rows refreshed with bulk statements.
+    - Returns one status dict per item, in request order.
+    """
+    results = [None] * len(items)
+    update_validator = ProductImportSerializer(partial=True)
+    create_validator = ProductImportSerializer()
+
+    with transaction.atomic():
+        # Load and lock every product that is going to be updated with a single query
+        ids = [item['id'] for item in items if isinstance(item, dict) and isinstance(item.get('id'), int)]
+        existing = Product.objects.select_for_update().in_bulk(ids)
+
+        updated, created = [], []
+        updated_fields = set()
+        seen_ids = set()
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[index] = {'index': index, 'status': 'invalid', 'errors': {'non_field_errors': ['Expected an object.']}}
+                continue
+
+            product_id = item.get('id')
+            if product_id is not None and product_id not in existing:
+                results[index] = {'index': index, 'id': product_id, 'status': 'not_found'}
+                continue
+
+            # Each product may only be updated once per batch
+            if product_id in seen_ids:
+                results[index] = {'index': index, 'id': product_id, 'status': 'invalid',
+                                  'errors': {'id': ['Duplicate id in batch.']}}
+                continue
+            if product_id is not None:
+                seen_ids.add(product_id)
+
+            data = {key: value for key, value in item.items() if key != 'id'}
+            try:
+                validated = (update_validator if product_id is not None else create_validator).run_validation(data)
+            except serializers.ValidationError as exc:
+                results[index] = {'index': index, 'id': product_id, 'status': 'invalid', 'errors': exc.detail}
+                continue
+
+            pricing = tuple(validated.pop(field, None) for field in PRICING_FIELDS)
+            if product_id is not None:
+                product = existing[product_id]
+                for field, value in validated.items():
+                    setattr(product, field, value)
+                updated_fields.update(validated)
+                updated.append((index, product, pricing))
+            else:
+                created.append((index, Product(**validated), pricing))
+
+        if updated:
+            # `auto_now` is not applied by `bulk_update`, so the timestamp is set explicitly
+            now = timezone.now()
+            for _, product, _ in updated:
+                product.updated_timestamp = now
+            Product.objects.bulk_update(
+                [product for _, product, _ in updated], [*sorted(updated_fields), 'updated_timestamp']
+            )
+        if created:
+            Product.objects.bulk_create([product for _, product, _ in created])
+
+        changed = updated + created
+        if changed:
+            needing_pricing = products_needing_pricing([product for _, product, _ in changed])
+            jobs = [
+                (product.id, pricing) for _, product, pricing in changed
+                if product.id in needing_pricing or any(value is not None for value in pricing)
+            ]
+            enqueue_pricing_jobs([product_id for product_id, _ in jobs], [pricing for _, pricing in jobs])
+            refresh_product_snapshots([product.id for _, product, _ in changed])
+
+    for index, product, _ in updated:
+        results[index] = {'index': index, 'id': product.id, 'status': 'updated'}
+    for index, product, _ in created:
+        results[index] = {'index': index, 'id': product.id, 'status': 'created'}
+    return results
+
+
+def delete_products(ids):
+    """
+    Deletes the given products and their `PricingOptimization` rows in one transaction.
+    - Returns one status dict per requested id (`deleted` or `not_found`), in request order.
+    """
+    with transaction.atomic():
+        found = set(Product.objects.filter(id__in=ids).values_list('id', flat=True))
+        # The cascade removes the linked PricingOptimization rows in the same batch
+        Product.objects.filter(id__in=found).delete()
+    return [{'id': product_id, 'status': 'deleted' if product_id in found else 'not_found'} for product_id in ids]
@@ -0,0 +1,280 @@
+import asyncio
+import hashlib
+import time
+import weakref
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Max, QuerySet, Subquery
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+from pricing.models import PricingOptimization
+from .models import CatalogRevision, Product
+
+# Lifetime of cached catalog values; entries of a superseded catalog state are replaced on their next read
+CATALOG_CACHE_TIMEOUT = getattr(settings, 'CATALOG_CACHE_TIMEOUT', 60 * 60)
+
+# Longest time a request may hold the rebuild lock of a cache key; waiting requests give up after it
+CATALOG_CACHE_LOCK_TIMEOUT = getattr(settings, 'CATALOG_CACHE_LOCK_TIMEOUT', 10)
+
+# Interval (in seconds) at which requests waiting on a rebuild poll the cache
+CATALOG_CACHE_POLL_INTERVAL = 0.05
+
+# Primary key of the single `CatalogRevision` row
+CATALOG_REVISION_ID = 1
+
+# Querysets whose deletion already bumped the catalog revision (a queryset delete sends one signal per row)
+revised_deletions = weakref.WeakSet()
+
+
+def bump_catalog_revision(origin=None):
+    """
+    Increments the catalog revision, in the current transaction.
+    - Called for every deletion of a product or pricing row (see `CatalogRevision`); the deletion
+      and the new revision are committed (or rolled back) together.
+    - Inserts and updates bump it right after their transaction commits (see
+      `products.snapshots.refresh_product_snapshots`): bumping inside a long writer, such as a
+      CSV import, would hold the single revision row locked and stall every other writer.
+    - `origin` is the queryset or instance the deletion started from: the revision is bumped once
+      per queryset delete rather than once per deleted row.
+    """
+    if isinstance(origin, QuerySet):
+        if origin in revised_deletions:
+            return
+        revised_deletions.add(origin)
+    updated = CatalogRevision.objects.filter(pk=CATALOG_REVISION_ID).update(revision=F('revision') + 1)
+    if not updated:
+        # First bump of this database: the row does not exist yet
+        revision, created = CatalogRevision.objects.get_or_create(pk=CATALOG_REVISION_ID, defaults={'revision': 1})
+        if not created:
+            CatalogRevision.objects.filter(pk=CATALOG_REVISION_ID).update(revision=F('revision') + 1)
+
+
+def get_or_build(key, build, timeout=CATALOG_CACHE_TIMEOUT, version=None):
+    """
+    Returns the cached value stored under `key`, building and storing it on a miss.
+    - `version` identifies the state the value was built from (e.g. the catalog fingerprint). It is
+      stored inside the cached entry rather than in the key: an entry of another version counts as
+      a miss, and the rebuilt value replaces it, so superseded values never pile up in the cache.
+    - Stampede protection: when many requests miss the same key at once (e.g. right after a
+      catalog change), only the request that holds the rebuild lock calls `build`.
+    - Stale-while-revalidate: while another request rebuilds the key, requests finding a value
+      of another version serve that value instead of waiting, so a catalog-wide rebuild never
+      ties up the waiting workers. Values that must not be served stale unnoticed (such as
+      responses carrying an `ETag`) keep their own validators inside the value.
+    - Only requests finding no value at all wait: they poll the cache until the value appears,
+      take the lock over once it is released without their version being stored, and only
+      build without it if the lock is still held after `CATALOG_CACHE_LOCK_TIMEOUT`.
+    - The lock is taken with `cache.add`, which is atomic on every Django cache backend
+      (including the local-memory one).
+    """
+    entry = cache.get(key)
+    value = cached_entry(entry, version)
+    if value is not None:
+        return value
+
+    lock_key = f'{key}:lock'
+    deadline = time.monotonic() + CATALOG_CACHE_LOCK_TIMEOUT
+    while not cache.add(lock_key, 1, timeout=CATALOG_CACHE_LOCK_TIMEOUT):
+        # Another request is rebuilding this value; serve the previous one meanwhile, if any
+        if entry is not None:
+            return entry[1]
+        if time.monotonic() >= deadline:
+            return build()
+        time.sleep(CATALOG_CACHE_POLL_INTERVAL)
+        entry = cache.get(key)
+        value = cached_entry(entry, version)
+        if value is not None:
+            return value
+
+    try:
+        value = build()
+        cache.set(key, (version, value), timeout)
+    finally:
+        cache.delete(lock_key)
+    return value
+
+
+def cached_entry(entry, version):
+    """
+    Returns the value of a cache entry stored by `get_or_build`, or None if it is missing or of another version.
+    """
+    if entry is None or entry[0] != version:
+        return None
+    return entry[1]
+
+
+async def aget_or_build(key, build, timeout=CATALOG_CACHE_TIMEOUT, version=None):
+    """
+    Async version of `get_or_build`; `build` is a coroutine function.
+    - Requests waiting on another request's rebuild (only those finding no previous value) sleep
+      on the event loop instead of holding a worker thread.
+    - Django's cache backends implement their async methods by running the sync ones in a worker
+      thread, so the lookup/lock and store/unlock steps are grouped into one thread hop each.
+    """
+    lock_key = f'{key}:lock'
+
+    def lookup_or_lock():
+        entry = cache.get(key)
+        value = cached_entry(entry, version)
+        if value is not None:
+            return value, False
+        locked = cache.add(lock_key, 1, timeout=CATALOG_CACHE_LOCK_TIMEOUT)
+        # Another request is rebuilding this value; serve the previous one meanwhile, if any
+        return (entry[1] if entry is not None and not locked else None), locked
+
+    def store_and_unlock(value):
+        cache.set(key, (version, value), timeout)
+        cache.delete(lock_key)
+
+    deadline = time.monotonic() + CATALOG_CACHE_LOCK_TIMEOUT
+    value, locked = await sync_to_async(lookup_or_lock)()
+    while value is None and not locked:
+        # Another request is rebuilding this value; wait for it instead of repeating the work
+        if time.monotonic() >= deadline:
+            return await build()
+        await asyncio.sleep(CATALOG_CACHE_POLL_INTERVAL)
+        value, locked = await sync_to_async(lookup_or_lock)()
+    if value is not None:
+        return value
+
+    try:
+        value = await build()
+    except BaseException:
+        await cache.adelete(lock_key)
+        raise
+    await sync_to_async(store_and_unlock)(value)
+    return value
+
+
+def cached_catalog_value(name, compute, timeout=CATALOG_CACHE_TIMEOUT):
+    """
+    Returns a catalog-derived value from the cache, computing and storing it on a miss.
+    - `name` identifies the value; it is cached together with the catalog fingerprint (see
+      `catalog_validators`) and recomputed as soon as a product or pricing row changes, whichever
+      process made the change.
+    """
+    fingerprint, _ = catalog_validators()
+    return get_or_build(f'catalog:{name}', compute, timeout, version=fingerprint)
+
+
+def latest_update(model):
+    """
+    Returns a subquery selecting the latest `updated_timestamp` of `model`, read from its index.
+    """
+    return Subquery(model.objects.order_by('-updated_timestamp').values('updated_timestamp')[:1])
+
+
+def catalog_validators():
+    """
+    Returns `(fingerprint, last_modified)` describing the current state of the catalog, read from the database alone.
+    - `last_modified` is the latest `updated_timestamp` of any product or pricing row.
+    - The fingerprint is based on the `CatalogRevision` counter, which every catalog write
+      increments, so it is the same in every process serving the same data. Timestamps are set
+      when a row is saved, not when its transaction commits: a write stamped before the latest
+      timestamp but committed after it leaves `last_modified` alone, yet moves the revision.
+      The latest timestamps are also part of the fingerprint, for writes made outside the
+      application's write paths.
+    - All three values are read with one query: the revision row by primary key, and the latest
+      timestamps from the `updated_timestamp` indexes; no table is scanned.
+    """
+    state = CatalogRevision.objects.filter(pk=CATALOG_REVISION_ID).values_list(
+        'revision', latest_update(Product), latest_update(PricingOptimization)
+    ).first()
+    if state is None:
+        # The revision row is created by the `0006_catalogrevision` migration; without it no write bumped it yet
+        state = (
+            0,
+            Product.objects.aggregate(last_modified=Max('updated_timestamp'))['last_modified'],
+            PricingOptimization.objects.aggregate(last_modified=Max('updated_timestamp'))['last_modified'],
+        )
+    revision, products_modified, pricing_modified = state
+    fingerprint = f"r{revision}:{products_modified}:{pricing_modified}"
+    return fingerprint, max((value for value in (products_modified, pricing_modified) if value), default=None)
+
+
+def cached_catalog_response(view, request, build_data):
+    """
+    Returns a catalog read response served from the response cache, with conditional GET support.
+    - The `ETag` is derived from the catalog fingerprint, the request URL and the negotiated
+      media type; `Last-Modified` is the latest `updated_timestamp` of the catalog.
+    - Clients sending a matching `If-None-Match` (or a recent enough `If-Modified-Since`) get a
+      304 response without the payload being built.
+    - On a cache miss, `build_data` is called once (also across concurrent identical requests,
+      see `get_or_build`) and the rendered JSON bytes are cached, so later requests skip both
+      the queries and the encoding. Each URL and media type has one cache entry, holding the
+      response of the latest catalog state, which a newer response replaces.
+    - The cached bytes are stored with the `ETag` and `Last-Modified` values they were rendered
+      for: a previous response served while another request rebuilds it keeps its own
+      validators, so clients never store it under the new `ETag`.
+    - Only JSON responses are cached; other renderers (e.g. the browsable API) get a regular response.
+    """
+    if request.accepted_renderer.format != 'json':
+        return Response(build_data())
+
+    validators = catalog_response_validators(request, *catalog_validators())
+    if validators['not_modified'] is not None:
+        return validators['not_modified']
+
+    def render():
+        return validators['etag'], validators['last_modified'], render_catalog_data(view, request, build_data())
+
+    return catalog_response(request, get_or_build(validators['key'], render, version=validators['etag']))
+
+
+async def acached_catalog_response(view, request, build_data):
+    """
+    Async version of `cached_catalog_response`; `build_data` is a coroutine function.
+    - The validator queries run together in one worker thread hop (rather than one hop per
+      async ORM call), so a cached response costs a single hop for them.
+    """
+    if request.accepted_renderer.format != 'json':
+        return Response(await build_data())
+
+    validators = catalog_response_validators(request, *(await sync_to_async(catalog_validators)()))
+    if validators['not_modified'] is not None:
+        return validators['not_modified']
+
+    async def render():
+        return validators['etag'], validators['last_modified'], render_catalog_data(view, request, await build_data())
+
+    return catalog_response(request, await aget_or_build(validators['key'], render, version=validators['etag']))
+
+
+def catalog_response_validators(request, fingerprint, last_modified):
+    """
+    Computes the cache key, `ETag` and `Last-Modified` value of a catalog response.
+    - The key only depends on the request URL and the negotiated media type; the `ETag` also
+      depends on the catalog fingerprint and is stored as the version of the cached response.
+    - `not_modified` holds the 304 response when the client's copy is still current, else None.
+    """
+    request_digest = hashlib.md5(f'{request.build_absolute_uri()}|{request.accepted_media_type}'.encode()).hexdigest()
+    etag = f'"{hashlib.md5(f"{fingerprint}|{request_digest}".encode()).hexdigest()}"'
+    last_modified = int(last_modified.timestamp()) if last_modified else None
+    return {
+        'key': f'catalog:response:{request_digest}',
+        'etag': etag,
+        'last_modified': last_modified,
+        'not_modified': get_conditional_response(request, etag=etag, last_modified=last_modified),
+    }
+
+
+def render_catalog_data(view, request, data):
+    """
+    Renders catalog response data with the negotiated renderer.
+    """
+    return request.accepted_renderer.render(data, request.accepted_media_type, view.get_renderer_context())
+
+
+def catalog_response(request, cached):
+    """
+    Wraps a cached `(etag, last_modified, content)` catalog response in a response carrying the `ETag` and `Last-Modified` headers.
+    """
+    etag, last_modified, content = cached
+    response = HttpResponse(content, content_type=request.accepted_media_type)
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
@@ -0,0 +1,316 @@
+import csv
+import datetime
+import io
+from decimal import Decimal
+from itertools import islice
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Optional dependencies: the MessagePack and Arrow formats are only offered when they are installed
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# Number of rows fetched from the database per round trip while streaming an export
+EXPORT_CHUNK_SIZE = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+# Encoder producing the same compact, unicode output as DRF's default JSON renderer
+json_encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+class Echo:
+    """
+    Pseudo-buffer for `csv.writer` that returns each written line instead of storing it.
+    """
+
+    def write(self, value):
+        return value
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Renderer for newline-delimited JSON (one JSON object per line).
+    - Selected with `Accept: application/x-ndjson` or `?format=ndjson`.
+    - Catalog exports are streamed by `streaming_export_response`; this renderer handles
+      regular (non-streamed) responses such as error messages.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(json_encoder.encode(row) + '\n' for row in rows).encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Renderer for comma-separated values with a header row.
+    - Selected with `Accept: text/csv` or `?format=csv`.
+    - Catalog exports are streamed by `streaming_export_response`; this renderer handles
+      regular (non-streamed) responses such as error messages.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        columns = list(rows[0].keys()) if rows else []
+        return ''.join(iter_csv(columns, rows)).encode(self.charset)
+
+
+def msgpack_default(value):
+    """
+    Converts the values MessagePack cannot pack natively (datetimes are packed as timestamps).
+    - Decimals become floats, as in the JSON output; dates and times become ISO 8601 strings.
+    """
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not MessagePack serializable")
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renderer for MessagePack: a stream of binary objects, read with `msgpack.Unpacker`.
+    - Selected with `Accept: application/msgpack` or `?format=msgpack`; requires the `msgpack` package.
+    - Exports are a header (the list of column names) followed by one array per row, so the keys
+      are not repeated on every row as in JSON.
+    - Values keep their types: numbers stay numbers (decimals become floats) and timestamps use
+      the MessagePack timestamp extension, so nothing has to be parsed from strings.
+    - Catalog exports are streamed by `streaming_export_response` (via `stream`); `render`
+      handles regular responses such as error messages.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    # Rows are exported with their database values rather than their serialized (string) form
+    native_rows = True
+
+    # `stream` already yields one chunk per `EXPORT_CHUNK_SIZE` rows
+    stream_batch_size = 1
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=msgpack_default, datetime=True)
+
+    def stream(self, columns, rows, model=None):
+        """
+        Yields the packed column header, then the packed rows, `EXPORT_CHUNK_SIZE` rows per chunk.
+        """
+        packer = msgpack.Packer(default=msgpack_default, datetime=True)
+        yield packer.pack(list(columns))
+        rows = iter(rows)
+        while chunk := list(islice(rows, EXPORT_CHUNK_SIZE)):
+            yield b''.join(packer.pack([row.get(column) for column in columns]) for row in chunk)
+
+
+class ChunkSink(io.RawIOBase):
+    """
+    Write-only file collecting what an Arrow IPC writer writes, so it can be streamed chunk by chunk.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def take(self):
+        """
+        Returns and forgets everything written since the last call.
+        """
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def arrow_schema(model, columns):
+    """
+    Returns the Arrow schema of export `columns` read from `model` (`id` is the primary key).
+    - Decimal fields keep their exact precision (`decimal128`), timestamps are UTC microseconds.
+    """
+    types = {
+        'AutoField': pyarrow.int64(), 'BigAutoField': pyarrow.int64(), 'IntegerField': pyarrow.int64(),
+        'BigIntegerField': pyarrow.int64(), 'PositiveIntegerField': pyarrow.int64(),
+        'FloatField': pyarrow.float64(), 'CharField': pyarrow.string(), 'TextField': pyarrow.string(),
+        'BooleanField': pyarrow.bool_(), 'DateTimeField': pyarrow.timestamp('us', tz='UTC'),
+        'DateField': pyarrow.date32(),
+    }
+    fields = []
+    for column in columns:
+        field = model._meta.pk if column == 'id' else model._meta.get_field(column)
+        if field.is_relation:
+            field = field.target_field
+        if field.get_internal_type() == 'DecimalField':
+            arrow_type = pyarrow.decimal128(field.max_digits, field.decimal_places)
+        else:
+            arrow_type = types[field.get_internal_type()]
+        fields.append(pyarrow.field(column, arrow_type, nullable=field.null))
+    return pyarrow.schema(fields)
+
+
+class ArrowRenderer(BaseRenderer):
+    """
+    Renderer for the Apache Arrow IPC streaming format (read it with `pyarrow.ipc.open_stream`).
+    - Selected with `Accept: application/vnd.apache.arrow.stream` or `?format=arrow`; requires the
+      `pyarrow` package.
+    - Columnar: each record batch stores every column as one typed array (exact decimals, UTC
+      timestamps), so consumers load the export straight into Arrow, pandas or Polars without
+      parsing; the buffers are zstd-compressed when pyarrow supports it, which also folds the
+      repeated descriptions and categories.
+    - Catalog exports are streamed by `streaming_export_response` (via `stream`), one record
+      batch per `EXPORT_CHUNK_SIZE` rows, with the schema taken from the model fields;
+      `render` handles regular responses such as error messages, inferring the schema.
+    """
+    media_type = 'application/vnd.apache.arrow.stream'
+    format = 'arrow'
+    charset = None
+    render_style = 'binary'
+
+    # Rows are exported with their database values rather than their serialized (string) form
+    native_rows = True
+
+    # `stream` already yields one chunk per record batch
+    stream_batch_size = 1
+
+    @staticmethod
+    def write_options():
+        return pyarrow.ipc.IpcWriteOptions(
+            compression='zstd' if pyarrow.Codec.is_available('zstd') else None
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        table = pyarrow.Table.from_pylist(data if isinstance(data, list) else [data])
+        sink = pyarrow.BufferOutputStream()
+        with pyarrow.ipc.new_stream(sink, table.schema, options=self.write_options()) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    def stream(self, columns, rows, model=None):
+        """
+        Yields the IPC stream: the schema and one record batch per `EXPORT_CHUNK_SIZE` rows.
+        """
+        schema = arrow_schema(model, columns)
+        sink = ChunkSink()
+        writer = pyarrow.ipc.new_stream(pyarrow.PythonFile(sink, mode='w'), schema, options=self.write_options())
+        rows = iter(rows)
+        while chunk := list(islice(rows, EXPORT_CHUNK_SIZE)):
+            writer.write_batch(pyarrow.RecordBatch.from_pylist(chunk, schema=schema))
+            yield sink.take()
+        # Closing writes the end-of-stream marker (and the schema, if the export is empty)
+        writer.close()
+        yield sink.take()
+
+
+# Renderers that switch the catalog endpoints to a streamed export
+EXPORT_RENDERERS = [
+    NDJSONRenderer,
+    CSVRenderer,
+    *([MessagePackRenderer] if msgpack is not None else []),
+    *([ArrowRenderer] if pyarrow is not None else []),
+]
+
+
+def is_export_request(request):
+    """
+    Returns True if content negotiation selected one of the streamed export formats.
+    """
+    return getattr(request, 'accepted_renderer', None) is not None and \
+        request.accepted_renderer.format in {renderer.format for renderer in EXPORT_RENDERERS}
+
+
+def csv_value(value):
+    """
+    Formats a single value for CSV output (`None` becomes an empty cell).
+    """
+    return '' if value is None else value
+
+
+def iter_csv(columns, rows):
+    """
+    Yields CSV lines: first the header row, then one line per row dictionary.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([csv_value(row.get(column)) for column in columns])
+
+
+def iter_ndjson(rows):
+    """
+    Yields one compact JSON document per row, encoded exactly like the JSON responses.
+    """
+    for row in rows:
+        yield json_encoder.encode(row) + '\n'
+
+
+async def iterate_in_thread(lines, batch_size=EXPORT_CHUNK_SIZE):
+    """
+    Adapts a synchronous iterator of export lines into an async iterator for ASGI servers.
+    - Lines are pulled `batch_size` at a time in the request's worker thread (where the database
+      cursor lives) and sent as one chunk, so the export keeps streaming instead of being
+      collected into memory by Django first. Binary formats already yield whole chunks, and are
+      pulled with a `batch_size` of 1.
+    """
+    lines = iter(lines)
+    next_chunk = sync_to_async(lambda: list(islice(lines, batch_size)))
+    while chunk := await next_chunk():
+        # Text formats yield str lines, binary formats bytes chunks
+        yield chunk[0][:0].join(chunk)
+
+
+def streaming_export_response(request, columns, rows, filename, model=None):
+    """
+    Builds a streaming response for a catalog export in the negotiated format.
+    - `columns` is the ordered list of output columns (used for the CSV header).
+    - `rows` is a lazy iterable of row dictionaries, typically read from the database in
+      chunks of `EXPORT_CHUNK_SIZE`, so memory stays flat regardless of the catalog size.
+    - `model` is the model the rows are read from; binary formats (MessagePack, Arrow) take the
+      column types from its fields, and expect rows holding database values (see `native_rows`).
+    - Under an ASGI server the lines are streamed through `iterate_in_thread`.
+    """
+    renderer = request.accepted_renderer
+    if renderer.format == 'csv':
+        content = iter_csv(columns, rows)
+    elif renderer.format == 'ndjson':
+        content = iter_ndjson(rows)
+    else:
+        content = renderer.stream(columns, rows, model)
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        content = iterate_in_thread(content, getattr(renderer, 'stream_batch_size', EXPORT_CHUNK_SIZE))
+
+    content_type = f'{renderer.media_type}; charset={renderer.charset}' if renderer.charset else renderer.media_type
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{renderer.format}"'
+    return response
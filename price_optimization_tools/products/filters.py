@@ -0,0 +1,46 @@
+from django.db.models import Q
+from rest_framework import serializers
+
+
+class ProductFilterSerializer(serializers.Serializer):
+    """
+    Validates the search and filter query parameters accepted by the catalog read endpoints.
+    - `search`: case-insensitive text search in the product name and description.
+    - `category`: exact category match.
+    - `min_price` / `max_price`: inclusive range on the selling price.
+    - `min_stock` / `max_stock`: inclusive range on the available stock.
+    """
+    search = serializers.CharField(required=False, allow_blank=True, max_length=255)
+    category = serializers.CharField(required=False, max_length=255)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    min_stock = serializers.IntegerField(min_value=0, required=False)
+    max_stock = serializers.IntegerField(min_value=0, required=False)
+
+
+def filter_products(queryset, query_params):
+    """
+    Applies the search and filter query parameters to a `Product` queryset.
+    - Text search uses `icontains`, which is served by the trigram GIN indexes on PostgreSQL and
+      falls back to a plain `LIKE` scan on SQLite; the other filters use B-tree indexes.
+    - Raises `ValidationError` (returned by DRF as a 400 response) for malformed parameters.
+    """
+    serializer = ProductFilterSerializer(data=query_params)
+    serializer.is_valid(raise_exception=True)
+    filters = serializer.validated_data
+
+    if filters.get('search'):
+        queryset = queryset.filter(
+            Q(name__icontains=filters['search']) | Q(description__icontains=filters['search'])
+        )
+    if 'category' in filters:
+        queryset = queryset.filter(category=filters['category'])
+    if 'min_price' in filters:
+        queryset = queryset.filter(selling_price__gte=filters['min_price'])
+    if 'max_price' in filters:
+        queryset = queryset.filter(selling_price__lte=filters['max_price'])
+    if 'min_stock' in filters:
+        queryset = queryset.filter(stock_available__gte=filters['min_stock'])
+    if 'max_stock' in filters:
+        queryset = queryset.filter(stock_available__lte=filters['max_stock'])
+    return queryset
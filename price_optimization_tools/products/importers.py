@@ -0,0 +1,119 @@
+import csv
+from itertools import islice
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+from pricing.engine import build_pricing_rows
+from pricing.models import PricingOptimization
+from .snapshots import refresh_product_snapshots
+from .models import Product
+from .serializers import ProductSerializer
+
+# Number of CSV rows validated and inserted per batch
+IMPORT_BATCH_SIZE = getattr(settings, 'IMPORT_BATCH_SIZE', 2000)
+
+# Pricing fields that may accompany a product write; they are stored on `PricingOptimization`
+PRICING_FIELDS = ('demand_forecast', 'optimized_price')
+
+
+class ProductImportSerializer(ProductSerializer):
+    """
+    Serializer for one row of a product CSV import (the `product_data.csv` format).
+    - Validates the `Product` fields exactly like `ProductSerializer`.
+    - Also accepts the optional `demand_forecast` and `optimized_price` pricing columns.
+    """
+    demand_forecast = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+    optimized_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, allow_null=True)
+
+
+def validate_pricing_values(data):
+    """
+    Validates the optional pricing values sent with a single product write.
+    - Uses the `ProductImportSerializer` fields, so the values are checked exactly like in a CSV
+      import or a batch upsert.
+    - Returns `(values, errors)`: the validated `(demand_forecast, optimized_price)` pair, with
+      None for missing values, and a dict of field errors (empty when both are valid).
+    """
+    fields = ProductImportSerializer().fields
+    values, errors = [], {}
+    for name in PRICING_FIELDS:
+        try:
+            values.append(fields[name].run_validation(data.get(name)))
+        except serializers.ValidationError as exc:
+            values.append(None)
+            errors[name] = exc.detail
+    return tuple(values), errors
+
+
+def read_csv_rows(text_stream):
+    """
+    Yields `(line_number, row)` pairs from a CSV text stream with a header row.
+    - Empty cells are converted to `None` so optional columns validate as missing values.
+    - The supplier's own `product_id` column is ignored; imported products get new ids.
+    """
+    reader = csv.DictReader(text_stream)
+    for row in reader:
+        row.pop('product_id', None)
+        yield reader.line_num, {key: (value if value != '' else None) for key, value in row.items() if key}
+
+
+def import_product_rows(rows, batch_size=IMPORT_BATCH_SIZE, partial=False):
+    """
+    Imports products and their pricing rows from `(line_number, row)` pairs.
+    - Rows are validated in batches with `ProductImportSerializer`.
+    - Valid rows are written with batched inserts into `Product` and `PricingOptimization`,
+      all inside a single transaction. Missing pricing values are computed with the batch
+      pricing engine.
+    - If any row is invalid, the whole import is rolled back unless `partial` is True,
+      in which case the valid rows are kept.
+    - Returns a dict with the number of `created` products and the per-row `errors`.
+    """
+    created = 0
+    errors = []
+    rows = iter(rows)
+
+    with transaction.atomic():
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+
+            # Validate the batch with one reused serializer and collect the errors of each invalid row
+            validator = ProductImportSerializer()
+            valid_rows = []
+            for line_number, row in batch:
+                try:
+                    valid_rows.append(validator.run_validation(row))
+                except serializers.ValidationError as exc:
+                    errors.append({'row': line_number, 'errors': exc.detail})
+
+            # Once an all-or-nothing import has failed, keep validating only to report every error
+            if partial or not errors:
+                created += create_products_with_pricing(valid_rows)
+
+        # Discard everything written so far if the import must be all-or-nothing
+        if errors and not partial:
+            transaction.set_rollback(True)
+            created = 0
+
+    return {'created': created, 'errors': errors}
+
+
+def create_products_with_pricing(validated_rows):
+    """
+    Inserts validated rows into `Product` and `PricingOptimization` with two batched inserts.
+    - The new products' `ProductSnapshot` rows are written with one more batched insert.
+    - Returns the number of products created.
+    """
+    if not validated_rows:
+        return 0
+
+    pricing_values = [
+        (row.pop('demand_forecast', None), row.pop('optimized_price', None)) for row in validated_rows
+    ]
+    products = Product.objects.bulk_create([Product(**row) for row in validated_rows])
+
+    # Compute the pricing for the whole batch in one vectorized pass; CSV values take precedence
+    PricingOptimization.objects.bulk_create(build_pricing_rows(products, pricing_values))
+    refresh_product_snapshots([product.id for product in products])
+    return len(products)
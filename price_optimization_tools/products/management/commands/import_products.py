@@ -0,0 +1,42 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from products.importers import IMPORT_BATCH_SIZE, import_product_rows, read_csv_rows
+
+
+class Command(BaseCommand):
+    """
+    Management command to bulk import products and their pricing rows from a CSV file.
+    - Accepts the `product_data.csv` format (see `Case Study Requirements/`).
+    - Usage: `python manage.py import_products path/to/products.csv [--batch-size N] [--partial]`
+    """
+    help = "Bulk import products (with pricing rows) from a CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help="Path to the CSV file to import.")
+        parser.add_argument(
+            '--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+            help=f"Number of rows validated and inserted per batch (default: {IMPORT_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            '--partial', action='store_true',
+            help="Import the valid rows even if some rows are invalid (default: all or nothing).",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            with open(options['csv_path'], newline='', encoding='utf-8-sig') as csv_file:
+                result = import_product_rows(
+                    read_csv_rows(csv_file), batch_size=options['batch_size'], partial=options['partial']
+                )
+        except OSError as exc:
+            raise CommandError(f"Unable to read {options['csv_path']}: {exc}")
+
+        # Report the errors of each invalid row
+        for error in result['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+
+        elapsed = time.perf_counter() - started
+        if result['errors'] and not options['partial']:
+            raise CommandError(f"Import aborted: {len(result['errors'])} invalid rows, no products were created.")
+        self.stdout.write(self.style.SUCCESS(f"Imported {result['created']} products in {elapsed:.2f}s."))
@@ -0,0 +1,25 @@
+import time
+from django.core.management.base import BaseCommand
+from products.snapshots import SNAPSHOT_BATCH_SIZE, rebuild_product_snapshots
+
+
+class Command(BaseCommand):
+    """
+    Management command to rebuild the denormalized `ProductSnapshot` table from `Product` and `PricingOptimization`.
+    - Not needed in normal operation (every write refreshes the affected rows); use it to repair
+      the table after writes that bypassed the application, e.g. manual SQL.
+    - Usage: `python manage.py rebuild_product_snapshots [--batch-size N]`
+    """
+    help = "Rebuild the product snapshot rows served by the catalog read endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=SNAPSHOT_BATCH_SIZE,
+            help=f"Number of products rebuilt per batch (default: {SNAPSHOT_BATCH_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = rebuild_product_snapshots(options['batch_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} product snapshots in {elapsed:.2f}s."))
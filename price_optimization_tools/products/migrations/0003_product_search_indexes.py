@@ -0,0 +1,64 @@
+# Generated by Django 4.2.16 on 2026-10-18 13:20
+
+from django.db import migrations, models
+
+# Trigram GIN indexes on the exact expressions Django generates for `icontains` on PostgreSQL
+# (`UPPER(column::text) LIKE UPPER(...)`), so name/description search can use an index scan
+TRIGRAM_INDEXES = {
+    'product_name_trgm_idx': 'name',
+    'product_description_trgm_idx': 'description',
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """
+    Creates the `pg_trgm` extension and the trigram search indexes on PostgreSQL.
+    - Other databases (e.g. SQLite in tests) fall back to a plain `LIKE` scan, so nothing is created.
+    - Servers without the `pg_trgm` contrib extension also fall back to a plain scan.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    # Skip the indexes (search still works, without an index) if the server lacks the contrib extension
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for index_name, column in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index_name} ON products_product '
+            f'USING gin ((UPPER({column}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    """
+    Drops the trigram search indexes on PostgreSQL (the extension is left in place).
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index_name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index_name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_customer_rating'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category'], name='product_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['selling_price'], name='product_selling_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['stock_available'], name='product_stock_available_idx'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
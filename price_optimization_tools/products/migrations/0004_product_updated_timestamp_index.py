@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-18 13:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['updated_timestamp'], name='product_updated_timestamp_idx'),
+        ),
+    ]
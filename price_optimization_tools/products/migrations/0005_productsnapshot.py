@@ -0,0 +1,102 @@
+# Generated by Django 4.2.16 on 2026-10-18 14:00
+
+from django.db import migrations, models
+from django.db.models import F
+import django.db.models.deletion
+
+# Trigram GIN indexes for `icontains` search on the snapshot (see `0003_product_search_indexes`)
+TRIGRAM_INDEXES = {
+    'snapshot_name_trgm_idx': 'name',
+    'snapshot_description_trgm_idx': 'description',
+}
+
+# Fields copied from `Product` and from `PricingOptimization`
+PRODUCT_FIELDS = (
+    'name', 'category', 'cost_price', 'selling_price', 'description', 'stock_available',
+    'units_sold', 'create_timestamp', 'updated_timestamp', 'customer_rating',
+)
+PRICING_FIELDS = ('demand_forecast', 'optimized_price')
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """
+    Creates the trigram search indexes on PostgreSQL servers that have the `pg_trgm` extension.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for index_name, column in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index_name} ON products_productsnapshot '
+            f'USING gin ((UPPER({column}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    """
+    Drops the trigram search indexes on PostgreSQL.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index_name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index_name}')
+
+
+def backfill_snapshots(apps, schema_editor):
+    """
+    Fills the snapshot table from the existing products and pricing rows, in keyset-ordered batches.
+    """
+    Product = apps.get_model('products', 'Product')
+    ProductSnapshot = apps.get_model('products', 'ProductSnapshot')
+    database = schema_editor.connection.alias
+    last_id = 0
+    while True:
+        rows = list(
+            Product.objects.using(database).filter(id__gt=last_id).order_by('id')[:1000].values(
+                'id', *PRODUCT_FIELDS, **{field: F(f'pricing_optimization__{field}') for field in PRICING_FIELDS}
+            )
+        )
+        if not rows:
+            break
+        last_id = rows[-1]['id']
+        ProductSnapshot.objects.using(database).bulk_create(
+            [ProductSnapshot(product_id=row.pop('id'), **row) for row in rows]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_product_updated_timestamp_index'),
+        ('pricing', '0005_sales_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSnapshot',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot', serialize=False, to='products.product')),
+                ('name', models.CharField(max_length=255)),
+                ('category', models.CharField(max_length=255)),
+                ('cost_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('selling_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('description', models.TextField()),
+                ('stock_available', models.PositiveIntegerField()),
+                ('units_sold', models.PositiveIntegerField(default=0)),
+                ('create_timestamp', models.DateTimeField()),
+                ('updated_timestamp', models.DateTimeField()),
+                ('customer_rating', models.FloatField(blank=True, null=True)),
+                ('demand_forecast', models.PositiveIntegerField(blank=True, null=True)),
+                ('optimized_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['category'], name='snapshot_category_idx'), models.Index(fields=['selling_price'], name='snapshot_selling_price_idx'), models.Index(fields=['stock_available'], name='snapshot_stock_available_idx')],
+            },
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+        migrations.RunPython(backfill_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.16 on 2026-10-18 14:27
+
+from django.db import migrations, models
+
+
+def create_revision_row(apps, schema_editor):
+    """
+    Creates the single catalog revision row read by `products.caching.catalog_validators`.
+    """
+    CatalogRevision = apps.get_model('products', 'CatalogRevision')
+    CatalogRevision.objects.using(schema_editor.connection.alias).get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_productsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('revision', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_revision_row, migrations.RunPython.noop),
+    ]
@@ -37,9 +37,104 @@ class Product(models.Model):
     # Customer rating for the product (optional field, supports null values)
     customer_rating = models.FloatField(null=True, blank=True)
 
+    class Meta:
+        """
+        Meta options for the Product model.
+        - `indexes`: B-tree indexes backing the catalog filters (exact category match, selling price
+          and stock ranges). The trigram indexes used by text search are PostgreSQL-only and are
+          created in the `0003_product_search_indexes` migration. `updated_timestamp` is indexed so the
+          latest change (used for `Last-Modified`/`ETag` on catalog reads) is found without a table scan.
+        """
+        indexes = [
+            models.Index(fields=['category'], name='product_category_idx'),
+            models.Index(fields=['selling_price'], name='product_selling_price_idx'),
+            models.Index(fields=['stock_available'], name='product_stock_available_idx'),
+            models.Index(fields=['updated_timestamp'], name='product_updated_timestamp_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Creates an instance from database values and remembers them in `_loaded_values`.
+        - Used to tell whether a save changed a pricing input (see `pricing.jobs.pricing_inputs_changed`).
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     def __str__(self):
         """
         String representation of the Product instance.
         - Returns the product's name for easier identification in queries and logs.
         """
         return self.name
+
+
+class ProductSnapshot(models.Model):
+    """
+    Model to represent a denormalized read copy of a product and its `PricingOptimization` values.
+    - Holds every field the catalog read endpoints return, so they are served by an indexed scan
+      of this table alone instead of joining `Product` and `PricingOptimization` per request.
+    - Rows are never written directly: `products.snapshots.refresh_product_snapshots` rebuilds
+      the rows of the products touched by each write, in the writer's transaction.
+    - `demand_forecast` and `optimized_price` are null when the product has no pricing entry yet.
+    """
+
+    # The product this row mirrors; it is also the primary key, and the row is deleted with the product
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name="snapshot")
+
+    # Copies of the `Product` fields
+    name = models.CharField(max_length=255)
+    category = models.CharField(max_length=255)
+    cost_price = models.DecimalField(max_digits=10, decimal_places=2)
+    selling_price = models.DecimalField(max_digits=10, decimal_places=2)
+    description = models.TextField()
+    stock_available = models.PositiveIntegerField()
+    units_sold = models.PositiveIntegerField(default=0)
+    create_timestamp = models.DateTimeField()
+    updated_timestamp = models.DateTimeField()
+    customer_rating = models.FloatField(null=True, blank=True)
+
+    # Copies of the `PricingOptimization` fields
+    demand_forecast = models.PositiveIntegerField(null=True, blank=True)
+    optimized_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        """
+        Meta options for the ProductSnapshot model.
+        - `indexes`: the same B-tree indexes as `Product` for the catalog filters; the PostgreSQL
+          trigram search indexes are created in the `0005_productsnapshot` migration.
+        """
+        indexes = [
+            models.Index(fields=['category'], name='snapshot_category_idx'),
+            models.Index(fields=['selling_price'], name='snapshot_selling_price_idx'),
+            models.Index(fields=['stock_available'], name='snapshot_stock_available_idx'),
+        ]
+
+    def __str__(self):
+        """
+        String representation of the ProductSnapshot instance.
+        """
+        return f"Snapshot of {self.name}"
+
+
+class CatalogRevision(models.Model):
+    """
+    Model holding the catalog revision: a single-row counter of catalog writes.
+    - Every deletion of a product or pricing row increments it in the deleting transaction, and
+      every insert or update once its transaction commits (see `refresh_product_snapshots`).
+      The latest `updated_timestamp` alone misses deletions, and writes that commit after a
+      newer-stamped one.
+    - It is the catalog fingerprint behind the `ETag` of catalog
+      reads and the cached catalog data (see `products.caching.catalog_validators`), so every web
+      worker and command process agrees on it without a shared cache.
+    """
+
+    # Number of catalog writes so far
+    revision = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        """
+        String representation of the CatalogRevision instance.
+        """
+        return f"Catalog revision {self.revision}"
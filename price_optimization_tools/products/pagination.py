@@ -0,0 +1,26 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class ProductCursorPagination(CursorPagination):
+    """
+    Keyset (cursor) pagination for the product listing.
+    - Pages are addressed by an opaque `cursor` query parameter instead of an offset,
+      so fetching a deep page costs the same as fetching the first one.
+    - Rows are ordered by the unique primary key, which keeps the keyset stable while
+      products are being edited (unlike `updated_timestamp`, which changes on every save).
+    - The page size can be chosen by the client through `page_size`, up to `max_page_size`.
+    """
+
+    # Order by the primary key so the cursor position is a single indexed `pk > n` lookup
+    # (`pk` rather than `id`, since the paginated `ProductSnapshot` rows are keyed by `product`)
+    ordering = 'pk'
+
+    # Default number of products returned per page
+    page_size = getattr(settings, 'PRODUCT_PAGE_SIZE', 100)
+
+    # Query parameter clients can use to request a different page size
+    page_size_query_param = 'page_size'
+
+    # Upper bound for the client-supplied page size
+    max_page_size = getattr(settings, 'PRODUCT_MAX_PAGE_SIZE', 1000)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Product
+from .models import Product, ProductSnapshot
 
 class ProductSerializer(serializers.ModelSerializer):
     """
@@ -19,3 +19,26 @@ class ProductSerializer(serializers.ModelSerializer):
         model = Product
         fields = '__all__'  # Serialize all fields from the Product model.
         read_only_fields = ['create_timestamp', 'updated_timestamp']  # Prevent these fields from being modified.
+
+
+class ProductSnapshotSerializer(serializers.ModelSerializer):
+    """
+    Serializer class for `ProductSnapshot` rows returned by the product endpoints.
+    - Produces the same representation as `ProductSerializer` (the snapshot's primary key is
+      returned as the product `id`); the pricing fields are added by the view.
+    - Read-only: snapshots are only written by `products.snapshots`.
+    """
+
+    # The snapshot's primary key is the product id
+    id = serializers.IntegerField(source='product_id', read_only=True)
+
+    class Meta:
+        """
+        Meta class defines the model and the fields included in the serialized data, in `ProductSerializer` order.
+        """
+        model = ProductSnapshot
+        fields = [
+            'id', 'name', 'category', 'cost_price', 'selling_price', 'description', 'stock_available',
+            'units_sold', 'create_timestamp', 'updated_timestamp', 'customer_rating',
+        ]
+        read_only_fields = fields
@@ -1,6 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from .models import Product
+from .caching import bump_catalog_revision
+from .snapshots import refresh_product_snapshots
+from pricing.jobs import PRICING_INPUT_FIELDS, enqueue_pricing_job, products_needing_pricing
 from pricing.models import PricingOptimization
 
 def calculate_optimized_price(cost_price, selling_price, stock_available, demand_forecast):
@@ -31,40 +34,68 @@ def calculate_demand_forecast(units_sold, stock_available, selling_price):
 @receiver(post_save, sender=Product)
 def create_or_update_pricing_optimization(sender, instance, created, **kwargs):
     """
-    Signal to handle the creation or update of `PricingOptimization` whenever a `Product` is added or updated.
+    Signal to schedule the creation or update of `PricingOptimization` whenever a `Product` is added or updated.
     - Triggered automatically after a `Product` instance is saved.
-    - Creates or updates the associated `PricingOptimization` entry with calculated or provided values.
+    - Enqueues a `PricingJob` in the same transaction instead of writing the pricing row inside the
+      request; the `process_pricing_jobs` worker then writes the provided or calculated values.
+    - Only enqueued when pricing values are supplied, for new products, when a pricing input
+      (cost or selling price, stock, units sold) changed, or when the product has no pricing row
+      yet; other edits, such as a new description, keep the current (possibly manual) prices.
+    - Several saves of the same product before the worker runs are merged into one job.
     """
 
     # Retrieve demand forecast and optimized price from `kwargs` (optional values)
     demand_forecast = kwargs.get('demand_forecast', None)
     optimized_price = kwargs.get('optimized_price', None)
 
-    # Ensure at least one of the key values is provided
-    if demand_forecast is None and optimized_price is None:
-        print("Error: Either `demand_forecast` or `optimized_price` must be provided.")
+    supplied = demand_forecast is not None or optimized_price is not None
+    if supplied or created or products_needing_pricing([instance]):
+        enqueue_pricing_job(instance.pk, demand_forecast=demand_forecast, optimized_price=optimized_price)
+
+    # Later saves of this instance compare their pricing inputs with the values saved now
+    if hasattr(instance, '_loaded_values'):
+        instance._loaded_values.update({field: getattr(instance, field) for field in PRICING_INPUT_FIELDS})
+
+
+@receiver(post_delete, sender=Product)
+def revise_catalog_on_product_delete(sender, instance, origin=None, **kwargs):
+    """
+    Signal to bump the catalog revision whenever a `Product` is deleted.
+    - Saves need nothing: they move the latest `updated_timestamp`, which the catalog fingerprint
+      (and with it the `ETag` and the cached catalog data) is derived from, but deletions do not.
+    - Runs in the deleting transaction, once per deleted instance or queryset.
+    """
+    bump_catalog_revision(origin)
+
+
+@receiver(post_delete, sender=PricingOptimization)
+def revise_catalog_on_pricing_delete(sender, instance, origin=None, **kwargs):
+    """
+    Signal to bump the catalog revision whenever a `PricingOptimization` row is deleted.
+    - Skipped when the pricing row is deleted because its product is (that deletion bumps it already).
+    """
+    if isinstance(origin, Product) or getattr(origin, 'model', None) is Product:
         return
+    bump_catalog_revision(origin)
 
 
-    if created:
-        # If the product is newly created, create a `PricingOptimization` entry
-        PricingOptimization.objects.get_or_create(
-            product=instance,
-            demand_forecast=demand_forecast,
-            optimized_price=optimized_price,
-        )
-    else:
-        # If the product is updated, update the existing `PricingOptimization` entry
-        try:
-            # Attempt to retrieve the existing `PricingOptimization` for the product
-            pricing_optimization = PricingOptimization.objects.get(product=instance)
-            pricing_optimization.demand_forecast = demand_forecast
-            pricing_optimization.optimized_price = optimized_price
-            pricing_optimization.save()
-        except PricingOptimization.DoesNotExist:
-            # If no existing entry exists, create a new one
-            PricingOptimization.objects.create(
-                product=instance,
-                demand_forecast=demand_forecast,
-                optimized_price=optimized_price,
-            )
+@receiver(post_save, sender=Product)
+def refresh_product_snapshot(sender, instance, **kwargs):
+    """
+    Signal to rebuild the `ProductSnapshot` row of a `Product` whenever it is saved.
+    - Runs in the saving transaction, so the snapshot never lags behind the product.
+    - Deleted products need nothing: their snapshot row is removed by the cascade.
+    """
+    refresh_product_snapshots([instance.pk])
+
+
+@receiver(post_save, sender=PricingOptimization)
+@receiver(post_delete, sender=PricingOptimization)
+def refresh_product_snapshot_for_pricing(sender, instance, origin=None, **kwargs):
+    """
+    Signal to rebuild the `ProductSnapshot` row of a product whenever its `PricingOptimization` row is saved or deleted.
+    - Skipped when the pricing row is deleted because its product is (the cascade removes the snapshot too).
+    """
+    if isinstance(origin, Product) or getattr(origin, 'model', None) is Product:
+        return
+    refresh_product_snapshots([instance.product_id])
@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from .caching import bump_catalog_revision
+from .models import Product, ProductSnapshot
+
+# `Product` fields copied to `ProductSnapshot`
+SNAPSHOT_PRODUCT_FIELDS = (
+    'name', 'category', 'cost_price', 'selling_price', 'description', 'stock_available',
+    'units_sold', 'create_timestamp', 'updated_timestamp', 'customer_rating',
+)
+
+# `PricingOptimization` fields copied to `ProductSnapshot`
+SNAPSHOT_PRICING_FIELDS = ('demand_forecast', 'optimized_price')
+
+# Number of products whose snapshot rows are rebuilt per statement
+SNAPSHOT_BATCH_SIZE = getattr(settings, 'SNAPSHOT_BATCH_SIZE', 1000)
+
+
+def build_snapshots(products):
+    """
+    Returns unsaved `ProductSnapshot` instances for a `Product` queryset, read with one LEFT JOIN query.
+    """
+    rows = products.values(
+        'id', *SNAPSHOT_PRODUCT_FIELDS,
+        **{field: F(f'pricing_optimization__{field}') for field in SNAPSHOT_PRICING_FIELDS},
+    )
+    return [ProductSnapshot(product_id=row.pop('id'), **row) for row in rows]
+
+
+def refresh_product_snapshots(product_ids):
+    """
+    Rebuilds the `ProductSnapshot` rows of the given products from their current `Product` and
+    `PricingOptimization` rows.
+    - Called by every write path (the model signals, batch upserts, imports, the pricing job worker
+      and the sales counter updates) in the writer's transaction, so readers never see a product
+      change without its snapshot change.
+    - Each batch costs one joined read and one bulk upsert. Deleted products need no refresh:
+      their snapshot rows are removed by the `on_delete` cascade.
+    - The product rows are locked while their snapshots are rebuilt (on databases supporting
+      `SELECT ... FOR UPDATE`), so concurrent writes to the product and to its pricing cannot both
+      store a snapshot missing the other's change. Callers that also write `PricingJob` rows lock
+      the products first (see `pricing.jobs.process_pricing_jobs` for the lock order).
+    - Every call also bumps the catalog revision once the writer's transaction commits, which
+      moves the catalog fingerprint (see `products.caching.catalog_validators`) whenever the
+      write becomes visible, whatever `updated_timestamp` it was stamped with.
+    """
+    product_ids = sorted(set(product_ids))
+    with transaction.atomic():
+        for start in range(0, len(product_ids), SNAPSHOT_BATCH_SIZE):
+            batch = product_ids[start:start + SNAPSHOT_BATCH_SIZE]
+            snapshots = build_snapshots(
+                Product.objects.filter(id__in=batch).order_by('id').select_for_update(of=('self',))
+            )
+            ProductSnapshot.objects.bulk_create(
+                snapshots,
+                update_conflicts=True,
+                unique_fields=['product'],
+                update_fields=[*SNAPSHOT_PRODUCT_FIELDS, *SNAPSHOT_PRICING_FIELDS],
+            )
+        if product_ids:
+            transaction.on_commit(bump_catalog_revision, robust=True)
+
+
+def rebuild_product_snapshots(batch_size=SNAPSHOT_BATCH_SIZE):
+    """
+    Rebuilds every `ProductSnapshot` row; returns the number of products refreshed.
+    - Used to backfill the table (see the `rebuild_product_snapshots` command); regular writes keep
+      it current incrementally.
+    """
+    total = 0
+    last_id = 0
+    while True:
+        # Keyset pagination on the primary key keeps every batch an indexed range scan
+        ids = list(Product.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        refresh_product_snapshots(ids)
+        total += len(ids)
+        last_id = ids[-1]
+    return total
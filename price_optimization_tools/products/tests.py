@@ -1,3 +1,448 @@
-from django.test import TestCase
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock, skipUnless
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.test import AsyncClient, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from asgiref.sync import sync_to_async
+from accounts.models import CustomUser
+from accounts.views import CustomTokenObtainPairSerializer
+from pricing.jobs import process_pricing_jobs
+from pricing.models import PricingJob, PricingOptimization
+from pricing.tests import create_products
+from .caching import catalog_validators
+from .exports import msgpack, pyarrow
+from .models import CatalogRevision, Product, ProductSnapshot
+from .pagination import ProductCursorPagination
+from .snapshots import refresh_product_snapshots
 
-# Create your tests here.
+# Sample catalog shipped with the case study, in the format accepted by the bulk import
+SAMPLE_CSV_PATH = Path(settings.BASE_DIR).parent / 'Case Study Requirements' / 'product_data.csv'
+
+
+class ProductManagementViewTests(TestCase):
+    """
+    Tests for the product listing in `ProductManagementView`.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            email='supplier@example.com', password='password', username='supplier', role='supplier'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('product-list-create')
+
+    def test_cursor_pagination_walks_every_product_once(self):
+        products = create_products(5)
+
+        seen_ids = []
+        response = self.client.get(self.url, {'page_size': 2})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            seen_ids.extend(row['id'] for row in page['results'])
+            if not page['next']:
+                break
+            response = self.client.get(page['next'])
+
+        self.assertEqual(seen_ids, [product.id for product in products])
+
+    def test_page_size_is_bounded(self):
+        create_products(5)
+
+        with mock.patch.object(ProductCursorPagination, 'max_page_size', 3):
+            response = self.client.get(self.url, {'page_size': 1000})
+
+        self.assertEqual(len(response.json()['results']), 3)
+        self.assertIsNotNone(response.json()['next'])
+
+    def test_cursor_stays_stable_while_products_are_edited(self):
+        products = create_products(4)
+        first_page = self.client.get(self.url, {'page_size': 2}).json()
+
+        # Edits move `updated_timestamp` but not the keyset position; new products come last
+        products[0].name = 'Renamed'
+        products[0].save()
+        products[3].save()
+        added = create_products(1)[0]
+
+        second_page = self.client.get(first_page['next']).json()
+        self.assertEqual(
+            [row['id'] for row in first_page['results'] + second_page['results']],
+            [product.id for product in products],
+        )
+        self.assertEqual([row['id'] for row in self.client.get(second_page['next']).json()['results']], [added.id])
+
+    def test_unpaginated_list_is_opt_in(self):
+        create_products(3)
+
+        response = self.client.get(self.url, {'paginate': 'false'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 3)
+        self.assertEqual(response.json()[0]['optimized_price'], 12.5)
+
+    def test_ndjson_export_matches_unpaginated_list(self):
+        create_products(3)
+        json_rows = self.client.get(self.url, {'paginate': 'false'}).json()
+
+        response = self.client.get(self.url, HTTP_ACCEPT='application/x-ndjson')
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], json_rows)
+
+    @skipUnless(msgpack and pyarrow, "msgpack and pyarrow are optional dependencies")
+    def test_binary_exports_keep_value_types(self):
+        products = create_products(3)
+        json_rows = self.client.get(self.url, {'paginate': 'false'}).json()
+
+        response = self.client.get(self.url, HTTP_ACCEPT='application/vnd.apache.arrow.stream')
+        self.assertEqual(response['Content-Type'], 'application/vnd.apache.arrow.stream')
+        table = pyarrow.ipc.open_stream(b''.join(response.streaming_content)).read_all()
+        self.assertEqual(table.column_names, list(json_rows[0].keys()))
+        self.assertEqual(table.column('cost_price').to_pylist(), [Decimal('10.00')] * 3)
+        self.assertEqual(table.column('create_timestamp').to_pylist(), [product.create_timestamp for product in products])
+
+        response = self.client.get(self.url, {'format': 'msgpack'})
+        header, *rows = msgpack.Unpacker(io.BytesIO(b''.join(response.streaming_content)), timestamp=3)
+        rows = [dict(zip(header, row)) for row in rows]
+        self.assertEqual([row['id'] for row in rows], [row['id'] for row in json_rows])
+        self.assertEqual(rows[0]['selling_price'], 15.0)
+        self.assertEqual(rows[0]['updated_timestamp'], products[0].updated_timestamp)
+
+    async def test_async_read_path_matches_wsgi_responses(self):
+        products = await sync_to_async(create_products)(3)
+        token = (await sync_to_async(CustomTokenObtainPairSerializer.get_token)(self.user)).access_token
+        client = AsyncClient()
+        headers = {'Authorization': f'Bearer {token}'}
+
+        for url, params in (
+            (self.url, {'page_size': 2}),
+            (self.url, {'paginate': 'false', 'category': 'Electronics'}),
+            (reverse('product-detail', args=[products[0].id]), {}),
+        ):
+            expected = await sync_to_async(self.client.get)(url, params)
+            response = await client.get(url, params, headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), expected.json())
+
+        response = await client.get(reverse('product-detail', args=[999999]), headers=headers)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'error': 'Product not found'})
+
+
+class ProductImportTests(TestCase):
+    """
+    Tests for the bulk CSV import command and upload endpoint.
+    """
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email='supplier@example.com', password='password', username='supplier', role='supplier'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('product-import')
+
+    def upload(self, content, partial=False):
+        csv_file = SimpleUploadedFile('products.csv', content.encode(), content_type='text/csv')
+        return self.client.post(f"{self.url}?partial=true" if partial else self.url, {'file': csv_file})
+
+    def test_command_imports_sample_catalog(self):
+        call_command('import_products', str(SAMPLE_CSV_PATH), batch_size=3, stdout=io.StringIO())
+
+        self.assertEqual(Product.objects.count(), 10)
+        self.assertEqual(PricingOptimization.objects.count(), 10)
+        pricing = PricingOptimization.objects.get(product__name='Eco-Friendly Water Bottle')
+        self.assertEqual(pricing.demand_forecast, 250)
+        self.assertEqual(str(pricing.optimized_price), '11.50')
+
+    def test_invalid_row_aborts_import(self):
+        header = SAMPLE_CSV_PATH.read_text().splitlines()[0]
+        content = f"{header}\n1,Lamp,A lamp,5.0,12.99,Home,10,2,,,\n2,Desk,A desk,oops,99.0,Home,5,1,,,\n"
+
+        response = self.upload(content)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['created'], 0)
+        self.assertEqual(response.data['errors'][0]['row'], 3)
+        self.assertIn('cost_price', response.data['errors'][0]['errors'])
+        self.assertFalse(Product.objects.exists())
+
+        response = self.upload(content, partial=True)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(PricingOptimization.objects.get(product__name='Lamp').demand_forecast, 3)
+
+
+class ProductBatchViewTests(TestCase):
+    """
+    Tests for the batch upsert and delete endpoint.
+    """
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email='supplier@example.com', password='password', username='supplier', role='supplier'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('product-batch')
+
+    def test_upsert_reports_status_per_item(self):
+        first, second = create_products(2)
+        new_product = {
+            'name': 'Lamp', 'category': 'Home', 'cost_price': '5.00', 'selling_price': '12.99',
+            'description': 'A lamp', 'stock_available': 10, 'units_sold': 2,
+        }
+
+        response = self.client.patch(self.url, [
+            {'id': first.id, 'selling_price': '20.00'},
+            {'id': second.id, 'optimized_price': '11.00'},
+            {'id': 999999, 'selling_price': '1.00'},
+            {'id': first.id, 'stock_available': 1},
+            {'id': second.id + 1000, 'cost_price': 'oops'},
+            new_product,
+            {'name': 'Incomplete'},
+        ], format='json')
+
+        self.assertEqual(response.status_code, 200)
+        statuses = [item['status'] for item in response.data['results']]
+        self.assertEqual(statuses, ['updated', 'updated', 'not_found', 'invalid', 'not_found', 'created', 'invalid'])
+
+        first.refresh_from_db()
+        self.assertEqual(str(first.selling_price), '20.00')
+
+        # Pricing is left to the job worker, like single product saves
+        self.assertEqual(first.pricing_optimization.demand_forecast, 50)
+        self.assertEqual(PricingJob.objects.count(), 3)
+        process_pricing_jobs()
+        first.refresh_from_db()
+        self.assertEqual(first.pricing_optimization.demand_forecast, 26)
+        self.assertEqual(str(PricingOptimization.objects.get(product=second).optimized_price), '11.00')
+        created_id = response.data['results'][5]['id']
+        self.assertEqual(PricingOptimization.objects.get(product_id=created_id).demand_forecast, 3)
+
+    def test_edits_without_pricing_inputs_keep_the_prices(self):
+        priced, unpriced = create_products(2)
+        PricingOptimization.objects.filter(product=unpriced).delete()
+
+        response = self.client.patch(self.url, [
+            {'id': priced.id, 'description': 'New description'},
+            {'id': unpriced.id, 'description': 'New description'},
+        ], format='json')
+
+        self.assertEqual([item['status'] for item in response.data['results']], ['updated', 'updated'])
+        self.assertEqual(list(PricingJob.objects.values_list('product_id', flat=True)), [unpriced.id])
+        self.assertEqual(ProductSnapshot.objects.get(pk=priced.id).description, 'New description')
+
+    def test_updated_products_are_locked_inside_the_transaction(self):
+        product = create_products(1)[0]
+        select_for_update = QuerySet.select_for_update
+        depth = len(transaction.get_connection().savepoint_ids)
+        locks = []
+
+        def record_lock(queryset, *args, **kwargs):
+            locks.append((queryset.model, len(transaction.get_connection().savepoint_ids)))
+            return select_for_update(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'select_for_update', autospec=True, side_effect=record_lock):
+            response = self.client.patch(self.url, [{'id': product.id, 'stock_available': 5}], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['status'], 'updated')
+        # The products were looked up (and locked) in the savepoint opened by `upsert_products`
+        self.assertEqual(locks[0], (Product, depth + 1))
+
+    def test_delete_removes_products_and_pricing(self):
+        products = create_products(3)
+        ids = [products[0].id, products[1].id, 999999]
+
+        response = self.client.delete(self.url, {'ids': ids}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['status'] for item in response.data['results']], ['deleted', 'deleted', 'not_found'])
+        self.assertEqual(list(Product.objects.values_list('id', flat=True)), [products[2].id])
+        self.assertEqual(PricingOptimization.objects.count(), 1)
+
+
+class CategoryFacetViewTests(TestCase):
+    """
+    Tests for the cached category facet endpoint.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            email='buyer@example.com', password='password', username='buyer', role='buyer'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('product-categories')
+
+    def test_counts_and_aggregates(self):
+        create_products(5)
+
+        response = self.client.get(self.url, {'aggregates': 'true'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(row['category'], row['product_count']) for row in response.data],
+                         [('Electronics', 2), ('Stationary', 3)])
+        self.assertEqual(response.data[1]['total_stock_available'], 300)
+        self.assertEqual(response.data[1]['max_selling_price'], Decimal('15.00'))
+
+    def test_cached_until_a_product_changes(self):
+        products = create_products(2)
+        self.client.get(self.url)
+
+        # Only the catalog fingerprint is queried; the facets come from the cache
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data), 2)
+
+        products[0].category = 'Garden'
+        products[0].save()
+
+        response = self.client.get(self.url)
+        self.assertEqual([row['category'] for row in response.data], ['Electronics', 'Garden'])
+
+    def test_writes_from_other_processes_invalidate_the_cache(self):
+        products = create_products(3)
+        self.assertEqual(len(self.client.get(self.url).data), 2)
+
+        # A write without model signals, as another process would leave it in the database
+        Product.objects.filter(pk=products[0].pk).update(category='Garden', updated_timestamp=timezone.now())
+        response = self.client.get(self.url)
+        self.assertEqual([row['category'] for row in response.data], ['Electronics', 'Garden', 'Stationary'])
+
+        # Deletions leave the timestamps alone but bump the catalog revision, once per queryset
+        revision = CatalogRevision.objects.get().revision
+        Product.objects.filter(pk__in=[products[0].pk, products[1].pk]).delete()
+        self.assertEqual(CatalogRevision.objects.get().revision, revision + 1)
+        response = self.client.get(self.url)
+        self.assertEqual([(row['category'], row['product_count']) for row in response.data], [('Stationary', 1)])
+
+    def test_writes_committed_out_of_timestamp_order_invalidate_the_cache(self):
+        products = create_products(2)
+        self.assertEqual(len(self.client.get(self.url).data), 2)
+        _, last_modified = catalog_validators()
+
+        # A write stamped before the latest timestamp (e.g. by a long import) that commits afterwards
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.filter(pk=products[0].pk).update(
+                category='Garden', updated_timestamp=last_modified - timedelta(minutes=5)
+            )
+            refresh_product_snapshots([products[0].pk])
+
+        self.assertEqual(catalog_validators()[1], last_modified)
+        response = self.client.get(self.url)
+        self.assertEqual([row['category'] for row in response.data], ['Electronics', 'Garden'])
+
+
+class ProductSnapshotTests(TestCase):
+    """
+    Tests that the denormalized `ProductSnapshot` table follows every write and serves the reads.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            email='supplier@example.com', password='password', username='supplier', role='supplier'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def snapshot(self, product_id):
+        return ProductSnapshot.objects.values('name', 'selling_price', 'demand_forecast', 'optimized_price').get(
+            pk=product_id
+        )
+
+    def test_snapshot_follows_product_and_pricing_writes(self):
+        response = self.client.post(reverse('product-list-create'), {
+            'name': 'Lamp', 'category': 'Home', 'cost_price': '5.00', 'selling_price': '12.99',
+            'description': 'A lamp', 'stock_available': 10, 'units_sold': 2, 'optimized_price': '9.99',
+        }, format='json')
+        product_id = response.data['id']
+        self.assertEqual(self.snapshot(product_id), {
+            'name': 'Lamp', 'selling_price': Decimal('12.99'), 'demand_forecast': None, 'optimized_price': None,
+        })
+
+        # The pricing worker's bulk upsert refreshes the snapshot too
+        process_pricing_jobs()
+        self.assertEqual(self.snapshot(product_id)['optimized_price'], Decimal('9.99'))
+
+        self.client.patch(reverse('product-batch'), [{'id': product_id, 'name': 'Desk lamp'}], format='json')
+        self.assertEqual(self.snapshot(product_id)['name'], 'Desk lamp')
+
+        PricingOptimization.objects.get(product_id=product_id).delete()
+        self.assertIsNone(self.snapshot(product_id)['optimized_price'])
+
+        self.client.delete(reverse('product-detail', args=[product_id]))
+        self.assertFalse(ProductSnapshot.objects.exists())
+
+    def test_product_writes_refresh_the_snapshot_once(self):
+        product = {
+            'name': 'Lamp', 'category': 'Home', 'cost_price': '5.00', 'selling_price': '12.99',
+            'description': 'A lamp', 'stock_available': 10, 'units_sold': 2,
+        }
+        with mock.patch('products.signals.refresh_product_snapshots') as refresh:
+            response = self.client.post(reverse('product-list-create'), {**product, 'optimized_price': '9.99'}, format='json')
+            self.client.put(reverse('product-detail', args=[response.data['id']]), {**product, 'stock_available': 20}, format='json')
+
+        self.assertEqual(refresh.call_count, 2)
+        self.assertEqual(list(PricingJob.objects.values_list('optimized_price', flat=True)), [Decimal('9.99')])
+
+    def test_invalid_pricing_values_are_rejected(self):
+        product = {
+            'name': 'Lamp', 'category': 'Home', 'cost_price': '5.00', 'selling_price': '12.99',
+            'description': 'A lamp', 'stock_available': 10, 'units_sold': 2,
+        }
+        response = self.client.post(reverse('product-list-create'), {**product, 'optimized_price': 'cheap'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('optimized_price', response.data)
+        self.assertFalse(Product.objects.exists())
+
+        product_id = self.client.post(reverse('product-list-create'), product, format='json').data['id']
+        response = self.client.put(
+            reverse('product-detail', args=[product_id]), {**product, 'stock_available': 20, 'demand_forecast': 'many'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('demand_forecast', response.data)
+        self.assertEqual(Product.objects.get(pk=product_id).stock_available, 10)
+        self.assertFalse(PricingJob.objects.exclude(demand_forecast=None).exists())
+
+    def test_reads_are_served_from_the_snapshot_table_alone(self):
+        products = create_products(3)
+        for url, params in (
+            (reverse('product-list-create'), {'page_size': 2}),
+            (reverse('product-detail', args=[products[0].id]), {}),
+            (reverse('pricing-optimization'), {'category': 'Electronics'}),
+        ):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(url, params).status_code, 200)
+            data_queries = [query['sql'] for query in queries if 'products_productsnapshot' in query['sql']]
+            self.assertEqual(len(data_queries), 1)
+            self.assertNotIn('JOIN', data_queries[0])
+
+    def test_rebuild_command_restores_the_table(self):
+        products = create_products(3)
+        Product.objects.filter(id=products[0].id).update(name='Renamed')
+        ProductSnapshot.objects.filter(pk=products[1].id).delete()
+
+        call_command('rebuild_product_snapshots', batch_size=2, stdout=io.StringIO())
+
+        self.assertEqual(ProductSnapshot.objects.count(), 3)
+        self.assertEqual(self.snapshot(products[0].id)['name'], 'Renamed')
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import ProductManagementView
+from .views import ProductManagementView, ProductImportView, ProductBatchView, CategoryFacetView
 
 # Define the URL patterns for the product management API
 urlpatterns = [
@@ -13,4 +13,18 @@ urlpatterns = [
     # - PUT: Update details of a specific product (requires appropriate permissions).
     # - DELETE: Delete a specific product (requires appropriate permissions).
     path('products/<int:pk>/', ProductManagementView.as_view(), name='product-detail'),
+
+    # Endpoint for bulk importing products from a CSV file
+    # - POST: Upload a CSV `file` in the `product_data.csv` format (requires appropriate permissions).
+    # - Pass `?partial=true` to keep the valid rows when some rows are invalid.
+    path('products/import/', ProductImportView.as_view(), name='product-import'),
+
+    # Endpoint for applying many product changes in one request (requires appropriate permissions)
+    # - PATCH: Upsert a list of products; items with an `id` are partial updates, others are created.
+    # - DELETE: Delete the products listed in `{"ids": [...]}`.
+    path('products/batch/', ProductBatchView.as_view(), name='product-batch'),
+
+    # Endpoint for the category facets used by the category dropdown
+    # - GET: Distinct categories with product counts (`?aggregates=true` adds price and stock aggregates).
+    path('categories/', CategoryFacetView.as_view(), name='product-categories'),
 ]
\ No newline at end of file
@@ -1,61 +1,136 @@
+import csv
+import io
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from accounts.permissions import IsAdmin, IsSupplier, IsBuyer
-from .models import Product
-from .serializers import ProductSerializer
-from django.db.models.signals import post_save
+from rest_framework.parsers import MultiPartParser
+from rest_framework.settings import api_settings
+from accounts.permissions import IS_ADMIN_OR_SUPPLIER, IS_ANY_ROLE
+from .models import Product, ProductSnapshot
+from .serializers import ProductSerializer, ProductSnapshotSerializer
+from .pagination import ProductCursorPagination
+from .exports import EXPORT_CHUNK_SIZE, EXPORT_RENDERERS, is_export_request, streaming_export_response
+from .importers import import_product_rows, read_csv_rows, validate_pricing_values
+from .batch import BATCH_MAX_ITEMS, delete_products, upsert_products
+from .filters import filter_products
+from .async_views import AsyncAPIView
+from .caching import acached_catalog_response, cached_catalog_value
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min, Sum
+from pricing.jobs import enqueue_pricing_job
 
-class ProductManagementView(APIView):
+class ProductManagementView(AsyncAPIView):
     """
     API view for managing product-related operations, including:
     - GET: Retrieve product(s) data.
     - POST: Create a new product.
     - PUT: Update an existing product.
     - DELETE: Delete an existing product.
+    - Async view: GET reads with Django's async ORM; the write handlers stay synchronous.
     """
 
     # Permissions required for accessing this view
     permission_classes = [IsAuthenticated]
 
-    def get(self, request, pk=None):
+    # JSON by default; NDJSON and CSV (via `Accept` or `?format=`) stream the product list as an export
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, *EXPORT_RENDERERS]
+
+    async def get(self, request, pk=None):
         """
         Handles GET requests:
         - If `pk` is provided, retrieves details of a specific product.
-        - If `pk` is not provided, retrieves a list of all products.
+        - If `pk` is not provided, retrieves one page of products using keyset (cursor) pagination.
+          The response contains `next`/`previous` cursor links and the page `results`.
+          Pass `paginate=false` to opt in to the legacy unpaginated list of all products.
+        - For NDJSON/CSV (and, when installed, MessagePack/Arrow) requests, streams every product in
+          chunks instead of paginating.
+        - The list can be narrowed with `search`, `category`, `min_price`, `max_price`, `min_stock`
+          and `max_stock` query parameters.
+        - JSON list responses are served from the catalog response cache and carry `ETag` and
+          `Last-Modified` headers, so unchanged clients get a 304.
         - Includes related PricingOptimization data (e.g., demand forecast, optimized price).
+        - Products are read from the denormalized `ProductSnapshot` table, which already holds
+          the pricing fields, so every read is a single-table query.
         """
-        # Retrieve all products with related PricingOptimization data
-        products = Product.objects.all().prefetch_related('pricing_optimization')
-
+        # Retrieve the product snapshots (product and PricingOptimization fields in one row)
+        products = ProductSnapshot.objects.all()
 
         # Fetch details for a specific product if `pk` is provided
         if pk:
             try:
-                product = Product.objects.prefetch_related('pricing_optimization').get(pk=pk)
-                product_data = ProductSerializer(product).data
+                product = await products.aget(pk=pk)
+                return Response(self.serialize_products([product])[0], status=status.HTTP_200_OK)
+            except ProductSnapshot.DoesNotExist:
+                return Response({"error": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
 
-                # Add PricingOptimization data if it exists
-                if hasattr(product, 'pricing_optimization'):
-                    product_data['demand_forecast']  = product.pricing_optimization.demand_forecast
-                    product_data['optimized_price'] =  product.pricing_optimization.optimized_price
+        # Apply the search and filter query parameters (text search, category, price and stock ranges)
+        products = filter_products(products, request.query_params)
 
-                return Response(product_data, status=status.HTTP_200_OK)
-            except Product.DoesNotExist:
-                return Response({"error": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
-        else:
-            # Fetch all products and include PricingOptimization data
-            product_list = []
-            for product in products:
-                product_data = ProductSerializer(product).data
-
-                # Add PricingOptimization data if it exists
-                if hasattr(product, 'pricing_optimization'):
-                    product_data['demand_forecast']  = product.pricing_optimization.demand_forecast
-                    product_data['optimized_price'] =  product.pricing_optimization.optimized_price
-                product_list.append(product_data)
-            return Response(product_list, status=status.HTTP_200_OK)
+        # Stream every product for export formats, reading them from the database in chunks
+        if is_export_request(request):
+            # The rows are read while the response streams, after `ReplicaRoutingMiddleware` has
+            # returned; pick the database now, while the request's routing state is still set
+            products = products.using(products.db)
+            columns = [*ProductSnapshotSerializer().fields, 'demand_forecast', 'optimized_price']
+            if getattr(request.accepted_renderer, 'native_rows', False):
+                # Binary formats carry typed values, so the rows are read as they are instead of serialized
+                rows = (
+                    dict(zip(columns, row))
+                    for row in products.order_by('pk').values_list('pk', *columns[1:]).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+                )
+            else:
+                rows = self.iter_serialized_products(products.order_by('pk'))
+            return streaming_export_response(request, columns, rows, 'products', model=ProductSnapshot)
+
+        async def build_data():
+            # DRF's cursor pagination is synchronous; run it in the request's worker thread
+            return await sync_to_async(self.list_products)(request, products)
+
+        # Serve the list from the response cache; it is only rebuilt after the catalog changes
+        return await acached_catalog_response(self, request, build_data)
+
+    def list_products(self, request, products):
+        """
+        Builds the product list response data for a filtered product queryset.
+        - Returns one cursor-paginated page, or every product when `paginate=false` is passed.
+        """
+        # Legacy behaviour: return every product in a single response (explicit opt-in only)
+        if request.query_params.get('paginate', '').lower() in ('false', '0', 'no'):
+            return self.serialize_products(products.order_by('pk'))
+
+        # Fetch a single page of products, positioned by the opaque `cursor` query parameter
+        paginator = ProductCursorPagination()
+        page = paginator.paginate_queryset(products, request, view=self)
+        return paginator.get_paginated_response(self.serialize_products(page)).data
+
+    @staticmethod
+    def serialize_products(products):
+        """
+        Serializes a list of product snapshots with a single serializer instance.
+        - Adds the demand forecast and optimized price copied from the PricingOptimization row
+          (both null if the product has no pricing entry yet).
+        """
+        product_list = ProductSnapshotSerializer(products, many=True).data
+        for product, product_data in zip(products, product_list):
+            product_data['demand_forecast'] = product.demand_forecast
+            product_data['optimized_price'] = product.optimized_price
+        return product_list
+
+    @classmethod
+    def iter_serialized_products(cls, products):
+        """
+        Lazily serializes a product queryset, reading and serializing `EXPORT_CHUNK_SIZE` rows at a time.
+        """
+        chunk = []
+        for product in products.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            chunk.append(product)
+            if len(chunk) == EXPORT_CHUNK_SIZE:
+                yield from cls.serialize_products(chunk)
+                chunk = []
+        if chunk:
+            yield from cls.serialize_products(chunk)
 
     def post(self, request):
         """
@@ -66,25 +141,23 @@ class ProductManagementView(APIView):
         """
 
         # Check if the user has the required permissions
-        if not (request.user.is_authenticated and 
-                (IsAdmin().has_permission(request, self) or 
-                 IsSupplier().has_permission(request, self))):
+        if not IS_ADMIN_OR_SUPPLIER.has_permission(request, self):
             return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
 
 
-        # Retrieve optional fields from the request
-        demand_forecast = request.data.get('demand_forecast', None)
-        optimized_price = request.data.get('optimized_price', None)
+        # Validate the optional pricing fields of the request
+        (demand_forecast, optimized_price), pricing_errors = validate_pricing_values(request.data)
 
         # Serialize and validate the product data
         serializer = ProductSerializer(data=request.data)
-        if serializer.is_valid():
-            product = serializer.save()
-            # Trigger post_save signal with additional fields
-            post_save.send(sender=Product, instance=product, created=True, 
-                           demand_forecast=demand_forecast, optimized_price=optimized_price)
+        if serializer.is_valid() and not pricing_errors:
+            with transaction.atomic():
+                # Saving sends `post_save`, which enqueues the pricing job; supplied values are added to it
+                product = serializer.save()
+                if demand_forecast is not None or optimized_price is not None:
+                    enqueue_pricing_job(product.pk, demand_forecast=demand_forecast, optimized_price=optimized_price)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response({**serializer.errors, **pricing_errors}, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, pk=None):
         """
@@ -93,9 +166,7 @@ class ProductManagementView(APIView):
         - Restricted to Admins, Suppliers, or Buyers.
         """
         # Check if the user has the required permissions
-        if not (request.user.is_authenticated and 
-                (IsAdmin().has_permission(request, self) or 
-                 IsSupplier().has_permission(request, self))):
+        if not IS_ADMIN_OR_SUPPLIER.has_permission(request, self):
             return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
 
         # Try to fetch and delete the product
@@ -114,25 +185,163 @@ class ProductManagementView(APIView):
         - Accepts optional demand forecast and optimized price fields.
         """
         # Check if the user has the required permissions
-        if not (request.user.is_authenticated and 
-                (IsAdmin().has_permission(request, self) or 
-                 IsSupplier().has_permission(request, self))):
+        if not IS_ADMIN_OR_SUPPLIER.has_permission(request, self):
             return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
         
         # Try to fetch the product for updating
         try:
-            demand_forecast = request.data.get('demand_forecast', None)
-            optimized_price = request.data.get('optimized_price', None)
             product = Product.objects.get(pk=pk)
         except Product.DoesNotExist:
             return Response({"error": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
 
+        # Validate the optional pricing fields of the request
+        (demand_forecast, optimized_price), pricing_errors = validate_pricing_values(request.data)
+
         # Serialize and validate the updated product data
         serializer = ProductSerializer(product, data=request.data)
-        if serializer.is_valid():
-            product = serializer.save()
-            # Trigger post_save signal with additional fields
-            post_save.send(sender=Product, instance=product, updated=True, created=False, 
-                           demand_forecast=demand_forecast, optimized_price=optimized_price)
+        if serializer.is_valid() and not pricing_errors:
+            with transaction.atomic():
+                # Saving sends `post_save`, which enqueues the pricing job; supplied values are added to it
+                product = serializer.save()
+                if demand_forecast is not None or optimized_price is not None:
+                    enqueue_pricing_job(product.pk, demand_forecast=demand_forecast, optimized_price=optimized_price)
             return Response(serializer.data, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return Response({**serializer.errors, **pricing_errors}, status=status.HTTP_400_BAD_REQUEST)
+
+class ProductImportView(APIView):
+    """
+    API view for bulk importing products from a CSV file upload.
+    - POST: Accepts a `file` in the `product_data.csv` format and creates the products and their
+      pricing rows with batched inserts inside a single transaction.
+    """
+
+    # Permissions required for accessing this view
+    permission_classes = [IsAuthenticated]
+
+    # The CSV file is sent as a multipart form upload
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        """
+        Handles POST requests to import products from an uploaded CSV file.
+        - Restricted to Admins and Suppliers.
+        - Reports validation errors per CSV row. By default nothing is imported if any row is
+          invalid; pass `partial=true` to import the valid rows anyway.
+        """
+        # Check if the user has the required permissions
+        if not IS_ADMIN_OR_SUPPLIER.has_permission(request, self):
+            return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+
+        csv_file = request.FILES.get('file')
+        if csv_file is None:
+            return Response({"error": "No CSV file provided"}, status=status.HTTP_400_BAD_REQUEST)
+
+        partial = request.query_params.get('partial', '').lower() in ('true', '1', 'yes')
+        try:
+            rows = read_csv_rows(io.TextIOWrapper(csv_file.file, encoding='utf-8-sig', newline=''))
+            result = import_product_rows(rows, partial=partial)
+        except (UnicodeDecodeError, csv.Error) as exc:
+            return Response({"error": f"Invalid CSV file: {exc}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # An all-or-nothing import with invalid rows creates nothing
+        if result['errors'] and not partial:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_201_CREATED)
+
+
+class ProductBatchView(APIView):
+    """
+    API view for applying many product changes in a single request, including:
+    - PATCH: Upsert a list of products (partial updates for items with an `id`, creations otherwise).
+    - DELETE: Delete a list of products by id.
+    Each request runs in one transaction and returns a status for every item.
+    """
+
+    # Permissions required for accessing this view
+    permission_classes = [IsAuthenticated]
+
+    def check_batch_permission(self, request):
+        """
+        Returns a 403 response unless the user is an Admin or a Supplier.
+        """
+        if not IS_ADMIN_OR_SUPPLIER.has_permission(request, self):
+            return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+        return None
+
+    def patch(self, request):
+        """
+        Handles PATCH requests to create or partially update many products.
+        - Expects a JSON list of product objects; objects with an `id` update that product.
+        - Accepts optional demand forecast and optimized price fields on each object.
+        """
+        denied = self.check_batch_permission(request)
+        if denied:
+            return denied
+
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Expected a non-empty list of products"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > BATCH_MAX_ITEMS:
+            return Response({"error": f"At most {BATCH_MAX_ITEMS} products per batch"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({"results": upsert_products(items)}, status=status.HTTP_200_OK)
+
+    def delete(self, request):
+        """
+        Handles DELETE requests to delete many products.
+        - Expects `{"ids": [...]}` in the request body.
+        """
+        denied = self.check_batch_permission(request)
+        if denied:
+            return denied
+
+        ids = request.data.get("ids", []) if isinstance(request.data, dict) else []
+        if not ids or not all(isinstance(product_id, int) for product_id in ids):
+            return Response({"error": "Expected a non-empty list of product IDs"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > BATCH_MAX_ITEMS:
+            return Response({"error": f"At most {BATCH_MAX_ITEMS} products per batch"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({"results": delete_products(ids)}, status=status.HTTP_200_OK)
+
+
+class CategoryFacetView(APIView):
+    """
+    API view returning the distinct product categories with product counts.
+    - GET: Lists every category with its `product_count`; pass `aggregates=true` to also get the
+      minimum, maximum and average selling price and the total available stock per category.
+    - Computed with one GROUP BY on the indexed `category` column and cached until a product changes:
+      the cache entry is checked against the database catalog fingerprint on every request (see
+      `cached_catalog_value`), so writes made by any worker or command process invalidate it.
+    """
+
+    # Permissions required for accessing this view
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        Handles GET requests to list the category facets.
+        """
+        # Check if the user has the required permissions
+        if not IS_ANY_ROLE.has_permission(request, self):
+            return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+
+        with_aggregates = request.query_params.get('aggregates', '').lower() in ('true', '1', 'yes')
+        facets = cached_catalog_value(
+            f'categories:aggregates={with_aggregates}', lambda: self.compute_facets(with_aggregates)
+        )
+        return Response(facets, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def compute_facets(with_aggregates):
+        """
+        Groups products by category and returns one dict per category, ordered by category name.
+        """
+        aggregates = {'product_count': Count('id')}
+        if with_aggregates:
+            aggregates.update(
+                min_selling_price=Min('selling_price'),
+                max_selling_price=Max('selling_price'),
+                avg_selling_price=Avg('selling_price'),
+                total_stock_available=Sum('stock_available'),
+            )
+        return list(Product.objects.values('category').annotate(**aggregates).order_by('category'))